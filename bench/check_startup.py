@@ -0,0 +1,99 @@
+# check_startup.py
+# Cold-start budget check for the CLI (fails when startup regresses).
+# Runs 'src/logic.py <CODE>' as fresh processes against the local fixture
+# server (stub_server.py) with a warmed cache, and compares the median wall
+# time with a bare 'python -c pass' started the same way (runs alternate, so
+# host load hits both alike). The budget is --budget-ms, raised to
+# --budget-ratio x that baseline on slow or loaded machines (ratio 0: fixed):
+#
+#   python bench/check_startup.py [--budget-ms 60] [--budget-ratio 1.5] [--runs 15]
+#
+# Also fails if a plain lookup imports a heavy module that must stay lazy
+# (requests/numpy for cached lookups, msl.loadlib without -C). Exit status 1
+# on any failure, so it can gate CI next to run_benchmarks.py --compare.
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import List, Dict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import StubServer, FixtureStore
+
+LAZY_MODULES = ("requests", "numpy", "msl.loadlib") # Must not be imported by a cached plain lookup
+DEFAULT_BUDGET_MS = 60.0   # Allowed median overhead over a bare interpreter...
+DEFAULT_BUDGET_RATIO = 1.5 # ...or this multiple of the bare interpreter's startup, if larger
+
+
+def wall_time(command: List[str], env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0: raise RuntimeError(f"{' '.join(command)} failed ({result.returncode}):\n{result.stderr}")
+    return elapsed
+
+
+def interleaved_wall_times(commands: List[List[str]], env: Dict[str, str], runs: int) -> List[List[float]]:
+    """runs wall times (seconds) per command, the commands taking turns."""
+    samples: List[List[float]] = [[] for _ in commands]
+    for _ in range(runs):
+        for command, times in zip(commands, samples): times.append(wall_time(command, env))
+    return samples
+
+
+def imported_modules(command: List[str], env: Dict[str, str]) -> List[str]:
+    """Top-level modules from LAZY_MODULES that the command imported (python -X importtime)."""
+    result = subprocess.run([command[0], "-X", "importtime"] + command[1:], env=env, capture_output=True, text=True)
+    found = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"): continue
+        name = line.rsplit("|", 1)[-1].strip()
+        if name in LAZY_MODULES: found.add(name)
+    return sorted(found)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail if the CLI's cold start exceeds its budget.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help=f"Allowed median overhead over 'python -c pass' (default: {DEFAULT_BUDGET_MS:.0f}).")
+    parser.add_argument("--budget-ratio", type=float, default=DEFAULT_BUDGET_RATIO, help=f"Raise the budget to this multiple of 'python -c pass' when larger (default: {DEFAULT_BUDGET_RATIO:g}; 0 = fixed budget).")
+    parser.add_argument("--runs", type=int, default=15, help="Processes started per measurement (median is used).")
+    parser.add_argument("--country", default="ARG", help="Fixture country to look up.")
+    args = parser.parse_args()
+
+    server = StubServer(store=FixtureStore()).start_background()
+    failures = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="gini_startup_cache_") as cache_dir:
+            env = dict(os.environ, GINI_API_BASE_URL=server.base_url, GINI_CACHE_DIR=cache_dir, GINI_LOG_LEVEL="WARNING")
+            lookup = [sys.executable, os.path.join(SRC_DIR, "logic.py"), args.country, "--cache-dir", cache_dir]
+            wall_time(lookup, env) # Warm the cache (and the OS file cache)
+            bare_times, lookup_times = interleaved_wall_times([[sys.executable, "-c", "pass"], lookup], env, args.runs)
+            baseline, cold = statistics.median(bare_times) * 1000, statistics.median(lookup_times) * 1000
+            heavy = imported_modules(lookup, env)
+    finally:
+        server.stop()
+
+    overhead = cold - baseline
+    budget = max(args.budget_ms, args.budget_ratio * baseline)
+    budget_note = f"{args.budget_ratio:g} x python -c pass" if budget > args.budget_ms else "fixed"
+    print("--- Startup Check ---")
+    print(f"  python -c pass             {baseline:>8.1f} ms")
+    print(f"  logic.py {args.country} (cached)      {cold:>8.1f} ms")
+    print(f"  overhead                   {overhead:>8.1f} ms  (budget {budget:.0f} ms: {budget_note})")
+    print(f"  lazy modules imported      {', '.join(heavy) if heavy else 'none'}")
+    if overhead > budget: failures.append(f"cold start overhead {overhead:.1f} ms exceeds the {budget:.0f} ms budget")
+    if heavy: failures.append(f"plain cached lookup imported {', '.join(heavy)} (should be lazy)")
+    for failure in failures: print(f"FAIL: {failure}")
+    if not failures: print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
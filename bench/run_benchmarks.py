@@ -0,0 +1,209 @@
+# run_benchmarks.py
+# Offline benchmark of the fetch -> parse -> select -> round pipeline.
+# Every stage is timed separately against the local fixture server
+# (stub_server.py), so no network access is needed:
+#
+#   fetch          logic.get_gini_data: HTTP request + JSON decode + parse (cache off)
+#   fetch_cached   logic.get_gini_data served from the local cache (series store, no request)
+#   parse          JSON decode + envelope parse of a recorded body (no I/O)
+#   select         logic.find_latest_valid_gini over one country's records
+#   select_columnar IndicatorDataset.latest_valid over every fixture country at once
+#   analytics      every analytics.py report over every fixture country (reported per country)
+#   ipc            GiniAdderClient -> Server32 round trip (process_gini_pure_c)
+#   native         raw ctypes call into the host C/ASM library (process_gini_pure_c)
+#   native_batch   same library, one call rounding BATCH_SIZE values (reported per element)
+#
+# Usage:
+#   python bench/run_benchmarks.py [-n 200] [--output results.json]
+#   python bench/run_benchmarks.py --compare baseline.json [--threshold 0.25]
+#
+# The JSON output is meant to be kept per commit; --compare exits with status 1
+# if any stage's p50 got slower than the baseline by more than the threshold.
+
+import os
+import sys
+import json
+import time
+import ctypes
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from typing import Callable, Dict, List, Optional, Any
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import StubServer, FixtureStore, FIXTURES_DIR
+
+BATCH_SIZE = 4096
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples: return float("nan")
+    rank = max(1, int(round(pct / 100.0 * len(sorted_samples))))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize(samples_s: List[float], items_per_sample: int = 1) -> Dict[str, Any]:
+    """Latency stats in microseconds (per item) plus throughput in items/s."""
+    per_item_us = sorted(s * 1e6 / items_per_sample for s in samples_s)
+    total_s = sum(samples_s)
+    summary = {"samples": len(samples_s), "items_per_sample": items_per_sample}
+    for pct in PERCENTILES: summary[f"p{pct}_us"] = round(percentile(per_item_us, pct), 3)
+    summary["mean_us"] = round(statistics.fmean(per_item_us), 3)
+    summary["max_us"] = round(per_item_us[-1], 3)
+    summary["throughput_per_s"] = round(len(samples_s) * items_per_sample / total_s, 1) if total_s > 0 else None
+    return summary
+
+
+def time_stage(fn: Callable[[], Any], iterations: int, warmup: int = 3) -> List[float]:
+    for _ in range(warmup): fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def git_revision() -> Optional[str]:
+    try: return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+
+def run(iterations: int, codes: List[str], include_ipc: bool) -> Dict[str, Any]:
+    import logic
+    from dataset import IndicatorDataset
+
+    results: Dict[str, Any] = {}
+    skipped: Dict[str, str] = {}
+    server = StubServer(store=FixtureStore()).start_background()
+    logic.BASE_URL = server.base_url
+    try:
+        # --- fetch: request + parse, cache disabled ---
+        logic.configure_cache(enabled=False)
+        state = {"i": 0}
+        def fetch_once():
+            code = codes[state["i"] % len(codes)]; state["i"] += 1
+            records, error = logic.get_gini_data(code)
+            if error: raise RuntimeError(f"fetch failed for {code}: {error}")
+        results["fetch"] = summarize(time_stage(fetch_once, iterations))
+
+        # --- fetch_cached: same lookups served from a throwaway cache ---
+        with tempfile.TemporaryDirectory(prefix="gini_bench_cache_") as cache_dir:
+            logic.configure_cache(enabled=True, cache_dir=cache_dir, ttl=3600)
+            for code in codes: logic.get_gini_data(code) # fill
+            results["fetch_cached"] = summarize(time_stage(fetch_once, iterations))
+            logic.configure_cache(enabled=False) # closes the cache before the directory goes away
+
+        # --- batch_pipeline: every code through fetch -> select (no C), per-country cost ---
+        results["batch_pipeline"] = summarize(time_stage(lambda: list(logic.run_batch_pipeline(codes, process_c=False)), iterations), len(codes))
+
+        # --- parse: decode + envelope parse of a recorded body ---
+        with open(os.path.join(FIXTURES_DIR, f"{logic.INDICATOR}_{codes[0]}.json"), encoding="utf-8") as f:
+            body = f.read()
+        results["parse"] = summarize(time_stage(lambda: logic._parse_cached_body(body, codes[0]), iterations * 10))
+
+        # --- select: latest valid value (fresh copies, the function annotates records) ---
+        records = json.loads(body)[1]
+        results["select"] = summarize(time_stage(lambda: logic.find_latest_valid_gini([dict(r) for r in records]), iterations * 10))
+
+        # --- select_columnar: latest valid value of every country in one vectorized pass ---
+        dataset = IndicatorDataset.from_records([r for (indicator, _), rs in FixtureStore().records.items() if indicator == logic.INDICATOR for r in rs], logic.INDICATOR)
+        results["select_columnar"] = summarize(time_stage(dataset.latest_valid, iterations * 10), len(dataset.codes))
+
+        # --- analytics: rank / percentiles / yoy / groups / coverage over the same dataset ---
+        import analytics
+        metadata, error = logic.get_country_metadata()
+        if error: raise RuntimeError(f"country list failed: {error}")
+        results["analytics"] = summarize(time_stage(lambda: [analytics.build_report(report, dataset, metadata) for report in analytics.REPORTS], iterations), len(dataset.codes))
+    finally:
+        server.stop()
+
+    # --- native: raw ctypes into the host build of the C/ASM library ---
+    lib = logic._load_native_lib()
+    if lib is None:
+        skipped["native"] = skipped["native_batch"] = f"{logic.NATIVE_LIB_NAME} not available (build it with exe_tp.sh)"
+    else:
+        results["native"] = summarize(time_stage(lambda: lib.process_gini_pure_c(42.5), iterations * 100))
+        batch_in = (ctypes.c_float * BATCH_SIZE)(*[i * 0.37 for i in range(BATCH_SIZE)])
+        batch_out = (ctypes.c_int * BATCH_SIZE)()
+        results["native_batch"] = summarize(time_stage(lambda: lib.process_gini_batch(batch_in, batch_out, BATCH_SIZE), iterations), BATCH_SIZE)
+
+    # --- ipc: Client64 -> Server32 round trip ---
+    if not include_ipc:
+        skipped["ipc"] = "disabled with --no-ipc"
+    else:
+        logic.configure_c_backend("server32")
+        pool = logic._get_server_pool()
+        pool.start()
+        if not pool.wait_ready(timeout=60):
+            skipped["ipc"] = "Server32 did not start (32-bit runtime or libginiadder.so missing?)"
+        else:
+            def ipc_once():
+                with pool.client() as client: client.process_gini_pure_c(42.5)
+            try: results["ipc"] = summarize(time_stage(ipc_once, iterations))
+            except Exception as e: skipped["ipc"] = f"{type(e).__name__}: {e}"
+        logic.shutdown_c_backend()
+
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()},
+        "iterations": iterations,
+        "countries": codes,
+        "stages": results,
+        "skipped": skipped,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Returns one message per stage whose p50 regressed by more than 'threshold' (fraction)."""
+    regressions = []
+    for stage, now in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or not before.get("p50_us"): continue
+        ratio = now["p50_us"] / before["p50_us"]
+        if ratio > 1.0 + threshold:
+            regressions.append(f"{stage}: p50 {before['p50_us']:.2f}us -> {now['p50_us']:.2f}us (+{(ratio - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n--- Pipeline Benchmark (rev {report['revision'] or '?'}, {report['iterations']} iterations) ---")
+    print(f"  {'stage':<16}{'p50 us':>12}{'p90 us':>12}{'p99 us':>12}{'max us':>12}{'items/s':>14}")
+    for stage, s in report["stages"].items():
+        print(f"  {stage:<16}{s['p50_us']:>12.3f}{s['p90_us']:>12.3f}{s['p99_us']:>12.3f}{s['max_us']:>12.3f}{s['throughput_per_s'] or 0:>14.0f}")
+    for stage, reason in report["skipped"].items():
+        print(f"  {stage:<16}skipped: {reason}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the GINI fetch/parse/select/round pipeline.")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="Samples per stage (cheap stages use a multiple).")
+    parser.add_argument("--countries", default="ARG,BRA,USA,CHL,URY", help="Comma-separated fixture countries to cycle through.")
+    parser.add_argument("--no-ipc", action="store_true", help="Skip the Server32 IPC stage.")
+    parser.add_argument("-o", "--output", metavar="FILE", help="Write the machine-readable results (JSON) here.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare p50 latencies against a previous results file.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed p50 slowdown before --compare fails (default 0.25 = 25%%).")
+    args = parser.parse_args()
+
+    report = run(args.iterations, [c.strip().upper() for c in args.countries.split(",") if c.strip()], not args.no_ipc)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f: baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions against {args.compare}:")
+            for regression in regressions: print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo stage regressed more than {args.threshold * 100:.0f}% against {args.compare}.")
@@ -0,0 +1,111 @@
+# run_fault_scenarios.py
+# Tail latency of the World Bank request layer under injected upstream faults.
+# Runs get_gini_data against the local fixture server (stub_server.py) with a
+# FaultInjector, once per resilience configuration, and reports p50/p99/max
+# latency and the share of lookups that still returned data:
+#
+#   flaky    503s, dropped connections and slow answers at the given rates:
+#            no retries vs. retries vs. retries + hedging
+#   outage   every request fails; the response cache holds stale copies:
+#            stale data must be served once the retries are used up (breaker
+#            threshold out of reach), and the circuit breaker should fail fast
+#
+# Usage:
+#   python bench/run_fault_scenarios.py [-n 300] [--error-rate 0.05] [--seed 1]
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import StubServer, FixtureStore, FaultInjector
+from run_benchmarks import percentile
+
+CODES = ["ARG", "BRA", "USA", "CHL", "URY"]
+
+
+def lookups(logic, n: int, fetch: Optional[Callable[[int], Tuple[Any, Optional[str]]]] = None) -> Dict[str, Any]:
+    """n sequential lookups (get_gini_data by default); latency in ms and how many returned data."""
+    fetch = fetch or (lambda i: logic.get_gini_data(CODES[i % len(CODES)]))
+    samples: List[float] = []
+    ok = 0
+    for i in range(n):
+        start = time.perf_counter()
+        records, error = fetch(i)
+        samples.append((time.perf_counter() - start) * 1000)
+        if not error and records: ok += 1
+    samples.sort()
+    return {"p50": percentile(samples, 50), "p99": percentile(samples, 99), "max": samples[-1], "ok": ok, "n": n}
+
+
+def reset(logic, retries: int, hedge: bool):
+    logic.configure_resilience(retries=retries, hedge=hedge)
+    logic._breaker.reset()
+    logic._http_latency = logic.LatencyTracker()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latency of the request layer under injected upstream faults.")
+    parser.add_argument("-n", "--lookups", type=int, default=300, help="Lookups per configuration.")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--drop-rate", type=float, default=0.02)
+    parser.add_argument("--slow-rate", type=float, default=0.03)
+    parser.add_argument("--slow-ms", type=float, default=400.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    import logic
+    logic.log.setLevel("ERROR") # Retry warnings would flood the report
+    server = StubServer(store=FixtureStore()).start_background()
+    logic.BASE_URL = server.base_url
+    rows = []
+    try:
+        # --- flaky: every configuration sees the same fault sequence (same seed), no cache ---
+        logic.configure_cache(enabled=False)
+        for label, retries, hedge in (("no retries", 0, False), ("retries", 2, False), ("retries + hedging", 2, True)):
+            server.faults = FaultInjector(args.error_rate, args.drop_rate, args.slow_rate, args.slow_ms, seed=args.seed)
+            reset(logic, retries, hedge)
+            rows.append((f"flaky: {label}", lookups(logic, args.lookups), dict(server.faults.counts)))
+
+        # --- outage: stale cache entries, upstream answers nothing but 503 ---
+        with tempfile.TemporaryDirectory(prefix="gini_fault_cache_") as cache_dir:
+            server.faults = None
+            logic.configure_cache(enabled=True, cache_dir=cache_dir, ttl=0) # Every entry is stale at once
+            logic.configure_refresh(full_refresh=True)                      # Always go to the API (no series-store shortcut)
+            reset(logic, 2, False)
+            for code in CODES: logic.get_gini_data(code)
+            logic.get_country_metadata()
+            # Breaker out of reach: the country list (no series-store fallback) must still
+            # come from its stale entry once the retries on 503 (text/plain body) are used up
+            logic._breaker.failure_threshold = 10 ** 9
+            scenarios = (("outage: stale cache (no breaker)", lambda i: logic.get_country_metadata()),
+                         ("outage: breaker + stale cache", None))
+            for label, fetch in scenarios:
+                server.faults = FaultInjector(error_rate=1.0)
+                served_before = server.requests_served
+                result = lookups(logic, args.lookups, fetch)
+                result["upstream_requests"] = server.requests_served - served_before
+                rows.append((label, result, dict(server.faults.counts)))
+                logic._breaker.failure_threshold = logic.BREAKER_FAILURES
+                reset(logic, 2, False)
+            logic.configure_cache(enabled=False)
+    finally:
+        server.stop()
+
+    print(f"\n--- Fault Scenarios ({args.lookups} lookups each; error {args.error_rate}, drop {args.drop_rate}, slow {args.slow_rate} @ {args.slow_ms:.0f} ms) ---")
+    print(f"  {'scenario':<32}{'p50 ms':>9}{'p99 ms':>10}{'max ms':>10}{'with data':>11}   faults injected")
+    for label, r, faults in rows:
+        extra = f"  ({r['upstream_requests']} upstream requests)" if "upstream_requests" in r else ""
+        print(f"  {label:<32}{r['p50']:>9.2f}{r['p99']:>10.2f}{r['max']:>10.2f}{r['ok']:>7}/{r['n']:<4}  {faults}{extra}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
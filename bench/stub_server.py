@@ -0,0 +1,224 @@
+# stub_server.py
+# Local stand-in for the World Bank API, serving recorded JSON fixtures.
+# Used by the benchmark harness (and usable by hand) so that the fetch path
+# can be measured without network access:
+#
+#   python bench/stub_server.py --port 8765
+#   GINI_API_BASE_URL=http://127.0.0.1:8765/v2/en/country python src/logic.py ARG
+#
+# Fixtures live in bench/fixtures/<INDICATOR>_<ISO3>.json and hold a full API
+# response ([meta, records]); bench/fixtures/countries.json is the country list
+# (region / income group) served at /v2/en/country. The stub applies the same query semantics the
+# harness relies on: 'date' filtering, 'per_page'/'page' pagination, the
+# 'country/all' endpoint, multi-country ('ARG;BRA') paths, the 'mrv'/'mrnev'
+# most-recent-values queries and ETag/If-None-Match revalidation.
+#
+# Fault injection (for the resilience layer, see run_fault_scenarios.py):
+#   --error-rate P   answer 503 with probability P
+#   --drop-rate P    close the connection without answering
+#   --slow-rate P    delay the answer by --slow-ms milliseconds
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+from typing import Dict, List, Any, Optional
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PATH_RE = re.compile(r"^/v2/(?:[a-z]{2}/)?country/(?P<codes>[^/]+)/indicator/(?P<indicators>[^/]+)/?$")
+COUNTRY_LIST_RE = re.compile(r"^/v2/(?:[a-z]{2}/)?country/?$")
+COUNTRY_LIST_FILE = "countries.json"
+INVALID_VALUE = [{"message": [{"id": "120", "key": "Invalid value", "value": "The provided parameter value is not valid"}]}]
+
+
+class FixtureStore:
+    """Loads the fixture files and answers record queries from them."""
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, synthetic_countries: int = 0):
+        self.records: Dict[tuple, List[Dict[str, Any]]] = {} # (indicator, ISO3) -> records (newest first)
+        self.countries: List[Dict[str, Any]] = [] # Country list entries (region / income group)
+        country_list = os.path.join(fixtures_dir, COUNTRY_LIST_FILE)
+        if os.path.exists(country_list):
+            with open(country_list, encoding="utf-8") as f:
+                self.countries = json.load(f)[1] or []
+        for name in sorted(os.listdir(fixtures_dir)):
+            match = re.match(r"^(?P<indicator>.+)_(?P<iso3>[A-Z]{3})\.json$", name)
+            if not match: continue
+            with open(os.path.join(fixtures_dir, name), encoding="utf-8") as f:
+                payload = json.load(f)
+            self.records[(match["indicator"], match["iso3"])] = payload[1] or []
+        if synthetic_countries: self._add_synthetic(synthetic_countries)
+
+    def _add_synthetic(self, count: int):
+        """Clones the recorded series into 'count' extra economies (codes XAA, XAB, ...) for scale tests."""
+        sources = sorted({iso3 for _, iso3 in self.records})
+        templates = list(self.records.items())
+        for i in range(count):
+            code = "X" + chr(ord("A") + (i // 26) % 26) + chr(ord("A") + i % 26)
+            source = sources[i % len(sources)]
+            for (indicator, iso3), records in templates: # Every indicator of the source country
+                if iso3 != source: continue
+                clones = []
+                for record in records:
+                    clone = json.loads(json.dumps(record))
+                    clone["countryiso3code"] = code
+                    clone["country"] = {"id": code[:2], "value": f"Synthetic {code}"}
+                    if clone["value"] is not None: clone["value"] = round(clone["value"] + (i % 7) * 0.1, 1)
+                    clones.append(clone)
+                self.records[(indicator, code)] = clones
+            for entry in [e for e in self.countries if e["id"] == source]:
+                self.countries.append(dict(entry, id=code, iso2Code=code[:2], name=f"Synthetic {code}"))
+
+    def query(self, codes: List[str], indicators: List[str], date: Optional[str], mrv: int = 0, mrnev: int = 0) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the matching records, or None if any country code is unknown
+        (a known country without data for one of the indicators just has no rows).
+        mrv / mrnev keep only the N most recent (non-empty for mrnev) years of each series and ignore 'date'.
+        """
+        start, end = _parse_date_range(date)
+        known = {iso3 for _, iso3 in self.records}
+        if codes != ["ALL"] and any(code not in known for code in codes): return None
+        selected = []
+        for indicator in indicators:
+            if codes == ["ALL"]:
+                keys = sorted(k for k in self.records if k[0] == indicator)
+            else:
+                keys = [(indicator, code) for code in codes if (indicator, code) in self.records]
+            for key in keys:
+                if mrnev: selected.extend([r for r in self.records[key] if r["value"] is not None][:mrnev])
+                elif mrv: selected.extend(self.records[key][:mrv])
+                else: selected.extend(r for r in self.records[key] if start <= int(r["date"]) <= end)
+        return selected
+
+
+def _parse_date_range(date: Optional[str]) -> tuple:
+    if not date: return (0, 9999)
+    if ":" in date:
+        start, end = date.split(":", 1)
+        return (int(start), int(end))
+    return (int(date), int(date))
+
+
+class FaultInjector:
+    """Picks a random fault per request (thread-safe, reproducible with a seed)."""
+    def __init__(self, error_rate: float = 0.0, drop_rate: float = 0.0, slow_rate: float = 0.0, slow_ms: float = 500.0, seed: Optional[int] = None):
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.counts = {"error": 0, "drop": 0, "slow": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def pick(self) -> Optional[str]:
+        """'error', 'drop', 'slow' or None."""
+        with self._lock:
+            roll = self._rng.random()
+            for fault, rate in (("error", self.error_rate), ("drop", self.drop_rate), ("slow", self.slow_rate)):
+                if roll < rate: self.counts[fault] += 1; return fault
+                roll -= rate
+        return None
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Serves World Bank style responses from the server's FixtureStore."""
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+    disable_nagle_algorithm = True # Otherwise header/body writes hit the 40ms delayed-ACK stall
+    wbufsize = 64 * 1024           # Send headers + body in one write (flushed after each request)
+
+    def do_GET(self):
+        fault = self.server.faults.pick() if self.server.faults is not None else None
+        if fault == "drop": self.close_connection = True; return # Client sees the connection reset
+        if fault == "error": return self._send(503, b"Service Unavailable", "text/plain")
+        if fault == "slow": time.sleep(self.server.faults.slow_ms / 1000.0)
+        url = urlsplit(self.path) # Not urlparse: it would cut ";params" off the last path segment
+        params = dict(parse_qsl(url.query))
+        if COUNTRY_LIST_RE.match(url.path):
+            return self._send_page(self.server.store.countries, params)
+        match = PATH_RE.match(url.path)
+        if not match:
+            return self._send(404, b"Not found", "text/plain")
+        codes = [c.upper() for c in match["codes"].split(";")]
+        indicators = match["indicators"].split(";")
+        records = self.server.store.query(codes, indicators, params.get("date"), int(params.get("mrv", 0)), int(params.get("mrnev", 0)))
+        if records is None:
+            return self._send_json(INVALID_VALUE)
+        self._send_page(records, params)
+
+    def _send_page(self, records: List[Dict[str, Any]], params: Dict[str, str]):
+        per_page = int(params.get("per_page", 50))
+        page = int(params.get("page", 1))
+        pages = max(1, -(-len(records) // per_page))
+        chunk = records[(page - 1) * per_page: page * per_page]
+        meta = {"page": page, "pages": pages, "per_page": per_page, "total": len(records), "sourceid": "2", "lastupdated": "2025-07-01"}
+        self._send_json([meta, chunk or None])
+
+    def _send_json(self, payload: Any):
+        body = json.dumps(payload).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", "application/json;charset=utf-8", etag)
+        self._send(200, body, "application/json;charset=utf-8", etag)
+
+    def _send(self, status: int, body: bytes, content_type: str, etag: Optional[str] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag: self.send_header("ETag", etag)
+        self.end_headers()
+        if body: self.wfile.write(body)
+        self.server.requests_served += 1
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose: super().log_message(fmt, *args)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, store: Optional[FixtureStore] = None, verbose: bool = False, faults: Optional[FaultInjector] = None):
+        super().__init__(("127.0.0.1", port), StubRequestHandler)
+        self.store = store or FixtureStore()
+        self.faults = faults
+        self.verbose = verbose
+        self.requests_served = 0
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Value to assign to logic.BASE_URL."""
+        return f"http://127.0.0.1:{self.server_address[1]}/v2/en/country"
+
+    def start_background(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded World Bank fixtures on localhost.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--synthetic-countries", type=int, default=0, metavar="N", help="Add N cloned economies for scale tests.")
+    parser.add_argument("--error-rate", type=float, default=0.0, metavar="P", help="Probability of answering 503.")
+    parser.add_argument("--drop-rate", type=float, default=0.0, metavar="P", help="Probability of closing the connection without an answer.")
+    parser.add_argument("--slow-rate", type=float, default=0.0, metavar="P", help="Probability of delaying the answer by --slow-ms.")
+    parser.add_argument("--slow-ms", type=float, default=500.0, help="Delay of slow answers (default: 500).")
+    parser.add_argument("--seed", type=int, help="Seed of the fault generator (reproducible runs).")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    faults = FaultInjector(args.error_rate, args.drop_rate, args.slow_rate, args.slow_ms, args.seed) if (args.error_rate or args.drop_rate or args.slow_rate) else None
+    server = StubServer(args.port, FixtureStore(synthetic_countries=args.synthetic_countries), verbose=args.verbose, faults=faults)
+    print(f"Serving fixtures on {server.base_url} (Ctrl+C to stop)", file=sys.stderr)
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.server_close()
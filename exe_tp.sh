@@ -39,9 +39,9 @@ echo "---------------------------------"
 
 
 # 4. Compile C/ASM code (32-bit shared library)
-echo "🔄 Compiling ASM code (gini_adder.asm) to 32-bit object file..."
-ASM_SOURCE="gini_adder.asm"
-ASM_OBJECT="gini_adder.o"
+echo "🔄 Compiling ASM code (asm_rounder.asm) to 32-bit object file..."
+ASM_SOURCE="asm_rounder.asm"
+ASM_OBJECT="asm_rounder.o"
 ASM_COMPILER=nasm
 ASM_FLAGS="-f elf -g -F dwarf" # -f elf for 32-bit linux, -g -F dwarf for debug
 
@@ -65,6 +65,13 @@ TARGET_LIB="libginiadder.so"
 C_COMPILER=gcc
 # --- CRUCIAL CHANGE: Link C_SOURCE with ASM_OBJECT ---
 C_FLAGS="-m32 -shared -o $TARGET_LIB -fPIC -g -Wall" # -m32, -shared, -fPIC, debug, warnings
+# Per-call printf tracing in the C bridge is compiled out unless GINI_TRACE=1
+TRACE_FLAGS=""
+if [ "${GINI_TRACE:-0}" = "1" ]; then
+    TRACE_FLAGS="-DGINI_TRACE"
+    echo "   GINI_TRACE=1: C bridge tracing enabled."
+fi
+C_FLAGS="$C_FLAGS $TRACE_FLAGS"
 
 if [ ! -f $C_SOURCE ]; then
     fail "C source file '$C_SOURCE' not found in 'src' directory."
@@ -83,6 +90,25 @@ echo "   Verifying library architecture..."
 file "$TARGET_LIB" || echo "   Warning: Could not run 'file' command to verify."
 file "$TARGET_LIB" | grep "ELF 32-bit" || fail "Library '$TARGET_LIB' is NOT 32-bit ELF!"
 echo "   Library is confirmed 32-bit."
+echo ""
+
+# 4b. Optional native (64-bit) build for the in-process ctypes backend.
+# logic.py loads it directly when present (no 32-bit server); failures here are
+# not fatal because the 32-bit library above is always available as fallback.
+echo "🔄 Compiling native 64-bit library (asm_rounder64.asm + gini_adder.c)..."
+ASM64_SOURCE="asm_rounder64.asm"
+ASM64_OBJECT="asm_rounder64.o"
+TARGET_LIB64="libginiadder64.so"
+if [ "$(uname -m)" != "x86_64" ]; then
+    echo "   Host is $(uname -m), not x86_64: skipping native build (Server32 backend will be used)."
+elif $ASM_COMPILER -f elf64 -g -F dwarf $ASM64_SOURCE -o $ASM64_OBJECT && \
+     $C_COMPILER -shared -fPIC -O2 -g -Wall $TRACE_FLAGS -o $TARGET_LIB64 $C_SOURCE $ASM64_OBJECT; then
+    file "$TARGET_LIB64" | grep -q "ELF 64-bit" || fail "Library '$TARGET_LIB64' is NOT 64-bit ELF!"
+    echo "   Successfully created '$TARGET_LIB64' (64-bit, C+ASM, in-process backend)."
+else
+    rm -f $TARGET_LIB64
+    echo "   Warning: native 64-bit build failed; the Server32 backend will be used."
+fi
 echo "---------------------------------"
 
 
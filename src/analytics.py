@@ -0,0 +1,254 @@
+# analytics.py
+# Cross-country reports over an IndicatorDataset (NumPy), NO network code.
+# Used by logic.py (rank / percentiles / yoy / groups / coverage subcommands)
+# and gui.py (Analytics window). Every report covers all economies and years
+# in one vectorized pass: the columns are scattered into a dense country x year
+# matrix, or sorted and reduced per country / group (reduceat), instead of
+# looping over countries in Python:
+#
+#   rank          latest (or one year's) value of every economy, rank and percentile rank
+#   percentiles   distribution across economies per year (p10..p90, mean, count)
+#   yoy           change between consecutive observations of every economy
+#   groups        region / income-group aggregates of the latest values (unweighted)
+#   coverage      observed years and gaps per economy, reporting economies per year
+#
+# 'metadata' is logic.get_country_metadata()'s {ISO3: {"name", "region", "income"}}:
+# it drops the API's aggregates (regions, income groups, 'World') from every
+# report and supplies the groups. Without it every row of the dataset is kept.
+
+import numpy as np
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+from dataset import IndicatorDataset, VALUE_DTYPE
+
+REPORTS = ("rank", "percentiles", "yoy", "groups", "coverage")
+GROUPINGS = ("region", "income")
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+AGGREGATE_REGION = "Aggregates" # Region of the API's aggregate entries in the country list
+UNKNOWN_GROUP = "Unknown"
+
+Metadata = Dict[str, Dict[str, str]]
+
+
+class Table:
+    """One report: a title, column names and rows of plain Python values (ready to print or dump as JSON)."""
+    def __init__(self, title: str, columns: Sequence[str], rows: List[tuple], note: Optional[str] = None):
+        self.title = title
+        self.columns = tuple(columns)
+        self.rows = rows
+        self.note = note
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"title": self.title, "columns": list(self.columns), "rows": [dict(zip(self.columns, row)) for row in self.rows], "note": self.note}
+
+    def format(self) -> str:
+        """Fixed-width text: numbers right-aligned (2 decimals), text left-aligned, None as '-'."""
+        cells = [[_format_cell(value) for value in row] for row in self.rows]
+        numeric = [all(isinstance(row[i], (int, float)) or row[i] is None for row in self.rows) for i in range(len(self.columns))]
+        widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(self.columns)]
+        align = lambda text, i: text.rjust(widths[i]) if numeric[i] else text.ljust(widths[i])
+        lines = [f"--- {self.title} ---", "  " + "  ".join(align(column, i) for i, column in enumerate(self.columns)).rstrip()]
+        lines.extend("  " + "  ".join(align(text, i) for i, text in enumerate(row)).rstrip() for row in cells)
+        if self.note: lines.append(f"  ({self.note})")
+        return "\n".join(lines)
+
+
+def _format_cell(value: Any) -> str:
+    if value is None: return "-"
+    if isinstance(value, float): return f"{value:.2f}"
+    return str(value)
+
+
+def _value(v: Any) -> Optional[float]:
+    """float32 cell -> plain float (4 decimals, like IndicatorDataset.to_records), NaN -> None."""
+    v = float(v)
+    return None if np.isnan(v) else round(v, 4)
+
+
+# --- Selection helpers ---
+def economy_mask(dataset: IndicatorDataset, metadata: Optional[Metadata]) -> np.ndarray:
+    """Bool per country id: False for the API's aggregates (only known with metadata)."""
+    if metadata is None: return np.ones(len(dataset.codes), dtype=bool)
+    return np.array([(metadata.get(code) or {}).get("region") != AGGREGATE_REGION for code in dataset.codes], dtype=bool)
+
+
+def group_ids(dataset: IndicatorDataset, metadata: Metadata, by: str) -> Tuple[List[str], np.ndarray]:
+    """(labels, ids): the group ('region' or 'income') of every country id as an index into labels."""
+    if by not in GROUPINGS: raise ValueError(f"Unknown grouping '{by}'. Use one of: {', '.join(GROUPINGS)}")
+    raw = np.array([(metadata.get(code) or {}).get(by) or UNKNOWN_GROUP for code in dataset.codes] or [UNKNOWN_GROUP], dtype=object)
+    labels, ids = np.unique(raw, return_inverse=True)
+    return [str(label) for label in labels], ids[:len(dataset.codes)]
+
+
+def select_values(dataset: IndicatorDataset, year: Optional[int] = None, metadata: Optional[Metadata] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(country_ids, years, values) of every economy: its latest valid value, or its value in 'year'."""
+    if year is None:
+        rows = dataset.latest_rows()
+    else:
+        rows = np.flatnonzero(dataset.valid & (dataset.year == year)) # At most one row per country and year
+    rows = rows[economy_mask(dataset, metadata)[dataset.country[rows]]]
+    return dataset.country[rows], dataset.year[rows], dataset.value[rows]
+
+
+def year_matrix(dataset: IndicatorDataset, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (years, matrix): the dataset as a dense float32 country x year matrix
+    (NaN where there is no valid value), one column per year of start..end
+    (default: the years present in the dataset).
+    """
+    if len(dataset) == 0 and (start is None or end is None): return np.array([], dtype=np.int32), np.empty((len(dataset.codes), 0), dtype=VALUE_DTYPE)
+    start = int(dataset.year.min()) if start is None else start
+    end = int(dataset.year.max()) if end is None else end
+    years = np.arange(start, end + 1, dtype=np.int32)
+    matrix = np.full((len(dataset.codes), len(years)), np.nan, dtype=VALUE_DTYPE)
+    inside = (dataset.year >= start) & (dataset.year <= end)
+    matrix[dataset.country[inside], dataset.year[inside].astype(np.int32) - start] = dataset.value[inside]
+    return years, matrix
+
+
+# --- Reports ---
+def rankings(dataset: IndicatorDataset, year: Optional[int] = None, metadata: Optional[Metadata] = None, top: Optional[int] = None) -> Table:
+    """
+    Economies ranked by value, highest first. Ties share a rank ("1224"
+    ranking); 'percentile' is the share of ranked economies with a value
+    less than or equal to this one.
+    """
+    countries, years, values = select_values(dataset, year, metadata)
+    order = np.argsort(-values, kind="stable")
+    descending = values[order]
+    ranks = np.searchsorted(-descending, -descending, side="left") + 1 # 1 + number of strictly larger values
+    percentile = np.searchsorted(np.sort(values), descending, side="right") * (100.0 / max(len(values), 1))
+    shown = order[:top] if top else order
+    rows = [(int(rank), dataset.codes[c], dataset.names[c], int(y), _value(v), round(float(p), 1))
+            for rank, c, y, v, p in zip(ranks, countries[shown], years[shown], values[shown], percentile)]
+    when = f"in {year}" if year is not None else "latest value"
+    return Table(f"{dataset.indicator} Ranking ({when}, {len(values)} economies)", ("rank", "code", "name", "year", "value", "percentile"), rows)
+
+
+def percentiles(dataset: IndicatorDataset, metadata: Optional[Metadata] = None, qs: Sequence[float] = DEFAULT_PERCENTILES) -> Table:
+    """Distribution across economies for every year with data, plus one row over the latest values."""
+    years, matrix = year_matrix(dataset)
+    matrix = matrix[economy_mask(dataset, metadata)]
+    counts = np.count_nonzero(~np.isnan(matrix), axis=0)
+    columns_with_data = np.flatnonzero(counts)
+    observed = matrix[:, columns_with_data].astype(np.float64)
+    if columns_with_data.size:
+        by_year = np.nanpercentile(observed, qs, axis=0) # len(qs) x years; no all-NaN column left
+        means = np.nanmean(observed, axis=0)
+    else:
+        by_year, means = np.empty((len(qs), 0)), np.empty(0)
+    rows = [(int(years[j]), int(counts[j]), *(_value(q) for q in by_year[:, i]), _value(means[i])) for i, j in enumerate(columns_with_data)]
+    _, _, latest = select_values(dataset, metadata=metadata)
+    if latest.size:
+        latest = latest.astype(np.float64)
+        rows.append(("latest", int(latest.size), *(_value(q) for q in np.percentile(latest, qs)), _value(latest.mean())))
+    return Table(f"{dataset.indicator} Distribution across Economies", ("year", "economies", *(f"p{q:g}" for q in qs), "mean"), rows)
+
+
+def yoy_deltas(dataset: IndicatorDataset, year: Optional[int] = None, metadata: Optional[Metadata] = None, top: Optional[int] = None) -> Table:
+    """
+    Change between consecutive valid observations of every economy (the latest
+    pair, or the pairs ending in 'year'), largest absolute change first.
+    Series are sparse, so the gap between the two years is reported and
+    'per_year' is the change divided by that gap.
+    """
+    rows = np.flatnonzero(dataset.valid)
+    countries = dataset.country[rows]
+    pairs = np.flatnonzero(countries[1:] == countries[:-1]) # rows[i] -> rows[i + 1] within one country (sorted by year)
+    previous, current = rows[pairs], rows[pairs + 1]
+    if year is None:
+        owners = dataset.country[current]
+        keep = np.ones(owners.size, dtype=bool)
+        keep[:-1] = owners[1:] != owners[:-1] # Last pair of every country
+    else:
+        keep = dataset.year[current] == year
+    previous, current = previous[keep], current[keep]
+    economies = economy_mask(dataset, metadata)[dataset.country[current]]
+    previous, current = previous[economies], current[economies]
+    delta = dataset.value[current].astype(np.float64) - dataset.value[previous]
+    gap = dataset.year[current].astype(np.int32) - dataset.year[previous]
+    with np.errstate(divide="ignore", invalid="ignore"): per_year = np.where(gap > 0, delta / gap, np.nan) # Duplicate years: no rate
+    order = np.argsort(-np.abs(delta), kind="stable")
+    if top: order = order[:top]
+    table_rows = [(dataset.codes[dataset.country[c]], dataset.names[dataset.country[c]], int(dataset.year[p]), int(dataset.year[c]),
+                   _value(dataset.value[p]), _value(dataset.value[c]), _value(d), _value(r))
+                  for p, c, d, r in zip(previous[order], current[order], delta[order], per_year[order])]
+    when = f"ending in {year}" if year is not None else "latest change"
+    return Table(f"{dataset.indicator} Changes ({when}, {len(delta)} economies)", ("code", "name", "from_year", "to_year", "from", "to", "delta", "per_year"), table_rows)
+
+
+def group_aggregates(dataset: IndicatorDataset, metadata: Metadata, by: str = "region", year: Optional[int] = None) -> Table:
+    """
+    Count, mean, median, min and max of the latest values (or the values in
+    'year') per region or income group, plus every economy together. Means
+    are unweighted (one vote per economy, not per inhabitant).
+    """
+    labels, ids = group_ids(dataset, metadata, by)
+    countries, _, values = select_values(dataset, year, metadata)
+    groups = ids[countries]
+    order = np.lexsort((values, groups)) # By group, then value: min / median / max are positions
+    groups, values, countries = groups[order], values[order].astype(np.float64), countries[order]
+    rows = []
+    if values.size:
+        starts = np.flatnonzero(np.append(True, groups[1:] != groups[:-1]))
+        counts = np.diff(np.append(starts, values.size))
+        ends = starts + counts - 1
+        means = np.add.reduceat(values, starts) / counts
+        medians = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+        rows = [(labels[groups[s]], int(n), _value(m), _value(md), _value(values[s]), dataset.codes[countries[s]], _value(values[e]), dataset.codes[countries[e]])
+                for s, e, n, m, md in zip(starts, ends, counts, means, medians)]
+        by_value = np.argsort(values, kind="stable") # Ties resolved like the lexsort above
+        low, high = by_value[0], by_value[-1]
+        rows.append(("All economies", int(values.size), _value(values.mean()), _value(np.median(values)),
+                     _value(values[low]), dataset.codes[countries[low]], _value(values[high]), dataset.codes[countries[high]]))
+    when = f"in {year}" if year is not None else "latest values"
+    return Table(f"{dataset.indicator} by {by.capitalize()} ({when})", (by, "economies", "mean", "median", "min", "lowest", "max", "highest"), rows, note="unweighted: every economy counts once")
+
+
+def coverage(dataset: IndicatorDataset, metadata: Optional[Metadata] = None, start: Optional[int] = None, end: Optional[int] = None, top: Optional[int] = None) -> List[Table]:
+    """
+    Missingness over start..end (default: the years in the dataset):
+    per economy the number of observed years, first / last year and longest
+    gap (least covered first), and per year the number of reporting economies.
+    """
+    years, matrix = year_matrix(dataset, start, end)
+    economies = np.flatnonzero(economy_mask(dataset, metadata))
+    observed = ~np.isnan(matrix[economies])
+    counts = np.count_nonzero(observed, axis=1)
+    n_years = len(years)
+    has_data = counts > 0
+    first = np.where(has_data, np.argmax(observed, axis=1), -1) if n_years else np.full(len(economies), -1)
+    last = np.where(has_data, n_years - 1 - np.argmax(observed[:, ::-1], axis=1), -1) if n_years else first
+    # Longest run of missing years between the first and last observation
+    row_idx, col_idx = np.nonzero(observed) # Row-major: columns ascending within each row
+    same_row = row_idx[1:] == row_idx[:-1]
+    longest_gap = np.zeros(len(economies), dtype=np.int32)
+    np.maximum.at(longest_gap, row_idx[1:][same_row], (col_idx[1:] - col_idx[:-1] - 1)[same_row])
+    order = np.lexsort((np.array(dataset.codes)[economies], counts)) if len(economies) else np.array([], dtype=np.intp) # Fewest years, then code
+    if top: order = order[:top]
+    span = f"{int(years[0])}-{int(years[-1])}" if n_years else "no years"
+    by_economy = Table(f"{dataset.indicator} Coverage by Economy ({span}, least covered first)", ("code", "name", "years", "share", "first", "last", "longest_gap"),
+                       [(dataset.codes[economies[i]], dataset.names[economies[i]], int(counts[i]), round(100.0 * counts[i] / max(n_years, 1), 1),
+                         int(years[first[i]]) if has_data[i] else None, int(years[last[i]]) if has_data[i] else None, int(longest_gap[i]) if has_data[i] else None)
+                        for i in order],
+                       note=f"{int(np.count_nonzero(has_data))} of {len(economies)} economies have at least one value")
+    reporting = np.count_nonzero(observed, axis=0)
+    by_year = Table(f"{dataset.indicator} Coverage by Year", ("year", "economies", "share"),
+                    [(int(y), int(n), round(100.0 * n / max(len(economies), 1), 1)) for y, n in zip(years, reporting)])
+    return [by_economy, by_year]
+
+
+def build_report(report: str, dataset: IndicatorDataset, metadata: Optional[Metadata] = None, year: Optional[int] = None,
+                 top: Optional[int] = None, by: str = "region", start: Optional[int] = None, end: Optional[int] = None) -> List[Table]:
+    """
+    One entry point for the CLI and the GUI. Returns the report's tables.
+    Raises ValueError for an unknown report or grouping, or 'groups' without metadata.
+    """
+    if report == "rank": return [rankings(dataset, year, metadata, top)]
+    if report == "percentiles": return [percentiles(dataset, metadata)]
+    if report == "yoy": return [yoy_deltas(dataset, year, metadata, top)]
+    if report == "groups":
+        if metadata is None: raise ValueError("Group aggregates need the country metadata (region / income group).")
+        return [group_aggregates(dataset, metadata, by, year)]
+    if report == "coverage": return coverage(dataset, metadata, start, end, top)
+    raise ValueError(f"Unknown report '{report}'. Use one of: {', '.join(REPORTS)}")
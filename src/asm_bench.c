@@ -0,0 +1,304 @@
+// asm_bench.c
+// Native throughput benchmark and differential checker for the ASM rounding
+// kernels (asm_rounder.asm / asm_rounder64.asm): no C bridge, Python or IPC
+// in the way, so kernel changes can be measured and proven bit-exact.
+//
+// Build (test.sh does both):
+//   32-bit: nasm -f elf -g -F dwarf asm_rounder.asm -o asm_rounder.o
+//           gcc -m32 -O2 -g -Wall -o asm_bench asm_bench.c asm_rounder.o -lm
+//   64-bit: nasm -f elf64 -g -F dwarf asm_rounder64.asm -o asm_rounder64.o
+//           gcc -O2 -g -Wall -o asm_bench64 asm_bench.c asm_rounder64.o -lm
+//
+// Usage:
+//   ./asm_bench                  benchmark, then check DEFAULT_SAMPLES random bit patterns + special values
+//   ./asm_bench --exhaustive     check all 2^32 float bit patterns instead (a minute or two)
+//   options: --calls N (elements per benchmark run), --batch N (elements per batch call),
+//            --samples N, --seed S, --no-bench, --no-check
+//
+// Benchmark: every kernel rounds 'calls' elements (asm_round: one call per
+// element; batch kernels: 'batch' elements per call). The best of BENCH_REPS
+// runs is reported as ns/element (clock_gettime), TSC ticks/element (rdtsc;
+// with an invariant TSC these are reference cycles, not core cycles) and
+// elements/second.
+//
+// Check: every kernel must give exactly what the reference gives:
+//   nearbyintf() in the default rounding mode (to nearest, ties to even), and
+//   0x80000000 ("integer indefinite") for NaN, +/-Inf and values outside int32.
+// Exit status: 0 if every kernel matched on every value, 1 otherwise.
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <float.h>
+#include <math.h>
+#include <time.h>
+#include <x86intrin.h> // __rdtsc
+
+// ASM kernels (same declarations as gini_adder.c)
+extern void asm_round(float input_float, int* output_int_ptr);
+extern void asm_round_batch(const float* input, int* output, int n);
+extern void asm_round_batch_x87(const float* input, int* output, int n);
+extern void asm_round_batch_sse2(const float* input, int* output, int n);
+extern int asm_has_sse2(void);
+
+#define INT_INDEFINITE      ((int32_t)0x80000000u)
+#define CHUNK               65536         // Values per check step (one batch call per kernel)
+#define BENCH_REPS          5             // Timed runs per kernel (after one warm-up run); the best is reported
+#define MAX_REPORTED        8             // Mismatches printed per kernel
+#define DEFAULT_CALLS       20000000LL    // Elements per benchmark run
+#define DEFAULT_BATCH       4096          // Elements per batch call (same as bench/run_benchmarks.py)
+#define DEFAULT_SAMPLES     (1LL << 26)   // Random bit patterns checked without --exhaustive
+
+typedef void (*batch_fn)(const float* input, int* output, int n);
+
+// asm_round takes one value per call: wrapped as a batch so every kernel goes
+// through the same benchmark and check loops (the loop is part of its per-call cost).
+static void asm_round_each(const float* input, int* output, int n) {
+    for (int i = 0; i < n; ++i) {
+        asm_round(input[i], &output[i]);
+    }
+}
+
+struct kernel {
+    const char* name;
+    batch_fn fn;
+    int needs_sse2;
+    long long mismatches;
+};
+
+static struct kernel kernels[] = {
+    { "asm_round",            asm_round_each,       0, 0 },
+    { "asm_round_batch_x87",  asm_round_batch_x87,  0, 0 },
+    { "asm_round_batch_sse2", asm_round_batch_sse2, 1, 0 },
+    { "asm_round_batch",      asm_round_batch,      0, 0 }, // Dispatcher: x87 below SSE2_MIN_BATCH, SSE2 above
+};
+#define NUM_KERNELS ((int)(sizeof(kernels) / sizeof(kernels[0])))
+
+static float input_buffer[CHUNK + 4] __attribute__((aligned(16)));
+static int output_buffer[CHUNK + 4] __attribute__((aligned(16)));
+static int32_t expected_buffer[CHUNK];
+
+
+// --- Helpers ---
+static uint64_t now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (uint64_t)ts.tv_sec * 1000000000ULL + (uint64_t)ts.tv_nsec;
+}
+
+static uint64_t xorshift64(uint64_t* state) {
+    uint64_t x = *state;
+    x ^= x << 13; x ^= x >> 7; x ^= x << 17;
+    return *state = x;
+}
+
+static float float_from_bits(uint32_t bits) {
+    float f;
+    memcpy(&f, &bits, sizeof f);
+    return f;
+}
+
+static uint32_t bits_from_float(float f) {
+    uint32_t bits;
+    memcpy(&bits, &f, sizeof bits);
+    return bits;
+}
+
+static int kernel_available(const struct kernel* k) {
+    return !k->needs_sse2 || asm_has_sse2();
+}
+
+// The specification: round to nearest (ties to even) in the default rounding
+// mode, integer indefinite for NaN and for anything that does not fit an int32.
+static int32_t reference_round(float f) {
+    if (isnan(f)) return INT_INDEFINITE;
+    float r = nearbyintf(f);
+    if (r < -2147483648.0f || r >= 2147483648.0f) return INT_INDEFINITE; // Also +/-Inf
+    return (int32_t)r;
+}
+
+
+// --- Benchmark ---
+static void bench_kernel(const struct kernel* k, const float* input, int* output, int batch, long long calls) {
+    long long batches = (calls + batch - 1) / batch;
+    long long elements = batches * batch;
+    uint64_t best_ns = UINT64_MAX, best_ticks = UINT64_MAX;
+    for (int rep = 0; rep <= BENCH_REPS; ++rep) { // Run 0 is the warm-up
+        uint64_t start_ns = now_ns();
+        uint64_t start_ticks = __rdtsc();
+        for (long long b = 0; b < batches; ++b) {
+            k->fn(input, output, batch);
+        }
+        uint64_t ticks = __rdtsc() - start_ticks;
+        uint64_t ns = now_ns() - start_ns;
+        if (rep == 0) continue;
+        if (ns < best_ns) best_ns = ns;
+        if (ticks < best_ticks) best_ticks = ticks;
+    }
+    double ns_per_element = (double)best_ns / (double)elements;
+    printf("  %-22s %10.3f ns/elem %9.2f ticks/elem %10.1f M elem/s\n",
+           k->name, ns_per_element, (double)best_ticks / (double)elements, 1e3 / ns_per_element);
+}
+
+static void run_benchmarks(long long calls, int batch, uint64_t seed) {
+    // GINI-like inputs (20.00 .. 65.00, two decimals), the values the kernels see in practice
+    for (int i = 0; i < batch; ++i) {
+        input_buffer[i] = 20.0f + (float)(xorshift64(&seed) % 4501) / 100.0f;
+    }
+    printf("\n--- Benchmark (%lld elements per run, batch calls of %d, best of %d runs) ---\n", calls, batch, BENCH_REPS);
+    for (int k = 0; k < NUM_KERNELS; ++k) {
+        if (!kernel_available(&kernels[k])) {
+            printf("  %-22s skipped: CPU without SSE2\n", kernels[k].name);
+            continue;
+        }
+        bench_kernel(&kernels[k], input_buffer, output_buffer, batch, calls);
+    }
+}
+
+
+// --- Differential check ---
+// Runs every kernel on input[0..n) and compares with the reference results.
+// Odd chunks start one float past the 16-byte boundary, so the SSE2 kernel's
+// unaligned head loop is checked as well as its vector body and tail.
+static void check_chunk(float* buffer, int n, long long chunk_index) {
+    float* input = buffer + (chunk_index & 1);
+    if (input != buffer) memmove(input, buffer, (size_t)n * sizeof(float));
+    for (int i = 0; i < n; ++i) {
+        expected_buffer[i] = reference_round(input[i]);
+    }
+    for (int k = 0; k < NUM_KERNELS; ++k) {
+        struct kernel* kern = &kernels[k];
+        if (!kernel_available(kern)) continue;
+        kern->fn(input, output_buffer, n);
+        for (int i = 0; i < n; ++i) {
+            if (output_buffer[i] == expected_buffer[i]) continue;
+            if (kern->mismatches < MAX_REPORTED) {
+                printf("  MISMATCH %-22s bits 0x%08x (%.9g): expected %d, got %d\n",
+                       kern->name, (unsigned)bits_from_float(input[i]), (double)input[i], expected_buffer[i], output_buffer[i]);
+            }
+            kern->mismatches++;
+        }
+    }
+}
+
+// Values where rounding is easiest to get wrong: signed zeros, denormals,
+// ties, the int32 limits (2^31 is the first float out of range), the float
+// precision limit (2^23: no fraction bits left), Inf and NaNs (quiet,
+// signaling, negative, with payload).
+static const uint32_t special_bits[] = {
+    0x00000000u, 0x80000000u,                           // +0, -0
+    0x00000001u, 0x80000001u, 0x007fffffu, 0x00800000u, // Smallest denormal, largest denormal, FLT_MIN
+    0x3effffffu, 0x3f000000u, 0xbf000000u, 0x3f000001u, // 0.49999997, 0.5, -0.5, 0.50000006
+    0x3fc00000u, 0xbfc00000u, 0x40200000u, 0xc0200000u, // 1.5, -1.5, 2.5, -2.5
+    0x4b000000u, 0x4afffffeu, 0x4affffffu, 0xcaffffffu, // 2^23, 8388607.0, 8388607.5, -8388607.5
+    0x4effffffu, 0xceffffffu,                           // 2147483520, -2147483520 (largest in range)
+    0x4f000000u, 0xcf000000u, 0xcf000001u,              // 2^31 (out), -2^31 (in), just below -2^31 (out)
+    0x7f7fffffu, 0xff7fffffu,                           // +/-FLT_MAX
+    0x7f800000u, 0xff800000u,                           // +/-Inf
+    0x7fc00000u, 0xffc00000u, 0x7f800001u, 0x7fbfffffu, // qNaN, -qNaN, sNaN, sNaN with payload
+    0x7fffffffu, 0xffffffffu,                           // NaN with every payload bit
+};
+
+static void check_exhaustive(void) {
+    printf("\n--- Differential check: all 2^32 float bit patterns ---\n");
+    long long chunk_index = 0;
+    for (uint64_t base = 0; base < (1ULL << 32); base += CHUNK, ++chunk_index) {
+        for (int i = 0; i < CHUNK; ++i) {
+            input_buffer[i] = float_from_bits((uint32_t)(base + (uint64_t)i));
+        }
+        check_chunk(input_buffer, CHUNK, chunk_index);
+        if ((base & 0x0fffffffULL) == 0 && base) {
+            printf("  %3.0f%% ...\n", (double)base * 100.0 / 4294967296.0);
+            fflush(stdout);
+        }
+    }
+}
+
+static void check_random(long long samples, uint64_t seed) {
+    int num_special = (int)(sizeof(special_bits) / sizeof(special_bits[0]));
+    printf("\n--- Differential check: %d special values + %lld random samples (seed %llu) ---\n", num_special, samples, (unsigned long long)seed);
+    for (int i = 0; i < num_special; ++i) {
+        input_buffer[i] = float_from_bits(special_bits[i]);
+    }
+    check_chunk(input_buffer, num_special, 0);
+    long long chunk_index = 1;
+    for (long long done = 0; done < samples; done += CHUNK, ++chunk_index) {
+        int n = (samples - done < CHUNK) ? (int)(samples - done) : CHUNK;
+        for (int i = 0; i < n; ++i) {
+            uint64_t r = xorshift64(&seed);
+            switch (i % 3) {
+            case 0:  // Any bit pattern: every exponent equally likely (NaN/Inf/huge/tiny included)
+                input_buffer[i] = float_from_bits((uint32_t)r);
+                break;
+            case 1:  // Uniform over +/-1.5 * 2^31: the in-range region and both overflow edges
+                input_buffer[i] = (float)(((double)(r >> 11) / 9007199254740992.0 * 2.0 - 1.0) * 3221225472.0);
+                break;
+            default: // Exact ties k + 0.5 (only representable below 2^23)
+                input_buffer[i] = (float)((int32_t)(r % 16777216) - 8388608) + 0.5f;
+                break;
+            }
+        }
+        check_chunk(input_buffer, n, chunk_index);
+    }
+}
+
+static int report_check(long long values) {
+    int failed = 0;
+    printf("\n--- Check Summary (%lld values per kernel) ---\n", values);
+    for (int k = 0; k < NUM_KERNELS; ++k) {
+        const struct kernel* kern = &kernels[k];
+        if (!kernel_available(kern)) {
+            printf("  %-22s skipped: CPU without SSE2\n", kern->name);
+            continue;
+        }
+        printf("  %-22s %lld mismatches --> %s\n", kern->name, kern->mismatches, kern->mismatches ? "FAIL <<<<<<<<" : "PASS");
+        if (kern->mismatches) failed = 1;
+    }
+    return failed;
+}
+
+
+// --- Main ---
+static long long parse_count(const char* option, const char* value) {
+    char* end = NULL;
+    long long n = value ? strtoll(value, &end, 0) : 0;
+    if (!value || *end != '\0' || n <= 0) {
+        fprintf(stderr, "Error: %s needs a positive number.\n", option);
+        exit(2);
+    }
+    return n;
+}
+
+int main(int argc, char** argv) {
+    long long calls = DEFAULT_CALLS, samples = DEFAULT_SAMPLES;
+    int batch = DEFAULT_BATCH, exhaustive = 0, bench = 1, check = 1;
+    uint64_t seed = 0x9e3779b97f4a7c15ULL;
+    for (int i = 1; i < argc; ++i) {
+        const char* arg = argv[i];
+        const char* value = (i + 1 < argc) ? argv[i + 1] : NULL;
+        if (strcmp(arg, "--exhaustive") == 0) exhaustive = 1;
+        else if (strcmp(arg, "--no-bench") == 0) bench = 0;
+        else if (strcmp(arg, "--no-check") == 0) check = 0;
+        else if (strcmp(arg, "--calls") == 0) { calls = parse_count(arg, value); ++i; }
+        else if (strcmp(arg, "--samples") == 0) { samples = parse_count(arg, value); ++i; }
+        else if (strcmp(arg, "--seed") == 0) { seed = (uint64_t)parse_count(arg, value); ++i; }
+        else if (strcmp(arg, "--batch") == 0) {
+            long long n = parse_count(arg, value); ++i;
+            if (n > CHUNK) { fprintf(stderr, "Error: --batch is limited to %d.\n", CHUNK); return 2; }
+            batch = (int)n;
+        }
+        else {
+            fprintf(stderr, "Usage: %s [--calls N] [--batch N] [--samples N | --exhaustive] [--seed S] [--no-bench] [--no-check]\n", argv[0]);
+            return 2;
+        }
+    }
+
+    printf("asm_bench: %d-bit build, SSE2 %s\n", (int)(sizeof(void*) * 8), asm_has_sse2() ? "available" : "not available");
+    if (bench) run_benchmarks(calls, batch, seed);
+    if (!check) return 0;
+    if (exhaustive) check_exhaustive();
+    else check_random(samples, seed);
+    long long values = exhaustive ? (long long)(1ULL << 32) : samples + (long long)(sizeof(special_bits) / sizeof(special_bits[0]));
+    return report_check(values);
+}
@@ -62,3 +62,213 @@ asm_round:
                         ;     transferring control back to the C caller.
                         ;     According to cdecl, the C caller will clean up the
                         ;     arguments ([ebp+8] and [ebp+12]) from the stack.
+
+
+; ---------------------------------------------------------------------------
+; asm_round_batch
+; Rounds an array of floats in one call (same rounding as asm_round).
+; Input (cdecl, all through the stack):
+;   [esp+4]  = const float* input array
+;   [esp+8]  = int* output array (must hold n ints)
+;   [esp+12] = int n (number of elements; n <= 0 does nothing)
+; Output: output[i] = round(input[i]) for i in [0, n).
+;
+; Dispatcher: for batches of at least SSE2_MIN_BATCH elements it tail-jumps
+; to the SSE2 kernel if the CPU has SSE2; otherwise (small batch or no SSE2)
+; it tail-jumps to the x87 kernel. The stack is back to the caller's frame
+; before the jump, so the kernels see exactly the caller's arguments.
+;
+; CPUID is serializing (100+ cycles), so it runs only on the first large
+; batch: the answer is cached in sse2_state (-1 = not probed yet, else 0/1).
+; Threads racing on the first call all store the same value (one aligned
+; dword write), so no lock is needed. sse2_state is reached through the GOT
+; base (call/pop + ..gotpc/..gotoff): position-independent, no text
+; relocations in libginiadder.so.
+;
+; Both kernels give identical results with the default control words:
+;   - x87 FISTP rounds with the FPU control word (round to nearest, ties to even).
+;   - CVTPS2DQ/CVTSS2SI round with MXCSR (round to nearest, ties to even).
+;   - NaN, +/-Inf and out-of-range values give 0x80000000 ("integer indefinite")
+;     in both cases.
+; ---------------------------------------------------------------------------
+    global asm_round_batch
+    global asm_round_batch_x87
+    global asm_round_batch_sse2
+    global asm_has_sse2
+
+SSE2_MIN_BATCH  equ 8           ; Below this the SSE2 head/tail overhead costs more than it saves.
+EFLAGS_ID       equ 0x00200000  ; EFLAGS bit 21: writable only if CPUID exists.
+CPUID_EDX_SSE2  equ 0x04000000  ; CPUID.1:EDX bit 26.
+
+    extern  _GLOBAL_OFFSET_TABLE_
+
+section .data
+    align   4
+sse2_state      dd -1           ; Cached has_sse2 result: -1 unknown, 0 no, 1 yes.
+
+section .text
+; Internal (non-global) labels are used as jump/call targets so that no
+; relocation against a preemptible global symbol ends up in the .so.
+
+asm_round_batch:
+    cmp     dword [esp+12], SSE2_MIN_BATCH
+    jl      round_batch_x87             ; Small batch: straight to x87.
+    call    .get_got
+.get_got:
+    pop     ecx                         ; ECX = address of .get_got
+    add     ecx, _GLOBAL_OFFSET_TABLE_ + $$ - .get_got wrt ..gotpc ; ECX = GOT base
+    mov     eax, [ecx + sse2_state wrt ..gotoff]
+    test    eax, eax
+    jg      round_batch_sse2            ; 1: SSE2 (cached)
+    jz      round_batch_x87             ; 0: no SSE2 (cached)
+    push    ecx                         ; -1: first large batch, probe once.
+    call    has_sse2                    ; EAX = 1 if SSE2 is available (clobbers ECX/EDX).
+    pop     ecx
+    mov     [ecx + sse2_state wrt ..gotoff], eax
+    test    eax, eax
+    jnz     round_batch_sse2
+    jmp     round_batch_x87
+
+
+; ---------------------------------------------------------------------------
+; int asm_has_sse2(void)
+; Returns 1 in EAX if the CPU supports SSE2, 0 otherwise (probes every call;
+; asm_round_batch caches the answer in sse2_state).
+; First checks that CPUID itself exists (EFLAGS.ID toggles), then reads
+; leaf 1. CPUID clobbers EBX, which is callee-saved (and the PIC register).
+; ---------------------------------------------------------------------------
+asm_has_sse2:
+has_sse2:
+    push    ebx
+
+    pushfd                      ; Try to flip EFLAGS.ID.
+    pop     eax
+    mov     ecx, eax            ; ECX = original EFLAGS
+    xor     eax, EFLAGS_ID
+    push    eax
+    popfd
+    pushfd
+    pop     eax                 ; EAX = EFLAGS after the write attempt
+    push    ecx
+    popfd                       ; Restore the original EFLAGS.
+    xor     eax, ecx
+    test    eax, EFLAGS_ID
+    jz      .no_sse2            ; Bit did not change: no CPUID (386/early 486).
+
+    mov     eax, 1
+    cpuid                       ; Feature flags in EDX/ECX.
+    test    edx, CPUID_EDX_SSE2
+    jz      .no_sse2
+    mov     eax, 1
+    pop     ebx
+    ret
+
+.no_sse2:
+    xor     eax, eax
+    pop     ebx
+    ret
+
+
+; ---------------------------------------------------------------------------
+; void asm_round_batch_x87(const float* in, int* out, int n)
+; Scalar x87 kernel: the loop of asm_round, one FLD/FISTP per element.
+; ---------------------------------------------------------------------------
+asm_round_batch_x87:
+round_batch_x87:
+    ; --- Prologue ---
+    push    ebp
+    mov     ebp, esp
+    push    esi             ; ESI/EDI are callee-saved in cdecl: preserve them.
+    push    edi
+
+    mov     esi, [ebp+8]    ; ESI = input pointer
+    mov     edi, [ebp+12]   ; EDI = output pointer
+    mov     ecx, [ebp+16]   ; ECX = element counter
+    test    ecx, ecx
+    jle     .done           ; Nothing to do for n <= 0.
+
+.loop:
+    fld     dword [esi]     ; st0 = input[i]
+    fistp   dword [edi]     ; output[i] = round(st0), pop. No temp slot needed:
+                            ; FISTP can store straight to the output array.
+    add     esi, 4
+    add     edi, 4
+    dec     ecx
+    jnz     .loop
+
+.done:
+    ; --- Epilogue ---
+    pop     edi
+    pop     esi
+    mov     esp, ebp
+    pop     ebp
+    ret
+
+
+; ---------------------------------------------------------------------------
+; void asm_round_batch_sse2(const float* in, int* out, int n)
+; SSE2 kernel: CVTPS2DQ converts 4 floats per instruction.
+;   1. Scalar head (CVTSS2SI) until the input pointer is 16-byte aligned,
+;      so the vector loop can use an aligned memory operand.
+;   2. Vector body, 4 elements per iteration (output stored unaligned).
+;   3. Scalar tail for the n % 4 leftover elements.
+; Callers must make sure SSE2 is available (see asm_round_batch).
+; ---------------------------------------------------------------------------
+asm_round_batch_sse2:
+round_batch_sse2:
+    ; --- Prologue ---
+    push    ebp
+    mov     ebp, esp
+    push    esi
+    push    edi
+
+    mov     esi, [ebp+8]    ; ESI = input pointer
+    mov     edi, [ebp+12]   ; EDI = output pointer
+    mov     ecx, [ebp+16]   ; ECX = elements left
+    test    ecx, ecx
+    jle     .done
+
+.head:                      ; --- 1. Align the input to 16 bytes ---
+    test    esi, 15
+    jz      .aligned
+    cvtss2si eax, [esi]     ; Same rounding as CVTPS2DQ (MXCSR).
+    mov     [edi], eax
+    add     esi, 4
+    add     edi, 4
+    dec     ecx
+    jnz     .head
+    jmp     .done
+
+.aligned:
+    mov     edx, ecx
+    shr     edx, 2          ; EDX = number of 4-float blocks
+    and     ecx, 3          ; ECX = leftover elements for the tail
+    test    edx, edx
+    jz      .tail
+
+.vector:                    ; --- 2. 4 elements per iteration ---
+    cvtps2dq xmm0, [esi]    ; Aligned load + convert 4 floats to 4 int32.
+    movdqu  [edi], xmm0     ; The output array may be unaligned.
+    add     esi, 16
+    add     edi, 16
+    dec     edx
+    jnz     .vector
+
+.tail:                      ; --- 3. Leftovers ---
+    test    ecx, ecx
+    jz      .done
+.tail_loop:
+    cvtss2si eax, [esi]
+    mov     [edi], eax
+    add     esi, 4
+    add     edi, 4
+    dec     ecx
+    jnz     .tail_loop
+
+.done:
+    ; --- Epilogue ---
+    pop     edi
+    pop     esi
+    mov     esp, ebp
+    pop     ebp
+    ret
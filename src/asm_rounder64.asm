@@ -0,0 +1,124 @@
+; asm_rounder64.asm
+; NASM Assembly code (64-bit Linux) with the same functions as asm_rounder.asm.
+; Used for the native in-process backend (libginiadder64.so, loaded directly
+; by logic.py with ctypes, no 32-bit server).
+;
+; NOTE: the x86-64 System V ABI passes the first arguments in registers, not on
+; the stack: floats in XMM0..XMM7, integers/pointers in RDI, RSI, RDX, ...
+; The stack-based calling convention of the assignment is shown by the 32-bit
+; version (asm_rounder.asm); this file is only the fast path for 64-bit hosts.
+;
+; Rounding is identical to the 32-bit version: x87 FISTP and SSE2 CVT*2*
+; both round to nearest, ties to even, and give 0x80000000 for NaN/Inf/overflow.
+
+section .text
+    global asm_round
+    global asm_round_batch
+    global asm_round_batch_x87
+    global asm_round_batch_sse2
+    global asm_has_sse2
+
+SSE2_MIN_BATCH  equ 8
+
+; ---------------------------------------------------------------------------
+; void asm_round(float input_float [XMM0], int* output_int_ptr [RDI])
+; ---------------------------------------------------------------------------
+asm_round:
+    movss   dword [rsp-8], xmm0 ; Spill the float into the red zone (leaf function,
+                                ; the 128 bytes below RSP are ours).
+    fld     dword [rsp-8]       ; st0 = input
+    fistp   dword [rdi]         ; *output_int_ptr = round(st0), pop.
+    ret
+
+
+; ---------------------------------------------------------------------------
+; void asm_round_batch(const float* in [RDI], int* out [RSI], int n [EDX])
+; SSE2 is part of the x86-64 baseline, so no CPUID probe is needed: small
+; batches use the x87 loop, everything else the SSE2 kernel.
+; ---------------------------------------------------------------------------
+asm_round_batch:
+    cmp     edx, SSE2_MIN_BATCH
+    jl      round_batch_x87
+    jmp     round_batch_sse2
+
+
+; ---------------------------------------------------------------------------
+; int asm_has_sse2(void): always 1 on x86-64.
+; ---------------------------------------------------------------------------
+asm_has_sse2:
+    mov     eax, 1
+    ret
+
+
+; ---------------------------------------------------------------------------
+; void asm_round_batch_x87(const float* in, int* out, int n)
+; ---------------------------------------------------------------------------
+asm_round_batch_x87:
+round_batch_x87:
+    test    edx, edx
+    jle     .done               ; Nothing to do for n <= 0.
+.loop:
+    fld     dword [rdi]         ; st0 = in[i]
+    fistp   dword [rsi]         ; out[i] = round(st0), pop.
+    add     rdi, 4
+    add     rsi, 4
+    dec     edx
+    jnz     .loop
+.done:
+    ret
+
+
+; ---------------------------------------------------------------------------
+; void asm_round_batch_sse2(const float* in, int* out, int n)
+; Scalar head until the input is 16-byte aligned, CVTPS2DQ body (4 floats per
+; instruction), scalar tail for the n % 4 leftovers.
+; ---------------------------------------------------------------------------
+asm_round_batch_sse2:
+round_batch_sse2:
+    test    edx, edx
+    jle     .done
+    mov     ecx, edx            ; ECX = elements left
+
+.head:                          ; --- 1. Align the input to 16 bytes ---
+    test    rdi, 15
+    jz      .aligned
+    cvtss2si eax, dword [rdi]
+    mov     [rsi], eax
+    add     rdi, 4
+    add     rsi, 4
+    dec     ecx
+    jnz     .head
+    ret
+
+.aligned:
+    mov     edx, ecx
+    shr     edx, 2              ; EDX = number of 4-float blocks
+    and     ecx, 3              ; ECX = leftovers
+    test    edx, edx
+    jz      .tail
+
+.vector:                        ; --- 2. 4 elements per iteration ---
+    cvtps2dq xmm0, [rdi]        ; Aligned load + convert.
+    movdqu  [rsi], xmm0
+    add     rdi, 16
+    add     rsi, 16
+    dec     edx
+    jnz     .vector
+
+.tail:                          ; --- 3. Leftovers ---
+    test    ecx, ecx
+    jz      .done
+.tail_loop:
+    cvtss2si eax, dword [rdi]
+    mov     [rsi], eax
+    add     rdi, 4
+    add     rsi, 4
+    dec     ecx
+    jnz     .tail_loop
+
+.done:
+    ret
+
+
+; Mark the stack as non-executable for the linker.
+section .note.GNU-stack noalloc noexec nowrite progbits
@@ -0,0 +1,149 @@
+# c_async.py
+# asyncio API for the C/ASM processing (process_data_with_c), NO GUI code.
+# For event-loop callers (gini_daemon.py, an asyncio GUI loop, web services):
+#
+#   result  = await process_data_with_c_async(42.5)
+#   results = await process_data_with_c_batch_async([42.5, 38.1, 51.0])
+#   results = await asyncio.gather(*(process_data_with_c_async(v) for v in values))
+#
+# msl-loadlib's request32 is blocking and carries one request per connection,
+# so several requests cannot share one Server32 socket. Instead:
+#
+# - Up to C_ASYNC_IN_FLIGHT batch calls run at once in worker threads (one per
+#   pooled Server32 process by default, read when the first batcher is made),
+#   the event loop never blocks.
+# - Values awaited while every slot is busy are queued and coalesced: the next
+#   free slot sends all of them as ONE process_data_with_c_batch call, and each
+#   awaiting caller gets back its own slice of the results.
+
+import os
+import asyncio
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, List, Optional, Sequence, Set, Tuple
+
+import logic
+from instrumentation import get_logger, increment
+
+log = get_logger("CAsync")
+
+# --- Constants ---
+C_ASYNC_IN_FLIGHT = int(os.environ.get("GINI_C_ASYNC_IN_FLIGHT", 0)) # Batch calls running at once (0: logic.SERVER32_POOL_SIZE when the batcher is created)
+C_ASYNC_MAX_BATCH = 4096 # Most values sent in one coalesced call (a larger single request still goes alone)
+
+BatchFunction = Callable[[List[float]], Optional[List[int]]]
+
+
+class AsyncCBatcher:
+    """
+    Coalescing dispatcher bound to ONE event loop (not thread-safe: use it from
+    the loop only). Requests are (values, future) pairs; each dispatched batch
+    concatenates whole requests, so results are matched back by position.
+    A failed batch (None or an exception) resolves all its requests to None,
+    like process_data_with_c does; a cancelled batch task (loop shutdown)
+    cancels them, so no caller is left awaiting forever.
+    """
+    def __init__(self, batch_fn: BatchFunction, executor: ThreadPoolExecutor, max_in_flight: int, max_batch: int = C_ASYNC_MAX_BATCH):
+        if max_in_flight < 1: raise ValueError("max_in_flight must be >= 1")
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.max_batch = max_batch
+        self.in_flight = 0
+        self._pending: Deque[Tuple[List[float], asyncio.Future]] = deque()
+        self._tasks: Set[asyncio.Task] = set() # Running batches: the loop only keeps weak references to tasks
+
+    async def submit(self, values: Sequence[float]) -> Optional[List[int]]:
+        """Queues the values and waits for their results (same order), or None on failure."""
+        values = [float(v) for v in values]
+        if not values: return []
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((values, future))
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        """Starts as many batches as there are free slots."""
+        loop = asyncio.get_running_loop()
+        while self._pending and self.in_flight < self.max_in_flight:
+            batch, size = [], 0
+            while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch):
+                values, future = self._pending.popleft()
+                if future.cancelled(): continue # Caller went away while queued
+                batch.append((values, future)); size += len(values)
+            if not batch: continue
+            self.in_flight += 1
+            if len(batch) > 1: increment("c_async_coalesced", len(batch) - 1)
+            task = loop.create_task(self._run(batch))
+            self._tasks.add(task); task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[List[float], asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        values = [v for request, _ in batch for v in request]
+        results, finished = None, False
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_fn, values)
+            finished = True
+        except Exception as e:
+            log.error(f"C batch of {len(values)} values failed: {type(e).__name__}: {e}")
+            finished = True
+        finally:
+            self.in_flight -= 1
+            if results is not None and len(results) != len(values):
+                log.error(f"C batch returned {len(results)} results for {len(values)} values.")
+                results = None
+            offset = 0
+            for request, future in batch:
+                if not future.done():
+                    if not finished: future.cancel() # Task cancelled (or BaseException): callers get CancelledError
+                    else: future.set_result(None if results is None else results[offset:offset + len(request)])
+                offset += len(request)
+            if not finished and not self.in_flight: # No batch left to pick up the queue
+                while self._pending: self._pending.popleft()[1].cancel()
+        if self._pending: self._dispatch()
+
+
+# --- Module API (one batcher per running event loop, one shared thread pool) ---
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncCBatcher]" = weakref.WeakKeyDictionary()
+
+def _in_flight_limit() -> int:
+    """C_ASYNC_IN_FLIGHT, or the Server32 pool size as configured now (not at import time)."""
+    return C_ASYNC_IN_FLIGHT or logic.SERVER32_POOL_SIZE
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None: _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="c-async")
+        return _executor
+
+def _get_batcher() -> AsyncCBatcher:
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        max_in_flight = _in_flight_limit()
+        # Looked up on logic at call time, so tests/benchmarks can swap the batch function
+        batcher = _batchers[loop] = AsyncCBatcher(lambda values: logic.process_data_with_c_batch(values), _get_executor(max_in_flight), max_in_flight)
+    return batcher
+
+
+async def process_data_with_c_async(gini_value: float) -> Optional[int]:
+    """Awaitable process_data_with_c: the integer result, or None if an error occurs."""
+    results = await _get_batcher().submit([gini_value])
+    return None if results is None else results[0]
+
+
+async def process_data_with_c_batch_async(gini_values: Sequence[float]) -> Optional[List[int]]:
+    """Awaitable process_data_with_c_batch: the results in input order, or None if an error occurs."""
+    return await _get_batcher().submit(gini_values)
+
+
+def shutdown_c_async():
+    """Stops the worker threads (the Server32 pool itself is stopped by logic.shutdown_c_backend)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None: _executor.shutdown(wait=False, cancel_futures=True); _executor = None
+    _batchers.clear() # They hold the old executor
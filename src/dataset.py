@@ -0,0 +1,166 @@
+# dataset.py
+# Columnar (NumPy) storage for World Bank indicator series, NO network code.
+# Used by logic.py: the raw [meta, records] payload is turned into four compact
+# columns (country index, year, value, valid mask) sorted by country then year,
+# so every query (latest valid value per country, history slices, rankings)
+# is a vectorized pass instead of a Python loop over dicts.
+
+import numpy as np
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+from records import record_country_key
+
+YEAR_DTYPE = np.int16
+VALUE_DTYPE = np.float32
+COUNTRY_DTYPE = np.int16 # ~270 economies + aggregates fit easily
+ROUNDED_DTYPE = np.int32
+ROUNDED_MISSING = np.iinfo(ROUNDED_DTYPE).min # 0x80000000, the x86 "integer indefinite" value
+
+
+class IndicatorDataset:
+    """
+    One indicator for many countries and years, stored column-wise.
+
+    - codes / names: one entry per country (interned once), index = country id.
+    - country: int16 country id of each row.
+    - year: int16 year of each row.
+    - value: float32 value of each row, NaN where the API has no valid number.
+    - valid: bool mask, True where value is a real number.
+
+    Rows are sorted by (country, year ascending), so the rows of one country are a
+    contiguous slice: country c owns rows offsets[c]:offsets[c + 1].
+
+    'rounded' optionally holds the C/ASM-rounded value of every row (int32,
+    ROUNDED_MISSING where the value is NaN), e.g. when loaded from a snapshot.
+    """
+    def __init__(self, indicator: str, codes: List[str], names: List[str], country: np.ndarray, year: np.ndarray, value: np.ndarray):
+        order = np.lexsort((year, country)) # Primary key: country, secondary: year
+        self.indicator = indicator
+        self.codes = codes
+        self.names = names
+        self.country = np.ascontiguousarray(country[order], dtype=COUNTRY_DTYPE)
+        self.year = np.ascontiguousarray(year[order], dtype=YEAR_DTYPE)
+        self.value = np.ascontiguousarray(value[order], dtype=VALUE_DTYPE)
+        self.valid = ~np.isnan(self.value)
+        self.offsets = np.searchsorted(self.country, np.arange(len(codes) + 1)) # Row slice bounds per country
+        self.rounded: Optional[np.ndarray] = None
+        self._index = {code: i for i, code in enumerate(codes)}
+
+    # --- Construction ---
+    @classmethod
+    def from_sorted_columns(cls, indicator: str, codes: List[str], names: List[str], columns: Dict[str, np.ndarray]) -> "IndicatorDataset":
+        """
+        Wraps columns that are already sorted and complete (country, year, value,
+        valid, offsets, optionally rounded) without copying them, so memory-mapped
+        arrays stay mapped.
+        """
+        dataset = cls.__new__(cls)
+        dataset.indicator = indicator
+        dataset.codes = codes
+        dataset.names = names
+        dataset.country, dataset.year, dataset.value = columns["country"], columns["year"], columns["value"]
+        dataset.valid, dataset.offsets = columns["valid"], columns["offsets"]
+        dataset.rounded = columns.get("rounded")
+        dataset._index = {code: i for i, code in enumerate(codes)}
+        return dataset
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], indicator: str = "") -> "IndicatorDataset":
+        """Builds the dataset from raw API records (the second element of the [meta, records] payload)."""
+        index: Dict[str, int] = {}
+        codes: List[str] = []; names: List[str] = []
+        country: List[int] = []; year: List[int] = []; value: List[float] = []
+        for record in records:
+            if not isinstance(record, dict): continue
+            code = record_country_key(record)
+            if not code: continue
+            try: record_year = int(record.get('date'))
+            except (ValueError, TypeError): continue
+            raw_value = record.get('value')
+            try: record_value = float(raw_value) if raw_value is not None else np.nan
+            except (ValueError, TypeError): record_value = np.nan
+            idx = index.get(code)
+            if idx is None:
+                idx = index[code] = len(codes)
+                codes.append(code); names.append((record.get('country') or {}).get('value', 'N/A'))
+            country.append(idx); year.append(record_year); value.append(record_value)
+            if not indicator: indicator = (record.get('indicator') or {}).get('id', "")
+        return cls(indicator, codes, names,
+                   np.array(country, dtype=COUNTRY_DTYPE), np.array(year, dtype=YEAR_DTYPE), np.array(value, dtype=VALUE_DTYPE))
+
+    @classmethod
+    def from_payload(cls, payload: Any, indicator: str = "") -> "IndicatorDataset":
+        """Builds the dataset from a full decoded API response ([meta, records])."""
+        records = payload[1] if isinstance(payload, list) and len(payload) > 1 and isinstance(payload[1], list) else []
+        return cls.from_records(records, indicator)
+
+    # --- Queries ---
+    def __len__(self) -> int:
+        return len(self.year)
+
+    def __contains__(self, code: str) -> bool:
+        return code.upper() in self._index
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the numeric columns."""
+        return self.country.nbytes + self.year.nbytes + self.value.nbytes + self.valid.nbytes + self.offsets.nbytes
+
+    def country_index(self, code: str) -> Optional[int]:
+        return self._index.get(code.upper())
+
+    def latest_valid(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Latest year with a valid value, for every country at once.
+
+        Returns:
+            (country_ids, years, values), one entry per country that has at least
+            one valid value, ordered by country id.
+        """
+        rows = self.latest_rows()
+        return self.country[rows], self.year[rows], self.value[rows]
+
+    def latest_rows(self) -> np.ndarray:
+        """Row index of the latest valid value of every country that has one, ordered by country id."""
+        valid_rows = np.flatnonzero(self.valid)
+        if valid_rows.size == 0: return valid_rows
+        countries = self.country[valid_rows]
+        # Rows are sorted by year inside each country: the last valid row of a run is the latest
+        is_last = np.append(countries[1:] != countries[:-1], True)
+        return valid_rows[is_last]
+
+    def latest_for(self, code: str) -> Optional[Tuple[int, float]]:
+        """(year, value) of the latest valid value of one country, or None."""
+        years, values = self.history(code)
+        if years.size == 0: return None
+        return int(years[-1]), float(values[-1])
+
+    def history(self, code: str, valid_only: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """(years, values) of one country, oldest first (views into the columns, no copies when valid_only=False)."""
+        idx = self.country_index(code)
+        if idx is None: return np.array([], dtype=YEAR_DTYPE), np.array([], dtype=VALUE_DTYPE)
+        rows = slice(self.offsets[idx], self.offsets[idx + 1])
+        if not valid_only: return self.year[rows], self.value[rows]
+        mask = self.valid[rows]
+        return self.year[rows][mask], self.value[rows][mask]
+
+    def latest_table(self, sort_by: str = "code", descending: bool = False) -> List[Tuple[str, str, int, float]]:
+        """
+        (code, name, year, value) of the latest valid value of every country,
+        sorted by 'code', 'value' or 'year' (vectorized argsort).
+        """
+        countries, years, values = self.latest_valid()
+        if sort_by == "value": order = np.argsort(values, kind="stable")
+        elif sort_by == "year": order = np.argsort(years, kind="stable")
+        else: order = np.argsort(np.array(self.codes, dtype=object)[countries], kind="stable") if countries.size else np.array([], dtype=np.intp)
+        if descending: order = order[::-1]
+        return [(self.codes[c], self.names[c], int(y), float(v)) for c, y, v in zip(countries[order], years[order], values[order])]
+
+    def to_records(self, code: str) -> List[Dict[str, Any]]:
+        """Rebuilds raw-style records (newest first, like the API) for code that expects dicts."""
+        idx = self.country_index(code)
+        if idx is None: return []
+        years, values = self.history(code, valid_only=False)
+        country = {"id": code, "value": self.names[idx]}
+        return [{"countryiso3code": code, "country": country, "date": str(int(y)), "value": None if np.isnan(v) else round(float(v), 4)}
+                for y, v in zip(years[::-1], values[::-1])]
@@ -5,17 +5,39 @@
 
 // External declaration of the Assembly function
 extern void asm_round(float input_float, int* output_int_ptr); // Asegúrate que el nombre coincida con el global en ASM
+extern void asm_round_batch(const float* input, int* output, int n); // Versión por lotes: el bucle corre dentro del ASM
+extern void asm_round_batch_x87(const float* input, int* output, int n);  // Kernel escalar (FPU x87)
+extern void asm_round_batch_sse2(const float* input, int* output, int n); // Kernel SIMD (SSE2, 4 floats por instrucción)
+extern int asm_has_sse2(void); // 1 si CPUID reporta SSE2
+
+// Trazas del puente C: solo se compilan con -DGINI_TRACE (GINI_TRACE=1 ./exe_tp.sh, o test.sh).
+// Sin la macro, process_gini_pure_c no hace I/O en cada llamada.
+#ifdef GINI_TRACE
+#define GINI_TRACE_PRINTF(...) printf(__VA_ARGS__)
+#else
+#define GINI_TRACE_PRINTF(...) ((void)0)
+#endif
 
 // The C bridge function
 int process_gini_pure_c(float gini_value) { // Cambiar nombre si se quiere, pero Python lo llama así
     int result_from_asm;
-    printf("[C Bridge] Calling ASM function 'asm_round' with float: %f\n", gini_value);
-    printf("[C Bridge] Address for ASM result output: %p\n", &result_from_asm);
+    GINI_TRACE_PRINTF("[C Bridge] Calling ASM function 'asm_round' with float: %f\n", gini_value);
+    GINI_TRACE_PRINTF("[C Bridge] Address for ASM result output: %p\n", &result_from_asm);
     asm_round(gini_value, &result_from_asm); // Llama a la función ASM correcta
-    printf("[C Bridge] Value received from ASM (via pointer): %d\n", result_from_asm);
+    GINI_TRACE_PRINTF("[C Bridge] Value received from ASM (via pointer): %d\n", result_from_asm);
     return result_from_asm;
 }
 
+// Batch bridge: rounds n floats with a single call into ASM (one ctypes/IPC hop for the whole array).
+// Returns the number of elements processed (0 if the arguments are invalid).
+int process_gini_batch(const float* in, int* out, int n) {
+    if (in == NULL || out == NULL || n <= 0) {
+        return 0;
+    }
+    asm_round_batch(in, out, n);
+    return n;
+}
+
 // --- Main para probar C bridge + ASM directamente (32-bit) ---
 int main() {
     float test_values[] = {
@@ -69,6 +91,53 @@ int main() {
         }
     }
 
+    // --- La versión por lotes debe coincidir con la versión escalar ---
+    printf("\n--- Testing batch bridge (process_gini_batch) ---\n");
+    int batch_output[sizeof(test_values) / sizeof(test_values[0])];
+    int processed = process_gini_batch(test_values, batch_output, num_tests);
+    int batch_failures = (processed == num_tests) ? 0 : 1;
+    for (int i = 0; i < num_tests; ++i) {
+        int scalar_output = process_gini_pure_c(test_values[i]);
+        if (batch_output[i] != scalar_output) {
+            printf("Batch Case %d: Input = %.2f, batch = %d, scalar = %d --> FAIL <<<<<<<<\n", i, test_values[i], batch_output[i], scalar_output);
+            batch_failures++;
+        }
+    }
+    if (batch_failures == 0) {
+        printf("Batch results match the scalar path for all %d values --> PASS\n", num_tests);
+    }
+    failures += batch_failures;
+
+    // --- El kernel SSE2 debe dar exactamente lo mismo que el x87 (incluye .5, NaN, Inf y overflow) ---
+    printf("\n--- Testing SSE2 kernel against x87 kernel ---\n");
+    if (!asm_has_sse2()) {
+        printf("CPU without SSE2: asm_round_batch falls back to x87, SSE2 kernel not tested.\n");
+    } else {
+        enum { SIMD_TESTS = 103 }; // No múltiplo de 4: ejercita también la cola escalar
+        static float simd_in[SIMD_TESTS + 1];
+        static int x87_out[SIMD_TESTS], sse2_out[SIMD_TESTS], dispatch_out[SIMD_TESTS];
+        const float special[] = { NAN, INFINITY, -INFINITY, 3.0e9f, -3.0e9f, 2147483520.0f, -2147483648.0f, -0.0f, 0.5f, -0.5f, 1.5f, -2.5f };
+        int num_special = sizeof(special) / sizeof(special[0]);
+        for (int i = 0; i < SIMD_TESTS + 1; ++i) {
+            simd_in[i] = (i < num_special) ? special[i] : (i - 60) * 0.25f; // Muchos .5 y .25/.75
+        }
+        int simd_failures = 0;
+        // Desde simd_in + 1: entrada desalineada a 16 bytes, ejercita el bucle de cabecera
+        asm_round_batch_x87(simd_in + 1, x87_out, SIMD_TESTS);
+        asm_round_batch_sse2(simd_in + 1, sse2_out, SIMD_TESTS);
+        asm_round_batch(simd_in + 1, dispatch_out, SIMD_TESTS);
+        for (int i = 0; i < SIMD_TESTS; ++i) {
+            if (sse2_out[i] != x87_out[i] || dispatch_out[i] != x87_out[i]) {
+                printf("SIMD Case %d: Input = %f, x87 = %d, sse2 = %d, dispatch = %d --> FAIL <<<<<<<<\n", i, simd_in[i + 1], x87_out[i], sse2_out[i], dispatch_out[i]);
+                simd_failures++;
+            }
+        }
+        if (simd_failures == 0) {
+            printf("SSE2 kernel matches x87 bit for bit on all %d values --> PASS\n", SIMD_TESTS);
+        }
+        failures += simd_failures;
+    }
+
     printf("\n--- Test Summary ---\n");
     if (failures == 0) {
         printf("All %d tests effectively passed (considering FPU round-half-to-even)!\n", num_tests);
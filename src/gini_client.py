@@ -0,0 +1,81 @@
+# gini_client.py
+# GiniAdderClient: the msl-loadlib Client64 side of the 32-bit server (server_32.py).
+# Imported by logic.py only when C processing goes through Server32, so plain
+# lookups never load msl-loadlib (raises ImportError if it is not installed).
+
+from msl.loadlib import Client64
+# Server32Error: errors raised by the server; re-exported for logic.py (see __all__)
+from msl.loadlib.exceptions import Server32Error
+from instrumentation import get_logger, span
+from shm_transport import SharedBatchBuffer
+
+__all__ = ["GiniAdderClient", "Server32Error", "SERVER_MODULE"]
+
+client_log = get_logger("Client64")
+
+# Name of the Python module file containing the Server32 class
+SERVER_MODULE = 'server_32' # No .py extension needed
+
+
+class GiniAdderClient(Client64):
+    """
+    Client to communicate with the GiniAdderServer running in a 32-bit process.
+    """
+    def __init__(self):
+        self._shm_buffer = None # Shared-memory segment for large batches (created on first use)
+        client_log.debug("Initializing GiniAdderClient...")
+        try:
+            # Initialize Client64, specifying the 32-bit server module.
+            # msl-loadlib will find SERVER_MODULE.py and run it in a 32-bit Python process.
+            super().__init__(module32=SERVER_MODULE)
+            client_log.debug(f"Successfully initialized Client64 for module '{SERVER_MODULE}'.")
+        except Exception as e:
+            # Catch errors during Client64 initialization (e.g., cannot start server process).
+            # No traceback: the pool reports failed starts (once) and retries them.
+            client_log.debug(f"Client64 init failed: {type(e).__name__}: {e}")
+            raise # Re-raise to prevent use of uninitialized client
+
+    # --- Option 1: Define explicit methods (Good for clarity, IDE help) ---
+    # def process_gini_pure_c(self, gini_value: float) -> int:
+    #     """
+    #     Sends a request to the 'process_gini_pure_c' method on the Server32.
+    #     """
+    #     print(f"[Client64] Sending request: 'process_gini_pure_c' with value {gini_value}", file=sys.stderr)
+    #     # The first argument to request32 is the METHOD NAME on the Server32 class.
+    #     # Subsequent arguments are passed to that method.
+    #     return self.request32('process_gini_pure_c', gini_value)
+
+    def get_shared_buffer(self) -> SharedBatchBuffer:
+        """Returns this client's shared-memory segment, creating it on first use."""
+        if self._shm_buffer is None: self._shm_buffer = SharedBatchBuffer()
+        return self._shm_buffer
+
+    def shutdown_server32(self, *args, **kwargs):
+        """Releases the shared segment (both sides) before stopping the server."""
+        if getattr(self, '_shm_buffer', None) is not None:
+            try: self.request32('release_shm', self._shm_buffer.path)
+            except Exception: pass
+            self._shm_buffer.close(); self._shm_buffer = None
+        return super().shutdown_server32(*args, **kwargs)
+
+    # --- Option 2: Use __getattr__ (Simpler if many functions just pass through) ---
+    def __getattr__(self, name):
+        """
+        Dynamically creates methods that call request32 with the method name.
+        This avoids writing a wrapper method for every function on the server.
+        """
+        # Check if the requested name is likely a method we want to proxy
+        # Avoid proxying special methods like __deepcopy__, __getstate__ etc.
+        if name.startswith('_'):
+             raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        client_log.debug(f"__getattr__ creating proxy for '{name}'")
+        def send_request(*args, **kwargs):
+            # 'name' will be 'process_gini_pure_c' when called
+            with span("ipc"):
+                return self.request32(name, *args, **kwargs)
+        # Cache the proxy on the instance: later accesses find it directly and
+        # never reach __getattr__ again (no new closure per call).
+        self.__dict__[name] = send_request
+        return send_request
+    # --- End Option 2 ---
@@ -0,0 +1,243 @@
+# gini_daemon.py
+# Long-running GINI lookup service (asyncio, stdlib only), NO GUI code.
+# Built on logic.py: get_gini_data -> find_latest_valid_gini -> process_data_with_c,
+# so services can ask over local HTTP instead of starting an interpreter per lookup:
+#
+#   python src/gini_daemon.py --port 8710
+#   curl http://127.0.0.1:8710/gini/ARG
+#   curl 'http://127.0.0.1:8710/gini?codes=ARG,BRA,CHL'
+#
+# Endpoints (JSON): /gini/{iso3}, /gini?codes=..., /healthz, /metrics (Prometheus text).
+# Every result has the shape of the batch subcommand's JSON lines:
+#   {"code", "name", "year", "value", "c_result", "error"}
+#
+# - Hot cache: results live in an in-memory LRU with a TTL (errors for a short
+#   negative TTL), so repeated lookups never leave the event loop.
+# - Coalescing: concurrent misses for the same country share ONE upstream fetch.
+# - Blocking HTTP fetches run in a thread pool; C calls go through c_async.py,
+#   which keeps one request in flight per pooled Server32 and coalesces the
+#   values that arrive meanwhile into one batch call.
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+from typing import Optional, Dict, Any, Tuple, List
+
+import logic
+from c_async import process_data_with_c_async, shutdown_c_async
+from instrumentation import get_logger, span, increment, dump_prometheus
+
+log = get_logger("Daemon")
+
+# --- Constants ---
+DAEMON_HOST = os.environ.get("GINI_DAEMON_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.environ.get("GINI_DAEMON_PORT", 8710))
+HOT_CACHE_SIZE = 1024         # Countries kept in memory (LRU eviction beyond this)
+HOT_CACHE_TTL = 3600.0        # Seconds a successful result is served from memory
+HOT_CACHE_ERROR_TTL = 30.0    # Seconds a failed lookup is remembered (avoids hammering the API)
+MAX_CODES_PER_REQUEST = 300   # /gini?codes=... limit (the World Bank has ~270 economies + aggregates)
+MAX_HEADER_BYTES = 16 * 1024
+KEEP_ALIVE_TIMEOUT = 30.0     # Idle seconds before a keep-alive connection is closed
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 502: "Bad Gateway"}
+
+
+class HotCache:
+    """LRU of lookup results with per-entry expiry. Event-loop only (not thread-safe)."""
+    def __init__(self, max_entries: int = HOT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None: return None
+        expires, value = entry
+        if expires < time.monotonic(): del self._entries[key]; return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            increment("hot_evicted")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class GiniService:
+    """Lookups with hot cache + request coalescing on top of logic.py."""
+    def __init__(self, process_c: bool = True, cache_size: int = HOT_CACHE_SIZE, cache_ttl: float = HOT_CACHE_TTL, fetch_workers: Optional[int] = None):
+        self.process_c = process_c
+        self.cache = HotCache(cache_size)
+        self.cache_ttl = cache_ttl
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._fetch_executor = ThreadPoolExecutor(max_workers=fetch_workers or logic.MAX_CONCURRENT_REQUESTS, thread_name_prefix="daemon-fetch")
+
+    def start(self):
+        if self.process_c: logic.warm_up_c_backend()
+
+    def close(self):
+        self._fetch_executor.shutdown(wait=False, cancel_futures=True)
+        shutdown_c_async()
+        logic.shutdown_c_backend()
+
+    async def lookup(self, code: str) -> Tuple[int, Dict[str, Any]]:
+        """(http_status, result) for one ISO3 code."""
+        code = code.strip().upper()
+        if len(code) != 3 or not code.isalpha():
+            return 400, _result(code, "Invalid country code format (expected 3 letters).")
+        cached = self.cache.get(code)
+        if cached is not None: increment("hot_hit"); return cached
+        task = self._inflight.get(code)
+        if task is None:
+            increment("hot_miss")
+            task = self._inflight[code] = asyncio.ensure_future(self._resolve(code))
+            task.add_done_callback(lambda _: self._inflight.pop(code, None))
+        else:
+            increment("coalesced")
+        return await asyncio.shield(task) # A client going away must not cancel the shared fetch
+
+    async def lookup_many(self, codes: List[str]) -> List[Tuple[int, Dict[str, Any]]]:
+        return await asyncio.gather(*(self.lookup(code) for code in dict.fromkeys(codes)))
+
+    async def _resolve(self, code: str) -> Tuple[int, Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        try:
+            records, error_message = await loop.run_in_executor(self._fetch_executor, logic.get_gini_data, code)
+        except Exception as e:
+            records, error_message = None, f"An unexpected error occurred:\n{type(e).__name__}"
+        if error_message:
+            status, row = 502, _result(code, error_message)
+        else:
+            latest = logic.find_latest_valid_gini(records or [])
+            if latest is None:
+                status, row = 404, _result(code, f"No valid GINI data found in {logic.DATE_RANGE}.")
+            else:
+                status, row = 200, _result(code)
+                row.update(name=latest['country_name'], year=int(latest['date']), value=float(latest['value']))
+                if self.process_c:
+                    row["c_result"] = await process_data_with_c_async(row["value"])
+                    if row["c_result"] is None: status, row["error"] = 502, "C processing failed."
+        self.cache.put(code, (status, row), self.cache_ttl if status in (200, 404) else HOT_CACHE_ERROR_TTL)
+        return status, row
+
+
+def _result(code: str, error: Optional[str] = None) -> Dict[str, Any]:
+    return {"code": code, "name": None, "year": None, "value": None, "c_result": None, "error": error}
+
+
+# --- HTTP/1.1 front end (asyncio streams) ---
+async def _route(service: GiniService, method: str, target: str) -> Tuple[int, str, bytes]:
+    """(status, content_type, body) for one request."""
+    if method not in ("GET", "HEAD"): return 405, "application/json", json.dumps({"error": "Only GET is supported."}).encode()
+    parts = urlsplit(target)
+    path = unquote(parts.path).rstrip("/")
+    if path.startswith("/gini/") and path.count("/") == 2:
+        status, row = await service.lookup(path[len("/gini/"):])
+        return status, "application/json", json.dumps(row, ensure_ascii=False).encode()
+    if path == "/gini":
+        raw = ",".join(parse_qs(parts.query).get("codes", []))
+        codes = [code.strip().upper() for code in raw.split(",") if code.strip()]
+        if not codes: return 400, "application/json", json.dumps({"error": "Missing 'codes' query parameter (e.g. /gini?codes=ARG,BRA)."}).encode()
+        if len(codes) > MAX_CODES_PER_REQUEST: return 413, "application/json", json.dumps({"error": f"At most {MAX_CODES_PER_REQUEST} codes per request."}).encode()
+        results = await service.lookup_many(codes)
+        return 200, "application/json", json.dumps({"results": [row for _, row in results]}, ensure_ascii=False).encode()
+    if path == "/healthz":
+        return 200, "application/json", json.dumps({"status": "ok", "hot_entries": len(service.cache), "inflight": len(service._inflight)}).encode()
+    if path == "/metrics":
+        return 200, "text/plain; version=0.0.4", dump_prometheus().encode()
+    return 404, "application/json", json.dumps({"error": f"Unknown path '{path}'."}).encode()
+
+
+async def _handle_connection(service: GiniService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serves keep-alive requests on one connection until the client closes it (or goes idle)."""
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError): return
+            except asyncio.LimitOverrunError: await _write_response(writer, 413, "application/json", b'{"error": "Headers too large."}', False, False); return
+            lines = head.decode("latin-1").split("\r\n")
+            try: method, target, version = lines[0].split(" ", 2)
+            except ValueError: await _write_response(writer, 400, "application/json", b'{"error": "Malformed request line."}', False, False); return
+            headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in lines[1:] if line)}
+            length = int(headers.get("content-length", "0") or 0)
+            if length: await reader.readexactly(length) # Bodies are ignored (GET-only API)
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            with span("daemon_request"):
+                status, content_type, body = await _route(service, method, target)
+            await _write_response(writer, status, content_type, body, keep_alive, method == "HEAD")
+            if not keep_alive: return
+    except Exception as e:
+        log.error(f"Connection error: {type(e).__name__}: {e}")
+    finally:
+        writer.close()
+
+
+async def _write_response(writer: asyncio.StreamWriter, status: int, content_type: str, body: bytes, keep_alive: bool, head_only: bool):
+    header = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+              f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(header.encode("latin-1") + (b"" if head_only else body))
+    await writer.drain()
+
+
+async def serve(service: GiniService, host: str = DAEMON_HOST, port: int = DAEMON_PORT, ready: Optional[asyncio.Event] = None):
+    """Runs the HTTP front end until cancelled (or SIGINT/SIGTERM when run as a script)."""
+    server = await asyncio.start_server(lambda r, w: _handle_connection(service, r, w), host, port, limit=MAX_HEADER_BYTES)
+    addresses = ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+    log.warning(f"GINI daemon listening on {addresses} (C processing {'on' if service.process_c else 'off'}).")
+    if ready is not None: ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local GINI lookup daemon (HTTP/JSON) with an in-memory hot cache.")
+    parser.add_argument("--host", default=DAEMON_HOST, help=f"Address to bind (default: {DAEMON_HOST}; env GINI_DAEMON_HOST).")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help=f"Port to bind (default: {DAEMON_PORT}; env GINI_DAEMON_PORT).")
+    parser.add_argument("--hot-size", type=int, default=HOT_CACHE_SIZE, metavar="N", help=f"Countries kept in memory (default: {HOT_CACHE_SIZE}).")
+    parser.add_argument("--hot-ttl", type=float, default=HOT_CACHE_TTL, metavar="SECONDS", help=f"Seconds a result is served from memory (default: {HOT_CACHE_TTL:.0f}).")
+    parser.add_argument("-j", "--concurrency", type=int, metavar="N", help=f"Upstream fetches in flight (default: {logic.MAX_CONCURRENT_REQUESTS}).")
+    parser.add_argument("--no-c", action="store_true", help="Do not round the values with the C function.")
+    logic._add_common_options(parser)
+    args = parser.parse_args(argv)
+    logic._apply_common_options(parser, args)
+    if args.hot_size < 1: parser.error("--hot-size must be >= 1.")
+    logic.configure_http(max_workers=args.concurrency)
+
+    service = GiniService(process_c=not args.no_c, cache_size=args.hot_size, cache_ttl=args.hot_ttl, fetch_workers=args.concurrency)
+    service.start()
+
+    async def run():
+        task = asyncio.ensure_future(serve(service, args.host, args.port))
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try: loop.add_signal_handler(sig, task.cancel)
+            except NotImplementedError: pass # Windows: Ctrl+C raises KeyboardInterrupt instead
+        try: await task
+        except asyncio.CancelledError: log.warning("GINI daemon stopping.")
+
+    try:
+        asyncio.run(run())
+    except OSError as e:
+        print(f"Error: cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr); return 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
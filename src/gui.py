@@ -1,32 +1,114 @@
 # gui.py
-# Defines the Tkinter GUI application class. Imports logic.py.
+# Defines the Tkinter GUI application class. Imports logic.py (in the background,
+# once the window is up: see _import_logic).
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import sys # Import sys for stderr logging in GUI context if needed
+import re
+import queue
+import threading
+from concurrent.futures import Future
 from typing import Optional, List, Dict, Any
-import logic # Import the core logic module
+
+# --- Background work ---
+# Fetches and C processing run on worker threads; the Tk thread only polls the
+# futures with after(), so the window stays responsive however slow the API or
+# the 32-bit server is. Tk widgets are touched from the main thread only.
+GUI_WORKERS = 4      # Lookups processed in parallel (results are still shown in request order)
+GUI_POLL_MS = 50     # How often the main loop checks for finished jobs
+ANALYTICS_REPORTS = ("rank", "percentiles", "yoy", "groups", "coverage") # See analytics.py
+
+class DaemonExecutor:
+    """
+    Minimal executor (submit/shutdown) on daemon threads. ThreadPoolExecutor
+    joins its workers at interpreter exit, so closing the window during a slow
+    lookup would hang until the fetch times out; these workers are abandoned.
+    """
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._max_workers = max_workers
+        self._shutdown = False
+        for i in range(max_workers): threading.Thread(target=self._work, name=f"{thread_name_prefix}_{i}", daemon=True).start()
+
+    def submit(self, fn, *args) -> Future:
+        if self._shutdown: raise RuntimeError("cannot schedule new futures after shutdown")
+        future: Future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def shutdown(self, wait: bool = False, cancel_futures: bool = False):
+        """Stops the workers once their current job ends (wait is not supported: they are never joined)."""
+        self._shutdown = True
+        if cancel_futures:
+            while True:
+                try: item = self._queue.get_nowait()
+                except queue.Empty: break
+                if item is not None: item[0].cancel()
+        for _ in range(self._max_workers): self._queue.put(None)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None: return
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel(): continue # Cancelled while queued
+            try: result = fn(*args)
+            except BaseException as e: future.set_exception(e)
+            else: future.set_result(result)
+
+def _import_logic():
+    """Runs on a worker thread: imports the core logic module and starts the C backend (Server32 pool)."""
+    import logic # Import the core logic module
+    logic.warm_up_c_backend() # So the first result is not delayed by the server's startup
+    return logic
+
+class LookupJob:
+    """One queued unit of background work ('lookup' of a country, or the bulk 'load_all')."""
+    def __init__(self, kind: str, label: str, future: Future):
+        self.kind = kind
+        self.label = label
+        self.future = future
+        self.cancelled = False # Set by Cancel: the result is discarded when it arrives
 
 class GiniApp:
     def __init__(self, master: tk.Tk):
         self.master = master
         master.title("GINI Index Fetcher")
-        master.geometry("550x480")
+        master.geometry("640x480")
         master.config(bg="#f0f0f0")
 
-        # Inject logic functions
-        self.get_gini_data = logic.get_gini_data
-        self.find_latest_valid_gini = logic.find_latest_valid_gini
+        self.executor = DaemonExecutor(max_workers=GUI_WORKERS, thread_name_prefix="gini-gui")
+        # logic.py (requests, cache, C backend) loads while the window is already shown;
+        # workers wait for it on first use, the Tk thread never does
+        self._logic_future = self.executor.submit(_import_logic)
+
+        # Inject logic functions (resolved on first call, from a worker thread)
+        self.get_gini_data = lambda code: self.logic.get_gini_data(code)
+        self.get_all_gini_data = lambda: self.logic.get_all_gini_data()
+        self.find_latest_valid_gini = lambda records: self.logic.find_latest_valid_gini(records)
         # Use the actual C processing function from logic
-        self.process_with_c = logic.process_data_with_c
+        self.process_with_c = lambda value: self.logic.process_data_with_c(value)
+        self.jobs: List[LookupJob] = [] # Pending/running jobs, in submission order
+        self.jobs_total = 0             # Jobs submitted since the queue was last empty (for the progress bar)
+        self._polling = False
+        master.protocol("WM_DELETE_WINDOW", self.close)
 
         self._setup_styles()
         self._create_widgets()
         self._layout_widgets()
 
         self.latest_gini_value_for_c = None
+        self.all_gini_data = None # Filled by the bulk "Load All" fetch: {ISO3: [records]}
+        self.analytics_inputs = None # (dataset, country metadata) tuple, loaded by the first analytics report; replaced, never mutated
+        self.analytics_window: Optional[AnalyticsWindow] = None
         self.entry_code.focus_set()
 
+    @property
+    def logic(self):
+        """The core logic module (waits for the background import on first use)."""
+        return self._logic_future.result()
+
     # _setup_styles, _create_widgets, _layout_widgets as before...
     def _setup_styles(self):
         """Configure ttk styles."""
@@ -44,28 +126,28 @@ class GiniApp:
 
     def _create_widgets(self):
         """Create all the GUI widgets."""
-        self.country_code_var = tk.StringVar(); self.status_var = tk.StringVar(value="Enter a 3-letter country code and click Fetch."); self.summary_country_var = tk.StringVar(value="-"); self.summary_year_var = tk.StringVar(value="-"); self.summary_gini_var = tk.StringVar(value="-")
+        self.country_code_var = tk.StringVar(); self.status_var = tk.StringVar(value="Enter a 3-letter country code and click Fetch."); self.summary_country_var = tk.StringVar(value="-"); self.summary_year_var = tk.StringVar(value="-"); self.summary_gini_var = tk.StringVar(value="-"); self.summary_c_var = tk.StringVar(value="-")
         self.input_frame = ttk.Frame(self.master, padding="15 10 15 5"); self.summary_frame = ttk.Frame(self.master, padding="15 5 15 10", borderwidth=1, relief="solid"); self.history_frame = ttk.Frame(self.master, padding="15 0 15 5"); self.status_frame = ttk.Frame(self.master, padding="15 5 15 10")
-        self.label_code = ttk.Label(self.input_frame, text="Country Code:"); self.entry_code = ttk.Entry(self.input_frame, textvariable=self.country_code_var, width=8); self.fetch_button = ttk.Button(self.input_frame, text="Fetch GINI Data", command=self.fetch_and_display_handler)
-        self.label_summary_country_title = ttk.Label(self.summary_frame, text="Country:", style="Summary.TLabel"); self.label_summary_country_value = ttk.Label(self.summary_frame, textvariable=self.summary_country_var, style="Summary.TLabel", anchor="w"); self.label_summary_year_title = ttk.Label(self.summary_frame, text="Latest Year:", style="Summary.TLabel"); self.label_summary_year_value = ttk.Label(self.summary_frame, textvariable=self.summary_year_var, style="Summary.TLabel"); self.label_summary_gini_title = ttk.Label(self.summary_frame, text="Latest GINI:", style="Summary.TLabel"); self.label_summary_gini_value = ttk.Label(self.summary_frame, textvariable=self.summary_gini_var, style="Summary.TLabel")
+        self.label_code = ttk.Label(self.input_frame, text="Country Code:"); self.entry_code = ttk.Entry(self.input_frame, textvariable=self.country_code_var, width=8); self.fetch_button = ttk.Button(self.input_frame, text="Fetch GINI Data", command=self.fetch_and_display_handler); self.load_all_button = ttk.Button(self.input_frame, text="Load All", command=self.load_all_handler); self.analytics_button = ttk.Button(self.input_frame, text="Analytics", command=self.analytics_handler); self.cancel_button = ttk.Button(self.input_frame, text="Cancel", command=self.cancel_handler, state='disabled')
+        self.label_summary_country_title = ttk.Label(self.summary_frame, text="Country:", style="Summary.TLabel"); self.label_summary_country_value = ttk.Label(self.summary_frame, textvariable=self.summary_country_var, style="Summary.TLabel", anchor="w"); self.label_summary_year_title = ttk.Label(self.summary_frame, text="Latest Year:", style="Summary.TLabel"); self.label_summary_year_value = ttk.Label(self.summary_frame, textvariable=self.summary_year_var, style="Summary.TLabel"); self.label_summary_gini_title = ttk.Label(self.summary_frame, text="Latest GINI:", style="Summary.TLabel"); self.label_summary_gini_value = ttk.Label(self.summary_frame, textvariable=self.summary_gini_var, style="Summary.TLabel"); self.label_summary_c_title = ttk.Label(self.summary_frame, text="C Result:", style="Summary.TLabel"); self.label_summary_c_value = ttk.Label(self.summary_frame, textvariable=self.summary_c_var, style="Summary.TLabel")
         self.label_history_header = ttk.Label(self.history_frame, text="Historical Data (Oldest First)", style="Header.TLabel"); self.result_text = scrolledtext.ScrolledText(self.history_frame, wrap=tk.WORD, state='disabled', height=10, width=60, font=("Consolas", 9), relief=tk.SUNKEN, borderwidth=1)
-        self.status_label = ttk.Label(self.status_frame, textvariable=self.status_var, style="Status.TLabel")
+        self.status_label = ttk.Label(self.status_frame, textvariable=self.status_var, style="Status.TLabel"); self.progress = ttk.Progressbar(self.status_frame, mode='determinate', maximum=1)
         self.entry_code.bind("<Return>", self.fetch_and_display_handler)
 
     def _layout_widgets(self):
         """Arrange widgets using the grid layout manager."""
         self.master.grid_columnconfigure(0, weight=1); self.master.grid_rowconfigure(0, weight=0); self.master.grid_rowconfigure(1, weight=0); self.master.grid_rowconfigure(2, weight=1); self.master.grid_rowconfigure(3, weight=0)
-        self.input_frame.grid(row=0, column=0, sticky="ew"); self.input_frame.grid_columnconfigure(1, weight=1); self.label_code.grid(row=0, column=0, padx=(0, 5), pady=5, sticky="w"); self.entry_code.grid(row=0, column=1, padx=5, pady=5, sticky="ew"); self.fetch_button.grid(row=0, column=2, padx=(5, 0), pady=5, sticky="e")
-        self.summary_frame.grid(row=1, column=0, sticky="ew", pady=(5,10)); self.summary_frame.grid_columnconfigure(1, weight=1); self.label_summary_country_title.grid(row=0, column=0, sticky="w", padx=5, pady=2); self.label_summary_country_value.grid(row=0, column=1, columnspan=3, sticky="ew", padx=5, pady=2); self.label_summary_year_title.grid(row=1, column=0, sticky="w", padx=5, pady=2); self.label_summary_year_value.grid(row=1, column=1, sticky="w", padx=5, pady=2); self.label_summary_gini_title.grid(row=1, column=2, sticky="e", padx=(10,5), pady=2); self.label_summary_gini_value.grid(row=1, column=3, sticky="w", padx=5, pady=2)
+        self.input_frame.grid(row=0, column=0, sticky="ew"); self.input_frame.grid_columnconfigure(1, weight=1); self.label_code.grid(row=0, column=0, padx=(0, 5), pady=5, sticky="w"); self.entry_code.grid(row=0, column=1, padx=5, pady=5, sticky="ew"); self.fetch_button.grid(row=0, column=2, padx=(5, 0), pady=5, sticky="e"); self.load_all_button.grid(row=0, column=3, padx=(5, 0), pady=5, sticky="e"); self.analytics_button.grid(row=0, column=4, padx=(5, 0), pady=5, sticky="e"); self.cancel_button.grid(row=0, column=5, padx=(5, 0), pady=5, sticky="e")
+        self.summary_frame.grid(row=1, column=0, sticky="ew", pady=(5,10)); self.summary_frame.grid_columnconfigure(1, weight=1); self.label_summary_country_title.grid(row=0, column=0, sticky="w", padx=5, pady=2); self.label_summary_country_value.grid(row=0, column=1, columnspan=3, sticky="ew", padx=5, pady=2); self.label_summary_year_title.grid(row=1, column=0, sticky="w", padx=5, pady=2); self.label_summary_year_value.grid(row=1, column=1, sticky="w", padx=5, pady=2); self.label_summary_gini_title.grid(row=1, column=2, sticky="e", padx=(10,5), pady=2); self.label_summary_gini_value.grid(row=1, column=3, sticky="w", padx=5, pady=2); self.label_summary_c_title.grid(row=2, column=2, sticky="e", padx=(10,5), pady=2); self.label_summary_c_value.grid(row=2, column=3, sticky="w", padx=5, pady=2)
         self.history_frame.grid(row=2, column=0, sticky="nsew"); self.history_frame.grid_rowconfigure(1, weight=1); self.history_frame.grid_columnconfigure(0, weight=1); self.label_history_header.grid(row=0, column=0, sticky="w", pady=(0,5)); self.result_text.grid(row=1, column=0, sticky="nsew")
-        self.status_frame.grid(row=3, column=0, sticky="ew"); self.status_label.pack(fill=tk.X)
+        self.status_frame.grid(row=3, column=0, sticky="ew"); self.progress.pack(fill=tk.X, pady=(0, 3)); self.status_label.pack(fill=tk.X)
 
 
     # update_status, clear_output_fields, display_history_in_textbox as before...
     def update_status(self, message: str, is_error=False):
         self.status_var.set(message); self.status_label.config(foreground="red" if is_error else "gray"); self.master.update_idletasks()
     def clear_output_fields(self):
-        self.summary_country_var.set("-"); self.summary_year_var.set("-"); self.summary_gini_var.set("-"); self.latest_gini_value_for_c = None
+        self.summary_country_var.set("-"); self.summary_year_var.set("-"); self.summary_gini_var.set("-"); self.summary_c_var.set("-"); self.latest_gini_value_for_c = None
         try: self.result_text.config(state='normal'); self.result_text.delete('1.0', tk.END); self.result_text.config(state='disabled')
         except tk.TclError as e: print(f"Error clearing text widget: {e}", file=sys.stderr)
     def display_history_in_textbox(self, records: Optional[List[Dict[str, Any]]]):
@@ -80,62 +162,200 @@ class GiniApp:
         except tk.TclError as e: print(f"Error updating text widget: {e}", file=sys.stderr)
 
 
-    # --- Event Handler ---
+    # --- Event Handlers (main thread: validate, enqueue, return immediately) ---
     def fetch_and_display_handler(self, event=None):
-        """Handles the button click/Enter key press event."""
-        country_code = self.country_code_var.get().strip().upper()
-        if len(country_code) != 3 or not country_code.isalpha():
-            messagebox.showerror("Input Error", "Please enter a valid 3-letter alphabetic country code (e.g., ARG)."); return
+        """Handles the button click/Enter key press event. Several codes (e.g. 'ARG BRA, USA') are queued in order."""
+        raw_codes = [c for c in re.split(r"[\s,;]+", self.country_code_var.get().strip().upper()) if c]
+        invalid = [c for c in raw_codes if len(c) != 3 or not c.isalpha()]
+        if not raw_codes or invalid:
+            messagebox.showerror("Input Error", "Please enter a valid 3-letter alphabetic country code (e.g., ARG).\nSeveral codes can be separated by spaces or commas."); return
+        for country_code in dict.fromkeys(raw_codes): # Drop duplicates, keep order
+            self._submit("lookup", country_code, self._lookup_worker, country_code)
+        self.country_code_var.set(""); self.entry_code.focus_set()
+
+    def load_all_handler(self):
+        """Fetches every economy in one bulk request; later lookups are served from memory."""
+        if any(job.kind == "load_all" and not job.cancelled for job in self.jobs): return # Already queued
+        self._submit("load_all", "all economies", self.get_all_gini_data) # Uses logic.get_all_gini_data
+
+    def analytics_handler(self):
+        """Opens (or raises) the Analytics window: reports over every economy at once."""
+        if self.analytics_window is not None and self.analytics_window.top.winfo_exists(): self.analytics_window.top.lift(); return
+        self.analytics_window = AnalyticsWindow(self)
+
+    def request_analytics(self, report: str, year: Optional[int], by: str):
+        """Called by the Analytics window: computes the report on a worker thread, from a snapshot of the loaded inputs."""
+        self._submit("analytics", f"the {report} report", self._analytics_worker, report, year, by, self.analytics_inputs)
 
-        self.fetch_button.config(state='disabled'); self.entry_code.config(state='disabled')
-        self.clear_output_fields(); self.update_status(f"Fetching data for {country_code}...")
+    def cancel_handler(self):
+        """Drops every queued job; results of jobs already running are discarded when they arrive."""
+        cancelled = 0
+        for job in self.jobs:
+            if not job.cancelled: job.cancelled = True; job.future.cancel(); cancelled += 1
+        if cancelled: self.update_status(f"Cancelled {cancelled} request(s).")
+        self._refresh_progress()
 
-        # --- Call Logic Layer ---
-        gini_records, error_msg = self.get_gini_data(country_code) # Uses logic.get_gini_data
-        # ------------------------
+    def close(self):
+        """Window close: stop accepting work, drop the queue and leave the main loop (running fetches are abandoned)."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
 
-        self.fetch_button.config(state='normal'); self.entry_code.config(state='normal'); self.entry_code.focus_set()
+    def shutdown_backend(self):
+        """Stops the pooled Server32 processes, if logic.py was loaded at all."""
+        future = self._logic_future
+        if future.done() and not future.cancelled() and future.exception() is None: future.result().shutdown_c_backend()
 
+
+    # --- Background jobs ---
+    def _submit(self, kind: str, label: str, fn, *args):
+        if not self.jobs: self.jobs_total = 0
+        self.jobs.append(LookupJob(kind, label, self.executor.submit(fn, *args)))
+        self.jobs_total += 1
+        self._refresh_progress()
+        if not self._polling: self._polling = True; self.master.after(GUI_POLL_MS, self._poll_jobs)
+
+    def _lookup_worker(self, country_code: str) -> Dict[str, Any]:
+        """Runs on a worker thread: fetch (or in-memory lookup), latest value and C processing. No Tk calls here."""
+        result: Dict[str, Any] = {"code": country_code, "records": None, "error": None, "latest": None, "gini": None, "c_result": None, "c_error": None}
+        all_data = self.all_gini_data
+        if all_data is not None:
+            # Bulk dataset already loaded: answer from memory, no network round trip
+            result["records"] = all_data.get(country_code, [])
+        else:
+            result["records"], result["error"] = self.get_gini_data(country_code) # Uses logic.get_gini_data
+        if result["error"] or not result["records"]: return result
+        result["latest"] = self.find_latest_valid_gini(result["records"]) # Uses logic.find_latest_valid_gini
+        if not result["latest"]: return result
+        try: result["gini"] = float(result["latest"]['value'])
+        except (ValueError, TypeError): return result
+        try:
+            # --- C processing (may wait for the Server32 pool; we are off the Tk thread) ---
+            result["c_result"] = self.process_with_c(result["gini"])
+            if result["c_result"] is None: result["c_error"] = "Failed to execute C function.\nCheck console/stderr for details (e.g., missing library)."
+        except Exception as e:
+            print(f"[GUI] Error calling C processing function: {e}", file=sys.stderr)
+            result["c_error"] = f"Unexpected error setting up C call:\n{e}"
+        return result
+
+    def _analytics_worker(self, report: str, year: Optional[int], by: str, inputs: Optional[tuple]):
+        """
+        Runs on a worker thread: computes the report (milliseconds) from 'inputs',
+        the (dataset, metadata) snapshot taken on the Tk thread, loading whatever
+        is missing. Returns (tables, error_msg, inputs); the Tk thread keeps the
+        returned inputs for later reports. No Tk calls or app state writes here.
+        """
+        if inputs is None:
+            dataset, metadata, error_msg = self.logic.load_analytics_inputs()
+            if error_msg: return None, error_msg, None
+            inputs = (dataset, metadata)
+        dataset, metadata = inputs
+        if report == "groups" and metadata is None: # Not available at first load: try again
+            metadata, error_msg = self.logic.get_country_metadata()
+            if error_msg: return None, f"Could not load the country metadata (region / income group):\n{error_msg}", inputs
+            inputs = (dataset, metadata)
+        import analytics # NumPy is loaded by logic's bulk mode anyway
+        try: return analytics.build_report(report, dataset, metadata, year=year, by=by), None, inputs
+        except ValueError as e: return None, str(e), inputs
+
+    def _poll_jobs(self):
+        """Main-thread poller: shows finished jobs in submission order, then reschedules itself while work remains."""
+        while self.jobs and (self.jobs[0].cancelled or self.jobs[0].future.done()):
+            job = self.jobs.pop(0)
+            if job.cancelled or job.future.cancelled(): continue
+            try: outcome = job.future.result()
+            except Exception as e:
+                print(f"[GUI] Background job '{job.label}' failed: {e}", file=sys.stderr)
+                self.update_status(f"Unexpected error while processing {job.label}.", is_error=True); continue
+            if job.kind == "load_all": self._show_load_all_result(*outcome)
+            elif job.kind == "analytics": self._show_analytics_result(*outcome)
+            else: self._show_lookup_result(outcome)
+        self._refresh_progress()
+        if self.jobs: self.master.after(GUI_POLL_MS, self._poll_jobs)
+        else: self._polling = False
+
+    def _refresh_progress(self):
+        active = [job for job in self.jobs if not job.cancelled]
+        self.cancel_button.config(state='normal' if active else 'disabled')
+        if not active:
+            self.progress.config(value=0); return
+        done = self.jobs_total - len(active)
+        self.progress.config(maximum=self.jobs_total, value=done)
+        queued = len(active) - 1
+        self.update_status(f"Fetching data for {active[0].label}..." + (f" ({queued} more queued)" if queued else ""))
+
+
+    # --- Result display (main thread) ---
+    def _show_lookup_result(self, result: Dict[str, Any]):
+        country_code, gini_records, error_msg = result["code"], result["records"], result["error"]
+        self.clear_output_fields()
         if error_msg:
             messagebox.showerror("API/Network Error", error_msg) # Show error from logic layer
             self.update_status(f"Failed to retrieve data for {country_code}.", is_error=True); self.display_history_in_textbox(None)
         elif gini_records is not None:
-            latest_record = self.find_latest_valid_gini(gini_records) # Uses logic.find_latest_valid_gini
+            latest_record = result["latest"]
             if latest_record:
                 self.summary_country_var.set(latest_record.get('country_name', country_code)); self.summary_year_var.set(latest_record.get('date', 'N/A'))
-                try:
-                    gini_float = float(latest_record['value'])
-                    self.summary_gini_var.set(f"{gini_float:.2f}"); self.latest_gini_value_for_c = gini_float
-                    # --- Trigger C processing ---
-                    self._trigger_c_processing(gini_float) # Call the method below
-                    # -----------------------------
-                except (ValueError, TypeError):
+                if result["gini"] is None:
                     self.summary_gini_var.set("Invalid"); self.update_status("Warning: Latest GINI value is not a valid number.", is_error=True); self.latest_gini_value_for_c = None
-                self.update_status("Data fetched successfully.")
-            elif not gini_records: self.update_status(f"No GINI data points found for {country_code} in {DATE_RANGE}.", is_error=False)
+                else:
+                    self.summary_gini_var.set(f"{result['gini']:.2f}"); self.latest_gini_value_for_c = result["gini"]
+                    self._show_c_result(result)
+            elif not gini_records: self.update_status(f"No GINI data points found for {country_code} in {self.logic.DATE_RANGE}.", is_error=False)
             else: self.update_status(f"Found records for {country_code}, but none had valid GINI values.", is_error=True)
             self.display_history_in_textbox(gini_records)
 
+    def _show_load_all_result(self, records_by_iso3: Optional[Dict[str, List[Dict[str, Any]]]], error_msg: Optional[str]):
+        if error_msg:
+            messagebox.showerror("API/Network Error", error_msg)
+            self.update_status("Failed to retrieve the bulk dataset.", is_error=True)
+            return
+        self.all_gini_data = records_by_iso3
+        self.update_status(f"Loaded {len(records_by_iso3)} economies. Lookups now use the local dataset.")
 
-    def _trigger_c_processing(self, gini_value: float):
-        """Calls the C processing function from logic.py and shows result/error."""
-        print(f"[GUI] Triggering C processing with value: {gini_value}", file=sys.stderr)
-        try:
-            # Call the function imported from the logic module
-            c_result = self.process_with_c(gini_value)
-
-            if c_result is not None:
-                 messagebox.showinfo("C Processing Result",
-                                     f"Input GINI: {gini_value:.2f}\nResult from C Library: {c_result}")
-                 self.update_status(f"Data processed by C. Result: {c_result}")
-            else:
-                 # Error occurred during C call (e.g., library load failed)
-                 # logic.py already printed details to stderr
-                 messagebox.showerror("C Processing Error", "Failed to execute C function.\nCheck console/stderr for details (e.g., missing library).")
-                 self.update_status("Error during C library processing.", is_error=True)
+    def _show_analytics_result(self, tables: Optional[List[Any]], error_msg: Optional[str], inputs: Optional[tuple]):
+        if inputs is not None: self.analytics_inputs = inputs # Main thread only: workers get snapshots
+        if error_msg:
+            messagebox.showerror("Analytics Error", error_msg)
+            self.update_status("Failed to compute the analytics report.", is_error=True)
+            return
+        window = self.analytics_window
+        if window is None or not window.top.winfo_exists(): return # Closed while computing
+        window.show("\n\n".join(table.format() for table in tables))
+        self.update_status(f"{tables[0].title}.")
 
-        except Exception as e:
-            # Catch unexpected errors specifically during the trigger/call phase in GUI
-            print(f"[GUI] Error calling C processing function: {e}", file=sys.stderr)
-            messagebox.showerror("C Processing Error", f"Unexpected error setting up C call:\n{e}")
-            self.update_status("Error setting up C library processing.", is_error=True)
+    def _show_c_result(self, result: Dict[str, Any]):
+        """Shows the C processing outcome computed by the worker (summary row instead of a popup per queued lookup)."""
+        if result["c_result"] is not None:
+            self.summary_c_var.set(str(result["c_result"]))
+            self.update_status(f"Data processed by C. Result: {result['c_result']}")
+        else:
+            self.summary_c_var.set("Error")
+            messagebox.showerror("C Processing Error", result["c_error"])
+            self.update_status("Error during C library processing.", is_error=True)
+
+
+class AnalyticsWindow:
+    """Toplevel with the analytics.py reports: pick a report (and year / grouping), the app computes it in the background."""
+    def __init__(self, app: GiniApp):
+        self.app = app
+        self.top = tk.Toplevel(app.master); self.top.title("GINI Analytics"); self.top.geometry("760x520"); self.top.config(bg="#f0f0f0")
+        self.report_var = tk.StringVar(value=ANALYTICS_REPORTS[0]); self.year_var = tk.StringVar(); self.by_var = tk.StringVar(value="region")
+        self.controls = ttk.Frame(self.top, padding="15 10 15 5"); self.output_frame = ttk.Frame(self.top, padding="15 0 15 10")
+        self.label_report = ttk.Label(self.controls, text="Report:"); self.combo_report = ttk.Combobox(self.controls, textvariable=self.report_var, values=ANALYTICS_REPORTS, state="readonly", width=12); self.label_year = ttk.Label(self.controls, text="Year:"); self.entry_year = ttk.Entry(self.controls, textvariable=self.year_var, width=6); self.label_by = ttk.Label(self.controls, text="Group by:"); self.combo_by = ttk.Combobox(self.controls, textvariable=self.by_var, values=("region", "income"), state="readonly", width=8); self.show_button = ttk.Button(self.controls, text="Show", command=self.show_handler)
+        self.result_text = scrolledtext.ScrolledText(self.output_frame, wrap=tk.NONE, state='disabled', font=("Consolas", 9), relief=tk.SUNKEN, borderwidth=1)
+        self.controls.pack(fill=tk.X); self.label_report.pack(side=tk.LEFT); self.combo_report.pack(side=tk.LEFT, padx=(5, 15)); self.label_year.pack(side=tk.LEFT); self.entry_year.pack(side=tk.LEFT, padx=(5, 15)); self.label_by.pack(side=tk.LEFT); self.combo_by.pack(side=tk.LEFT, padx=(5, 15)); self.show_button.pack(side=tk.RIGHT)
+        self.output_frame.pack(fill=tk.BOTH, expand=True); self.result_text.pack(fill=tk.BOTH, expand=True)
+        self.combo_report.bind("<<ComboboxSelected>>", self.show_handler); self.entry_year.bind("<Return>", self.show_handler)
+        self.show_handler()
+
+    def show_handler(self, event=None):
+        """Validates the year (empty = each economy's latest value) and queues the report."""
+        raw_year = self.year_var.get().strip()
+        if raw_year and not (raw_year.isdigit() and len(raw_year) == 4):
+            messagebox.showerror("Input Error", "Year must be a 4-digit year (or empty for each economy's latest value).", parent=self.top); return
+        self.show("Computing...")
+        self.app.request_analytics(self.report_var.get(), int(raw_year) if raw_year else None, self.by_var.get())
+
+    def show(self, text: str):
+        try: self.result_text.config(state='normal'); self.result_text.delete('1.0', tk.END); self.result_text.insert(tk.END, text); self.result_text.config(state='disabled')
+        except tk.TclError as e: print(f"Error updating analytics text widget: {e}", file=sys.stderr)
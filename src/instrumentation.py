@@ -0,0 +1,191 @@
+# instrumentation.py
+# Logging and metrics for the hot paths (HTTP, JSON decode, IPC, native call), NO GUI code.
+#
+# - Logging: every module gets a logger from get_logger(); the level comes from
+#   GINI_LOG_LEVEL (default WARNING), so per-call tracing costs nothing unless
+#   it is switched on (GINI_LOG_LEVEL=DEBUG or the CLI's -v/--verbose).
+# - Metrics: span(stage) times a block and feeds a per-stage counter, error
+#   counter and latency histogram. dump_json() / dump_prometheus() export them.
+# - Startup timing: startup_phase(name) records one-off phases (imports, CLI
+#   setup, first fetch) for the CLI's --startup-timing report.
+
+import os
+import sys
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+LOG_LEVEL = os.environ.get("GINI_LOG_LEVEL", "WARNING").upper()
+METRICS_ENABLED = os.environ.get("GINI_METRICS", "1") != "0"
+
+# Histogram bucket upper bounds, in seconds (1us .. 15s, the HTTP timeout)
+LATENCY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0, 15.0)
+
+_ROOT_LOGGER = "gini"
+_logging_configured = False
+
+
+def configure_logging(level: Optional[str] = None):
+    """Installs the stderr handler for the 'gini' loggers (idempotent; can change the level)."""
+    global _logging_configured
+    root = logging.getLogger(_ROOT_LOGGER)
+    if not _logging_configured:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("[%(name)s] %(levelname)s: %(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+        _logging_configured = True
+    root.setLevel((level or LOG_LEVEL).upper())
+
+
+def get_logger(component: str) -> logging.Logger:
+    """Returns the logger of one component (e.g. 'Logic', 'Client64'), shown as [gini.<component>]."""
+    if not _logging_configured: configure_logging()
+    return logging.getLogger(f"{_ROOT_LOGGER}.{component}")
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (cumulative counts, Prometheus style)."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if error: self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (approximate)."""
+        if not self.count: return 0.0
+        target, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target: return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+_histograms: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+_metrics_lock = threading.Lock()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Times the enclosed block into the histogram of 'stage'. Exceptions are counted and re-raised."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        with _metrics_lock:
+            histogram = _histograms.get(stage)
+            if histogram is None: histogram = _histograms[stage] = Histogram()
+            histogram.observe(elapsed, error)
+
+
+def increment(counter: str, amount: int = 1):
+    """Adds to a plain event counter (e.g. cache hits)."""
+    if not METRICS_ENABLED: return
+    with _metrics_lock:
+        _counters[counter] = _counters.get(counter, 0) + amount
+
+
+def snapshot() -> Dict[str, Any]:
+    """Current metrics as plain data."""
+    with _metrics_lock:
+        stages = {}
+        for stage, h in _histograms.items():
+            stages[stage] = {
+                "count": h.count, "errors": h.errors, "total_s": h.total,
+                "mean_s": h.total / h.count if h.count else 0.0,
+                "p50_s": h.quantile(0.5), "p99_s": h.quantile(0.99),
+                "buckets": {("+Inf" if i == len(h.buckets) else repr(h.buckets[i])): c for i, c in enumerate(h.counts)},
+            }
+        return {"stages": stages, "counters": dict(_counters)}
+
+
+def dump_json() -> str:
+    return json.dumps(snapshot(), indent=2)
+
+
+def dump_prometheus() -> str:
+    """Metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    with _metrics_lock:
+        lines.append("# HELP gini_stage_duration_seconds Latency of instrumented pipeline stages.")
+        lines.append("# TYPE gini_stage_duration_seconds histogram")
+        for stage, h in sorted(_histograms.items()):
+            cumulative = 0
+            for i, c in enumerate(h.counts):
+                cumulative += c
+                bound = "+Inf" if i == len(h.buckets) else repr(h.buckets[i])
+                lines.append(f'gini_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'gini_stage_duration_seconds_sum{{stage="{stage}"}} {h.total}')
+            lines.append(f'gini_stage_duration_seconds_count{{stage="{stage}"}} {h.count}')
+        lines.append("# HELP gini_stage_errors_total Failed executions of instrumented stages.")
+        lines.append("# TYPE gini_stage_errors_total counter")
+        for stage, h in sorted(_histograms.items()):
+            lines.append(f'gini_stage_errors_total{{stage="{stage}"}} {h.errors}')
+        lines.append("# HELP gini_events_total Event counters.")
+        lines.append("# TYPE gini_events_total counter")
+        for name, value in sorted(_counters.items()):
+            lines.append(f'gini_events_total{{event="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Clears every histogram and counter."""
+    with _metrics_lock:
+        _histograms.clear(); _counters.clear()
+
+
+# --- Startup timing (--startup-timing) ---
+_startup_phases: List[Tuple[float, float, int, str]] = [] # (start, elapsed, depth, name)
+_startup_depth = threading.local()
+
+
+def record_startup_phase(name: str, start: float, elapsed: float, depth: int = 0):
+    """Adds a phase measured elsewhere (e.g. a module timing its own imports)."""
+    with _metrics_lock:
+        _startup_phases.append((start, elapsed, depth, name))
+
+
+@contextmanager
+def startup_phase(name: str) -> Iterator[None]:
+    """Times one startup phase. Phases opened inside another one are shown nested under it."""
+    depth = getattr(_startup_depth, "value", 0)
+    _startup_depth.value = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _startup_depth.value = depth
+        record_startup_phase(name, start, time.perf_counter() - start, depth)
+
+
+def startup_report() -> str:
+    """The recorded phases in start order, in milliseconds (interpreter startup itself is not included)."""
+    with _metrics_lock:
+        phases = sorted(_startup_phases)
+    if not phases: return "--- Startup Timing ---\n  (no phases recorded)\n"
+    lines = ["--- Startup Timing (ms) ---"]
+    for start, elapsed, depth, name in phases:
+        lines.append(f"  {'  ' * depth + name:<32}{elapsed * 1000:>9.2f}")
+    lines.append(f"  {'total (first phase -> now)':<32}{(time.perf_counter() - phases[0][0]) * 1000:>9.2f}")
+    return "\n".join(lines) + "\n"
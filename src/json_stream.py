@@ -0,0 +1,107 @@
+# json_stream.py
+# Incremental parser for World Bank [meta, [record, ...]] responses, NO network code.
+# Used by logic.py's streaming mode: the body is fed in chunks (e.g. from
+# requests' iter_content) and records are yielded one at a time as soon as
+# they are complete, so memory stays flat regardless of the response size
+# and the caller can start processing before the download finishes.
+
+import json
+import codecs
+from typing import Iterable, Iterator, Optional, Dict, Any, Tuple
+
+_WHITESPACE = " \t\n\r"
+_COMPACT_AT = 64 * 1024 # Drop the consumed prefix of the buffer once it is this large
+
+
+class StreamingJSONError(ValueError):
+    """The streamed body is not a valid [meta, records] envelope (or ended early)."""
+
+
+class _Reader:
+    """Text buffer over a chunk iterator with just enough primitives for the envelope grammar."""
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._decode_json = json.JSONDecoder().raw_decode
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Appends the next chunk. Returns False at the end of the stream."""
+        if self.eof: return False
+        for chunk in self._chunks:
+            if not chunk: continue
+            if self.pos >= _COMPACT_AT: self.buffer, self.pos = self.buffer[self.pos:], 0
+            self.buffer += self._decoder.decode(chunk)
+            return True
+        self.buffer += self._decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at the end of the stream)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE: self.pos += 1
+            if self.pos < len(self.buffer): return self.buffer[self.pos]
+            if not self._fill(): return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise StreamingJSONError(f"Expected one of {chars!r} at offset {self.pos}, got {char or 'end of stream'!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decodes one complete JSON value, reading more chunks while it is truncated."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decode_json(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Truncated values fail near the end of the buffer; more data may complete them
+                if self._fill(): continue
+                raise StreamingJSONError(f"Invalid or truncated JSON value at offset {self.pos}: {e.msg}") from None
+            if end == len(self.buffer) and not self.eof and isinstance(value, (int, float)):
+                # A number at the very end of the buffer may continue in the next chunk
+                if self._fill(): continue
+            self.pos = end
+            return value
+
+
+def parse_envelope_stream(chunks: Iterable[bytes]) -> Tuple[Optional[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+    """
+    Starts parsing a [meta, records] body.
+
+    Returns:
+        (meta, records). meta is the first element of the envelope, read eagerly
+        (it is also where API errors such as {"message": [...]} appear); records is
+        a generator yielding each element of the second array as it completes.
+        Bodies without a record array ([meta] or [meta, null]) yield nothing.
+
+    Raises:
+        StreamingJSONError, immediately for a malformed start, or from the records
+        generator if the body breaks off or is malformed later on.
+    """
+    reader = _Reader(chunks)
+    reader.expect("[")
+    meta = reader.value()
+    separator = reader.expect(",]")
+
+    def records() -> Iterator[Dict[str, Any]]:
+        if separator == "]": return
+        if reader.peek() != "[":
+            reader.value() # null (no data)
+            reader.expect("]")
+            return
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.pos += 1
+        else:
+            while True:
+                yield reader.value()
+                if reader.expect(",]") == "]": break
+        reader.expect("]")
+
+    return meta if isinstance(meta, dict) else None, records()
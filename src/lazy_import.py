@@ -0,0 +1,37 @@
+# lazy_import.py
+# Deferred imports of heavy dependencies (requests, numpy, ...), NO GUI code.
+# Used by logic.py so that a plain (cached) lookup does not pay for modules it
+# never touches: the module is imported on the first attribute access, and the
+# import time shows up as its own phase in the --startup-timing report.
+
+import threading
+import importlib
+from types import ModuleType
+from typing import Optional
+from instrumentation import startup_phase
+
+
+class LazyModule:
+    """Stands in for a module until an attribute is first used (thread-safe)."""
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with startup_phase(f"import {self._name}"):
+                        self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<LazyModule '{self._name}' ({'loaded' if self._module is not None else 'not loaded'})>"
@@ -2,192 +2,1033 @@
 # Contains core data fetching and processing logic, NO GUI code.
 # Includes CLI entry point and C library integration (using msl-loadlib Client64).
 
-import requests
+from __future__ import annotations
+
+import time
+_IMPORT_START = time.perf_counter() # Start of the 'import logic' phase (--startup-timing)
+
 import sys
 import argparse
-import ctypes # Still needed for type definitions if not using __getattr__
 import os
-from typing import Optional, List, Dict, Any
+import json
+import threading
+import queue
+import atexit
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Callable, Sequence, TYPE_CHECKING
+from instrumentation import get_logger, configure_logging, span, increment, dump_json, dump_prometheus, startup_phase, record_startup_phase, startup_report
+from lazy_import import LazyModule
+from resilience import RetryPolicy, LatencyTracker, CircuitBreaker, CircuitOpenError, hedged_call
+from response_cache import ResponseCache, DEFAULT_TTL
+from series_store import SeriesStore, ALL_COUNTRIES
+from records import record_country_key
+from json_stream import parse_envelope_stream, StreamingJSONError
+from server_pool import Server32Pool, PoolUnavailableError
+# dataset.py / snapshot.py (numpy) are imported inside the functions that use them
+if TYPE_CHECKING: # Names for the annotations only (strings, see __future__): the real imports stay lazy
+    from gini_client import GiniAdderClient
+    from dataset import IndicatorDataset
+
+# Heavy dependencies, imported on first use: a cached lookup never needs them
+requests = LazyModule("requests")
+np = LazyModule("numpy")
+# Light, but only needed off the cached-lookup path (native backend, parallel fetches)
+ctypes = LazyModule("ctypes")
+platform = LazyModule("platform")
+futures = LazyModule("concurrent.futures")
 
-# --- Import Client64 ---
-try:
-    from msl.loadlib import Client64
-    # Import Server32Error to catch specific errors from the server
-    from msl.loadlib.exceptions import Server32Error
-except ImportError:
-    print("ERROR: 'msl-loadlib' is not installed. Please run setup script or 'pip install msl-loadlib'", file=sys.stderr)
-    sys.exit(1)
+log = get_logger("Logic")
+record_startup_phase("import logic", _IMPORT_START, time.perf_counter() - _IMPORT_START) # End of the import and setup block
 
 # --- Constants ---
-BASE_URL = "https://api.worldbank.org/v2/en/country"
+BASE_URL = os.environ.get("GINI_API_BASE_URL", "https://api.worldbank.org/v2/en/country") # Override to use bench/stub_server.py
 INDICATOR = "SI.POV.GINI"
-DATE_RANGE = "2011:2020"
+DATE_RANGE = os.environ.get("GINI_DATE_RANGE", "2011:2020") # START:END years
 PER_PAGE = "100"
+BULK_PER_PAGE = "20000" # Large enough to get every economy x year of DATE_RANGE in one page
+
+# --- Pooled HTTP Session ---
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("GINI_MAX_CONCURRENCY", 8)) # Requests in flight for multi-country fetches
+
+# Global session (lazy loaded): keep-alive connections are reused across lookups
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def configure_http(max_workers: Optional[int] = None):
+    """Changes the concurrency limit; the connection pool is resized on next use."""
+    global MAX_CONCURRENT_REQUESTS, _http_session
+    if max_workers is None or max_workers == MAX_CONCURRENT_REQUESTS: return
+    if max_workers < 1: raise ValueError("max_workers must be >= 1")
+    with _http_session_lock:
+        MAX_CONCURRENT_REQUESTS = max_workers
+        if _http_session is not None: _http_session.close(); _http_session = None
+
+def _get_http_session() -> requests.Session:
+    """Gets or creates the shared requests.Session, with a pool sized to the concurrency limit."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            # pool_block=True: never open more than pool_maxsize sockets per host, wait instead
+            adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=MAX_CONCURRENT_REQUESTS, pool_block=True)
+            session.mount("https://", adapter); session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+# --- Resilient Requests (see resilience.py) ---
+# Every World Bank GET goes through _http_get: separate connect/read deadlines,
+# jittered retries on connection errors, timeouts and 429/5xx, an optional hedged
+# second request once the first is slower than the recent p95, and a circuit
+# breaker that fails fast (callers then serve cached data) while the API is down.
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("GINI_HTTP_CONNECT_TIMEOUT", 3.05)) # Seconds to establish the TCP/TLS connection
+HTTP_READ_TIMEOUT = float(os.environ.get("GINI_HTTP_READ_TIMEOUT", 15))        # Seconds of silence allowed while waiting for data
+HTTP_RETRIES = int(os.environ.get("GINI_HTTP_RETRIES", 2))                     # Extra attempts after the first one
+HTTP_HEDGE = os.environ.get("GINI_HTTP_HEDGE", "0") == "1"                     # Hedged second request after the p95 delay
+HEDGE_MIN_DELAY = 0.05      # Never hedge sooner than this (seconds)
+HEDGE_DEFAULT_DELAY = 0.5   # Hedge delay until enough latencies were observed
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BREAKER_FAILURES = int(os.environ.get("GINI_BREAKER_FAILURES", 5))   # Consecutive failures that open the circuit
+BREAKER_RESET = float(os.environ.get("GINI_BREAKER_RESET", 30))      # Seconds before a probe request is let through
 
-# --- C Library Integration using Client64 ---
+_retry_policy = RetryPolicy(retries=HTTP_RETRIES)
+_http_latency = LatencyTracker()
+_breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET, name="World Bank API")
+_hedge_executor = None
 
-# Name of the Python module file containing the Server32 class
-SERVER_MODULE = 'server_32' # No .py extension needed
+def configure_resilience(retries: Optional[int] = None, hedge: Optional[bool] = None, connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None):
+    """Changes the retry count, hedging and deadlines of later requests."""
+    global HTTP_HEDGE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+    if retries is not None:
+        if retries < 0: raise ValueError("retries must be >= 0")
+        _retry_policy.retries = retries
+    if hedge is not None: HTTP_HEDGE = hedge
+    if connect_timeout is not None: HTTP_CONNECT_TIMEOUT = connect_timeout
+    if read_timeout is not None: HTTP_READ_TIMEOUT = read_timeout
 
-# Global client instance (lazy loaded)
-_gini_client = None
+def _get_hedge_executor() -> futures.ThreadPoolExecutor:
+    global _hedge_executor
+    with _http_session_lock:
+        if _hedge_executor is None: _hedge_executor = futures.ThreadPoolExecutor(max_workers=2 * MAX_CONCURRENT_REQUESTS, thread_name_prefix="gini-hedge")
+        return _hedge_executor
 
-class GiniAdderClient(Client64):
+def _hedge_delay() -> float:
+    p95 = _http_latency.quantile(0.95)
+    return min(max(p95 if p95 is not None else HEDGE_DEFAULT_DELAY, HEDGE_MIN_DELAY), HTTP_READ_TIMEOUT)
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    try: return float(response.headers.get("Retry-After", ""))
+    except ValueError: return None
+
+def _http_get(url: str, params: Dict[str, str], headers: Optional[Dict[str, str]] = None, stream: bool = False) -> requests.Response:
     """
-    Client to communicate with the GiniAdderServer running in a 32-bit process.
+    One logical GET through the resilience layer. Returns the final response
+    (a 429/5xx only once the retries are used up; the caller checks the status).
+
+    Raises:
+        CircuitOpenError while the API is considered down, or the requests
+        exception of the last attempt.
     """
-    def __init__(self):
-        print(f"[Client64] Initializing GiniAdderClient...", file=sys.stderr)
+    session = _get_http_session()
+    timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    def attempt() -> requests.Response:
+        start = time.perf_counter()
+        response = session.get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+        if not stream: _http_latency.observe(time.perf_counter() - start) # Streamed bodies are still being read
+        return response
+
+    # The breaker sees one outcome per logical request: a failure is recorded
+    # only once the last attempt failed, so retries do not count several times,
+    # and only for network errors and 5xx answers (a 429 or a bug in our code
+    # says nothing about the API being down)
+    _breaker.before_call()
+    attempt_number = 0
+    while True:
+        last_attempt = attempt_number >= _retry_policy.retries
+        try:
+            if HTTP_HEDGE and not stream: response = hedged_call(attempt, _hedge_delay(), _get_hedge_executor(), discard=lambda r: r.close())
+            else: response = attempt()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if last_attempt: _breaker.record_failure(); raise
+            reason, delay = type(e).__name__, _retry_policy.delay(attempt_number)
+        except requests.exceptions.RequestException:
+            _breaker.record_failure()
+            raise
+        except Exception:
+            _breaker.release()
+            raise
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                _breaker.record_success()
+                return response
+            if last_attempt:
+                if response.status_code >= 500: _breaker.record_failure()
+                else: _breaker.release()
+                return response
+            reason, delay = f"HTTP {response.status_code}", _retry_policy.delay(attempt_number, _retry_after(response))
+            response.close()
+        attempt_number += 1
+        increment("http_retry")
+        log.warning(f"Request to {url} failed ({reason}); retry {attempt_number}/{_retry_policy.retries} in {delay:.2f}s.")
+        time.sleep(delay)
+
+
+# --- Response Cache (see response_cache.py) ---
+CACHE_ENABLED = os.environ.get("GINI_CACHE", "1") != "0"
+OFFLINE = os.environ.get("GINI_OFFLINE", "0") == "1" # Serve only from the cache, never touch the network
+
+# Global cache instances (lazy loaded)
+_response_cache = None
+_series_store = None # Stored series for incremental refreshes (same directory as the cache)
+_cache_settings: Dict[str, Any] = {}
+FULL_REFRESH = os.environ.get("GINI_FULL_REFRESH", "0") == "1" # Ignore stored series and refetch the whole DATE_RANGE
+
+def configure_cache(enabled: Optional[bool] = None, offline: Optional[bool] = None, ttl: Optional[float] = None, cache_dir: Optional[str] = None):
+    """Changes cache settings; the cache is (re)opened on the next request."""
+    global CACHE_ENABLED, OFFLINE, _response_cache, _series_store
+    if enabled is not None: CACHE_ENABLED = enabled
+    if offline is not None: OFFLINE = offline
+    if ttl is not None: _cache_settings['ttl'] = ttl
+    if cache_dir is not None: _cache_settings['cache_dir'] = cache_dir
+    if _response_cache is not None: _response_cache.close(); _response_cache = None
+    if _series_store is not None: _series_store.close(); _series_store = None
+
+def configure_refresh(full_refresh: Optional[bool] = None):
+    """full_refresh=True refetches the whole DATE_RANGE instead of only the years missing locally."""
+    global FULL_REFRESH
+    if full_refresh is not None: FULL_REFRESH = full_refresh
+
+def _get_response_cache() -> Optional[ResponseCache]:
+    """Gets or creates the ResponseCache instance (None if caching is disabled or unavailable)."""
+    global _response_cache
+    if not CACHE_ENABLED: return None
+    if _response_cache is None:
         try:
-            # Initialize Client64, specifying the 32-bit server module.
-            # msl-loadlib will find SERVER_MODULE.py and run it in a 32-bit Python process.
-            super().__init__(module32=SERVER_MODULE)
-            print(f"[Client64] Successfully initialized Client64 for module '{SERVER_MODULE}'.", file=sys.stderr)
+            _response_cache = ResponseCache(**_cache_settings)
         except Exception as e:
-            # Catch errors during Client64 initialization (e.g., cannot start server process)
-            print(f"[Client64] FATAL ERROR during Client64 init: {type(e).__name__}: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
-            raise # Re-raise to prevent use of uninitialized client
-
-    # --- Option 1: Define explicit methods (Good for clarity, IDE help) ---
-    # def process_gini_pure_c(self, gini_value: float) -> int:
-    #     """
-    #     Sends a request to the 'process_gini_pure_c' method on the Server32.
-    #     """
-    #     print(f"[Client64] Sending request: 'process_gini_pure_c' with value {gini_value}", file=sys.stderr)
-    #     # The first argument to request32 is the METHOD NAME on the Server32 class.
-    #     # Subsequent arguments are passed to that method.
-    #     return self.request32('process_gini_pure_c', gini_value)
-
-    # --- Option 2: Use __getattr__ (Simpler if many functions just pass through) ---
-    def __getattr__(self, name):
-        """
-        Dynamically creates methods that call request32 with the method name.
-        This avoids writing a wrapper method for every function on the server.
-        """
-        # Check if the requested name is likely a method we want to proxy
-        # Avoid proxying special methods like __deepcopy__, __getstate__ etc.
-        if name.startswith('_'):
-             raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
-
-        print(f"[Client64] __getattr__ creating proxy for '{name}'", file=sys.stderr)
-        def send_request(*args, **kwargs):
-            print(f"[Client64] Sending request via proxy: '{name}'", file=sys.stderr)
-            # 'name' will be 'process_gini_pure_c' when called
-            return self.request32(name, *args, **kwargs)
-        return send_request
-    # --- End Option 2 ---
-
-
-def _get_client_instance() -> Optional[GiniAdderClient]:
-    """Gets or creates the singleton GiniAdderClient instance."""
-    global _gini_client
-    if _gini_client is None:
-        print("[Logic] Creating GiniAdderClient instance...", file=sys.stderr)
+            log.warning(f"Response cache unavailable, continuing without it: {type(e).__name__}: {e}")
+            return None
+    return _response_cache
+
+def _get_series_store() -> Optional[SeriesStore]:
+    """Gets or creates the SeriesStore instance (None if caching is disabled or unavailable)."""
+    global _series_store
+    if not CACHE_ENABLED: return None
+    if _series_store is None:
         try:
-            _gini_client = GiniAdderClient()
+            _series_store = SeriesStore(_cache_settings.get('cache_dir'))
         except Exception as e:
-            # Handle client creation failure
-             print(f"[Logic] Failed to create GiniAdderClient: {type(e).__name__}: {e}", file=sys.stderr)
-             _gini_client = None # Ensure it's None if creation fails
-    return _gini_client
+            log.warning(f"Series store unavailable, refreshes will refetch everything: {type(e).__name__}: {e}")
+            return None
+    return _series_store
+
+
+# --- C Library Integration using Client64 (see gini_client.py) ---
+# msl-loadlib and the GiniAdderClient class are imported on first use (only the
+# Server32 backend needs them), so plain lookups start without them.
+
+class _Server32ErrorNotLoaded(Exception):
+    """Placeholder for msl-loadlib's Server32Error until gini_client is imported (nothing can raise it before)."""
+
+Server32Error: type = _Server32ErrorNotLoaded
+_client_class = None
+_client_class_lock = threading.Lock()
+
+def _get_client_class() -> Optional[type]:
+    """Imports gini_client (msl-loadlib) on first use. Returns GiniAdderClient, or None if msl-loadlib is missing."""
+    global _client_class, Server32Error
+    with _client_class_lock:
+        if _client_class is None:
+            try:
+                with startup_phase("import msl.loadlib"):
+                    import gini_client
+            except ImportError as e:
+                log.error(f"'msl-loadlib' is not installed ({e}). Please run setup script or 'pip install msl-loadlib'")
+                _client_class = False
+            else:
+                Server32Error = gini_client.Server32Error
+                _client_class = gini_client.GiniAdderClient
+        return _client_class or None
+
+def __getattr__(name: str) -> Any:
+    # logic.GiniAdderClient keeps working for callers that used the old module-level class
+    if name == "GiniAdderClient":
+        client_class = _get_client_class()
+        if client_class is not None: return client_class
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+# Pool of Server32 processes (lazy loaded, see server_pool.py)
+SERVER32_POOL_SIZE = int(os.environ.get("GINI_SERVER32_POOL_SIZE", 2))
+_server_pool = None
+_server_pool_lock = threading.Lock()
+
+# Batches at least this large go through the shared-memory segment instead of
+# being pickled over the socket (see shm_transport.py)
+SHM_ENABLED = os.environ.get("GINI_SHM", "1") != "0"
+SHM_MIN_BATCH = int(os.environ.get("GINI_SHM_MIN_BATCH", 256))
+
+
+
+def _get_server_pool() -> Server32Pool:
+    """Gets or creates the pool of pre-warmed GiniAdderClient/Server32 processes."""
+    global _server_pool
+    with _server_pool_lock:
+        if _server_pool is None:
+            client_class = _get_client_class()
+            if client_class is None: raise PoolUnavailableError("msl-loadlib is not installed: the 32-bit server cannot be started.")
+            _server_pool = Server32Pool(client_class, size=SERVER32_POOL_SIZE)
+        return _server_pool
+
+
+def _with_server32(request: Callable[[GiniAdderClient], Any]) -> Any:
+    """
+    Runs request(client) on a pooled server. If that server died mid-request
+    (crash in the C/ASM code, lost connection), the pool replaces it and the
+    request is retried once on another server. Server32Error (the server is
+    alive and reported an error) and PoolUnavailableError are not retried.
+    """
+    pool = _get_server_pool()
+    for attempt in (1, 2):
+        try:
+            with pool.client() as client:
+                return request(client)
+        except (Server32Error, PoolUnavailableError):
+            raise
+        except Exception as e:
+            if attempt == 2: raise
+            log.warning(f"Server32 failed during request ({type(e).__name__}: {e}); retrying on another server.")
+
+
+def warm_up_c_backend():
+    """
+    Eager warm-up, meant to be called at startup: loads the native library or
+    starts the Server32 pool in the background, so the first C request does
+    not pay for interpreter startup + library load.
+    """
+    if _select_c_backend() == "server32": _get_server_pool().start()
+
+
+def shutdown_c_backend():
+    """Stops every pooled Server32 process (also done automatically at exit)."""
+    if _server_pool is not None: _server_pool.shutdown()
+
+
+# --- Native In-Process Backend (64-bit ctypes, no Server32) ---
+NATIVE_LIB_NAME = 'libginiadder64.so' # Built by exe_tp.sh from asm_rounder64.asm + gini_adder.c
+C_BACKENDS = ("auto", "native", "server32")
+# auto: in-process native library if it exists for this host, else the 32-bit server
+C_BACKEND = os.environ.get("GINI_C_BACKEND", "auto").lower()
+
+# Global native library handle (lazy loaded); False means "tried and unavailable"
+_native_lib = None
+
+def configure_c_backend(backend: str):
+    """Forces a C backend: 'auto', 'native' (in-process ctypes) or 'server32' (Client64)."""
+    global C_BACKEND
+    if backend not in C_BACKENDS: raise ValueError(f"Unknown C backend '{backend}'. Use one of: {', '.join(C_BACKENDS)}")
+    C_BACKEND = backend
+
+def _load_native_lib() -> Optional[ctypes.CDLL]:
+    """Loads libginiadder64.so into this process (only on x86-64 hosts). Returns None if unavailable."""
+    global _native_lib
+    if _native_lib is None:
+        _native_lib = False
+        library_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), NATIVE_LIB_NAME)
+        if platform.machine().lower() not in ("x86_64", "amd64") or ctypes.sizeof(ctypes.c_void_p) != 8:
+            log.debug(f"Native backend unavailable: host is {platform.machine()}, library is x86-64.")
+        elif not os.path.exists(library_path):
+            log.debug(f"Native backend unavailable: '{library_path}' not found.")
+        else:
+            try:
+                lib = ctypes.CDLL(library_path)
+                lib.process_gini_pure_c.argtypes = [ctypes.c_float]
+                lib.process_gini_pure_c.restype = ctypes.c_int
+                lib.process_gini_batch.argtypes = [ctypes.POINTER(ctypes.c_float), ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+                lib.process_gini_batch.restype = ctypes.c_int
+                _native_lib = lib
+                log.debug(f"Loaded native library '{library_path}' in-process.")
+            except (OSError, AttributeError) as e:
+                log.warning(f"Native backend unavailable: {type(e).__name__}: {e}")
+    return _native_lib or None
+
+def _select_c_backend() -> str:
+    """Resolves C_BACKEND to 'native' or 'server32' ('unavailable' if the chosen backend cannot be used)."""
+    if C_BACKEND != "server32" and _load_native_lib() is not None: return "native"
+    if C_BACKEND == "native": log.error("Native backend was forced but is not available."); return "unavailable"
+    return "server32" if _get_client_class() is not None else "unavailable"
+
+def _native_round_batch(lib: ctypes.CDLL, values: List[float]) -> List[int]:
+    """Calls process_gini_batch directly on ctypes arrays (no IPC)."""
+    n = len(values)
+    in_array = (ctypes.c_float * n)(*values)
+    out_array = (ctypes.c_int * n)()
+    with span("native"): processed = lib.process_gini_batch(in_array, out_array, n)
+    if processed != n: raise RuntimeError(f"C batch function processed {processed} of {n} values")
+    return list(out_array)
 
 
 # --- C Function Call (process_data_with_c) ---
 # This function now uses the client instance to make the request
 def process_data_with_c(gini_value: float) -> Optional[int]:
     """
-    Uses the GiniAdderClient (Client64) to request the C processing
-    from the 32-bit server.
+    Runs the C/ASM processing of one value on the selected backend: the native
+    in-process library when available (see C_BACKEND), otherwise the
+    GiniAdderClient (Client64) request to the 32-bit server.
 
     Args:
         gini_value: The float GINI value to process.
 
     Returns:
-        The integer result from the C function via the server, or None if an error occurs.
+        The integer result from the C function, or None if an error occurs.
     """
-    client = _get_client_instance()
-    if client is None:
-        print("[Logic] Cannot process with C: Client instance is not available.", file=sys.stderr)
-        return None
+    backend = _select_c_backend()
+    if backend == "unavailable": return None
+    if backend == "native":
+        try:
+            # Tracing printf calls are compiled out unless built with GINI_TRACE=1 (see exe_tp.sh)
+            with span("native"): return _load_native_lib().process_gini_pure_c(float(gini_value))
+        except Exception as e:
+            log.error(f"Error during native C call: {type(e).__name__}: {e}")
+            return None
 
     try:
-        # Call the method on the client instance.
-        # If using explicit methods (Option 1):
-        # result = client.process_gini_pure_c(gini_value)
+        # On a pooled client; GiniAdderClient.__getattr__ turns the call into request32('process_gini_pure_c', ...)
+        result = _with_server32(lambda client: client.process_gini_pure_c(gini_value))
 
-        # If using __getattr__ (Option 2):
-        # This looks like a direct method call, but __getattr__ intercepts it
-        # and calls client.request32('process_gini_pure_c', gini_value)
-        result = client.process_gini_pure_c(gini_value)
-
-        print(f"[Logic] Received result from 32-bit server: {result}", file=sys.stderr)
+        log.debug(f"Received result from 32-bit server: {result}")
         return result
     except Server32Error as e:
         # Catch errors specifically raised by the 32-bit server process
-        print(f"[Logic] Error received from 32-bit server: {e}", file=sys.stderr)
+        log.error(f"Error received from 32-bit server: {e}")
+        return None
+    except PoolUnavailableError as e:
+        log.error(f"Cannot process with C: {e}")
         return None
     except Exception as e:
         # Catch other potential errors during the request (e.g., connection issues)
-        print(f"[Logic] Error during request to 32-bit server: {type(e).__name__}: {e}", file=sys.stderr)
+        log.error(f"Error during request to 32-bit server: {type(e).__name__}: {e}")
         return None
 
 
-# --- Data Fetching (get_gini_data - NO CHANGES NEEDED) ---
-def get_gini_data(country_code: str) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
-    # ... (Keep the existing robust get_gini_data function) ...
-    url = f"{BASE_URL}/{country_code}/indicator/{INDICATOR}"
-    params = {
-        "format": "json",
-        "date": DATE_RANGE,
-        "per_page": PER_PAGE
-    }
-    print(f"[Logic] Requesting URL: {url} with params: {params}", file=sys.stderr)
+def process_data_with_c_batch(gini_values: List[float]) -> Optional[List[int]]:
+    """
+    Rounds a whole list of GINI values with ONE call into the C/ASM batch
+    function: in-process on the native backend, or ONE request to the 32-bit server.
+
+    Args:
+        gini_values: The float values to process.
+
+    Returns:
+        The list of integer results (same order as the input), or None if an error occurs.
+    """
+    values = [float(v) for v in gini_values]
+    if not values: return []
+    backend = _select_c_backend()
+    if backend == "unavailable": return None
+    if backend == "native":
+        try:
+            return _native_round_batch(_load_native_lib(), values)
+        except Exception as e:
+            log.error(f"Error during native C batch call: {type(e).__name__}: {e}")
+            return None
+
+    use_shm = SHM_ENABLED and len(values) >= SHM_MIN_BATCH
+    def request(client: GiniAdderClient) -> List[int]:
+        if use_shm:
+            try:
+                return _process_batch_via_shm(client, values)
+            except Server32Error as e:
+                log.warning(f"Shared-memory batch failed ({e}), falling back to the socket path.")
+        return client.process_gini_batch(values)
+
+    try:
+        results = _with_server32(request)
+        log.debug(f"Received {len(results)} results from 32-bit server (batch).")
+        return results
+    except Server32Error as e:
+        log.error(f"Error received from 32-bit server: {e}")
+        return None
+    except PoolUnavailableError as e:
+        log.error(f"Cannot process with C: {e}")
+        return None
+    except Exception as e:
+        log.error(f"Error during batch request to 32-bit server: {type(e).__name__}: {e}")
+        return None
+
+
+def _process_batch_via_shm(client: GiniAdderClient, values: List[float]) -> List[int]:
+    """
+    Zero-pickle batch: the inputs are written into the client's shared segment,
+    only (path, n, offsets, size) go over the socket, and the C library in the
+    32-bit process writes its results into the same segment. Errors propagate.
+    """
+    n = len(values)
+    buffer = client.get_shared_buffer()
+    with buffer.lock:
+        resized = buffer.ensure_capacity(n)
+        buffer.write_inputs(values)
+        processed = client.process_gini_batch_shm(buffer.path, n, buffer.input_offset, buffer.output_offset, buffer.size)
+        if processed != n: raise RuntimeError(f"server processed {processed} of {n} values")
+        results = buffer.read_outputs(n)
+    if resized: log.debug(f"Shared segment grown to {buffer.capacity} elements.")
+    return results
+
+
+# --- Data Fetching (get_gini_data / get_all_gini_data) ---
+def _parse_indicator_payload(data: Any, country_code: str) -> tuple[Optional[List[Dict[str, Any]]], Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Parses a decoded World Bank [meta, records] envelope.
+
+    Returns:
+        (records, meta, error_message). On success records is a (possibly empty) list
+        and meta is the paging dict from data[0] (or None if absent).
+    """
+    error_message = None
+    if not isinstance(data, list) or len(data) < 1:
+        error_detail = "Unexpected API response format (not a list or empty)."
+        log.error(error_detail)
+        error_message = "Received unexpected data format from the server."
+        return None, None, error_message
+    if isinstance(data[0], dict) and "message" in data[0]:
+        error_messages = [msg.get("value", "Unknown error") for msg in data[0]["message"]]
+        error_text = "\n".join(error_messages)
+        log.error(f"Error from World Bank API: {error_text}")
+        if any("No data available" in msg for msg in error_messages) or any("No matches" in msg for msg in error_messages): return [], None, None
+        else: error_message = f"World Bank API Error:\n{error_text}"; return None, None, error_message
+    meta = data[0] if isinstance(data[0], dict) else None
+    if len(data) == 2:
+        if data[1] is None: return [], meta, None
+        if not isinstance(data[1], list):
+             error_detail = f"Unexpected data format (data[1] is not list). Got: {type(data[1])}"; log.error(error_detail); error_message = "Received unexpected data structure from the server."; return None, None, error_message
+        return data[1], meta, None
+    elif len(data) == 1 and isinstance(data[0], dict) and "total" in data[0] and data[0]["total"] == 0: return [], meta, None
+    else: log.warning(f"Received unexpected response structure (length {len(data)}). Assuming no data."); return [], meta, None
+
+
+def _parse_cached_body(body: str, country_code: str) -> tuple[Optional[List[Dict[str, Any]]], Optional[Dict[str, Any]], Optional[str]]:
+    """Decodes a response body stored in the cache and parses it like a live response."""
+    try:
+        with span("json_decode"): data = json.loads(body)
+        return _parse_indicator_payload(data, country_code)
+    except ValueError:
+        log.warning(f"Cached body for '{country_code}' is not valid JSON.")
+        return None, None, "Could not decode the cached response (invalid JSON)."
+
+
+def _fetch_indicator_page(url: str, params: Dict[str, str], country_code: str) -> tuple[Optional[List[Dict[str, Any]]], Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Performs a single World Bank API request (through the response cache) and
+    parses the [meta, records] envelope.
+
+    Fresh cache entries are served without touching the network; stale ones are
+    revalidated with If-None-Match/If-Modified-Since, and are still served if the
+    API turns out to be unreachable. In OFFLINE mode only the cache is used.
+
+    Returns:
+        (records, meta, error_message). On success records is a (possibly empty) list
+        and meta is the paging dict from data[0] (or None if absent).
+    """
+    cache = _get_response_cache()
+    cache_key = ResponseCache.make_key(url, params)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cache is not None: increment("cache_hit" if cached is not None else "cache_miss")
+    if cached is not None and (OFFLINE or cache.is_fresh(cached)):
+        log.debug(f"Serving cached response for: {cache_key}")
+        return _parse_cached_body(cached.body, country_code)
+    if OFFLINE:
+        log.info(f"Offline mode: no cached response for: {cache_key}")
+        return None, None, f"Offline mode: no cached data available for '{country_code}'."
+
+    def serve_stale_or(error_message: str):
+        if cached is None: return None, None, error_message
+        log.warning(f"API unreachable, serving stale cached response for: {cache_key}")
+        return _parse_cached_body(cached.body, country_code)
+
+    log.debug(f"Requesting URL: {url} with params: {params}")
     error_message = None
     try:
-        response = requests.get(url, params=params, timeout=15)
-        print(f"[Logic] Response Status Code: {response.status_code}", file=sys.stderr)
+        headers = {}
+        if cached is not None:
+            if cached.etag: headers['If-None-Match'] = cached.etag
+            if cached.last_modified: headers['If-Modified-Since'] = cached.last_modified
+        with span("http"): response = _http_get(url, params, headers)
+        log.debug(f"Response Status Code: {response.status_code}")
+        if response.status_code == 304 and cached is not None:
+            increment("cache_revalidated")
+            cache.touch(cache_key)
+            return _parse_cached_body(cached.body, country_code)
+        # Retries used up on a 429/5xx: usually a text/HTML body (proxy error page),
+        # so check the status before the content type to reach serve_stale_or below
+        if response.status_code in RETRY_STATUSES: response.raise_for_status()
         content_type = response.headers.get('Content-Type', '')
         if 'application/json' not in content_type:
              error_detail = f"API did not return JSON. Content-Type: {content_type}. Response: {response.text[:200]}..."
-             print(f"Error: {error_detail}", file=sys.stderr)
+             log.error(error_detail)
              if response.text and 'Invalid format' in response.text: error_message = "World Bank API Error: Invalid format requested or resource not found."
              elif response.text and 'Invalid value' in response.text: error_message = f"World Bank API Error: Invalid country code '{country_code}'?"
              else: error_message = "Received non-JSON response from the server."
-             return None, error_message
+             return None, None, error_message
         response.raise_for_status()
-        data = response.json()
-        if not isinstance(data, list) or len(data) < 1:
-            error_detail = "Unexpected API response format (not a list or empty)."
-            print(f"Error: {error_detail}", file=sys.stderr)
-            error_message = "Received unexpected data format from the server."
-            return None, error_message
-        if isinstance(data[0], dict) and "message" in data[0]:
-            error_messages = [msg.get("value", "Unknown error") for msg in data[0]["message"]]
-            error_text = "\n".join(error_messages)
-            print(f"Error from World Bank API: {error_text}", file=sys.stderr)
-            if any("No data available" in msg for msg in error_messages) or any("No matches" in msg for msg in error_messages): return [], None
-            else: error_message = f"World Bank API Error:\n{error_text}"; return None, error_message
-        if len(data) == 2:
-            if data[1] is None: return [], None
-            if not isinstance(data[1], list):
-                 error_detail = f"Unexpected data format (data[1] is not list). Got: {type(data[1])}"; print(f"Error: {error_detail}", file=sys.stderr); error_message = "Received unexpected data structure from the server."; return None, error_message
-            return data[1], None
-        elif len(data) == 1 and isinstance(data[0], dict) and "total" in data[0] and data[0]["total"] == 0: return [], None
-        else: print(f"Warning: Received unexpected response structure (length {len(data)}). Assuming no data.", file=sys.stderr); return [], None
-    except requests.exceptions.HTTPError as e: error_detail = f"HTTP Error: {e.response.status_code} {e.response.reason} for URL {e.request.url}"; print(f"Error: {error_detail}", file=sys.stderr); error_message = f"HTTP Error: {e.response.status_code}\n{e.response.reason}"; return None, error_message
-    except requests.exceptions.ConnectionError as e: error_detail = f"Connection Error: {e}"; print(f"Error: {error_detail}", file=sys.stderr); error_message = "Could not connect to the World Bank API.\nCheck internet connection."; return None, error_message
-    except requests.exceptions.Timeout: error_detail = "Timeout Error"; print(f"Error: {error_detail}", file=sys.stderr); error_message = "The request to the World Bank API timed out."; return None, error_message
-    except requests.exceptions.RequestException as e: error_detail = f"Request Exception: {e}"; print(f"Error: {error_detail}", file=sys.stderr); error_message = f"An error occurred during the request:\n{e}"; return None, error_message
+        with span("json_decode"): data = response.json()
+        records, meta, error_message = _parse_indicator_payload(data, country_code)
+        if cache is not None and records is not None:
+            cache.put(cache_key, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return records, meta, error_message
+    except CircuitOpenError as e: log.warning(str(e)); return serve_stale_or(f"The World Bank API is unavailable (too many recent failures).\n{e}")
+    except requests.exceptions.HTTPError as e: error_detail = f"HTTP Error: {e.response.status_code} {e.response.reason} for URL {e.request.url}"; log.error(error_detail); error_message = f"HTTP Error: {e.response.status_code}\n{e.response.reason}"; return serve_stale_or(error_message) if e.response.status_code in RETRY_STATUSES else (None, None, error_message)
+    except requests.exceptions.ConnectionError as e: error_detail = f"Connection Error: {e}"; log.error(error_detail); error_message = "Could not connect to the World Bank API.\nCheck internet connection."; return serve_stale_or(error_message)
+    except requests.exceptions.Timeout: error_detail = "Timeout Error"; log.error(error_detail); error_message = "The request to the World Bank API timed out."; return serve_stale_or(error_message)
     except requests.exceptions.JSONDecodeError:
-        error_detail = "JSON Decode Error"; print(f"Error: {error_detail}", file=sys.stderr)
-        try: raw_text = response.text; print(f"Raw response text: {raw_text[:500]}...", file=sys.stderr)
+        error_detail = "JSON Decode Error"; log.error(error_detail)
+        try: raw_text = response.text; log.debug(f"Raw response text: {raw_text[:500]}...")
         except: pass
-        error_message = "Could not decode the server's response (invalid JSON)."; return None, error_message
+        error_message = "Could not decode the server's response (invalid JSON)."; return None, None, error_message
+    except requests.exceptions.RequestException as e: error_detail = f"Request Exception: {e}"; log.error(error_detail); error_message = f"An error occurred during the request:\n{e}"; return None, None, error_message
     except Exception as e:
-        error_detail = f"Unexpected error in get_gini_data: {type(e).__name__}: {e}"; print(f"Error: {error_detail}", file=sys.stderr)
-        import traceback; traceback.print_exc(file=sys.stderr); error_message = f"An unexpected error occurred:\n{type(e).__name__}"; return None, error_message
+        error_detail = f"Unexpected error in get_gini_data: {type(e).__name__}: {e}"; log.exception(error_detail)
+        error_message = f"An unexpected error occurred:\n{type(e).__name__}"; return None, None, error_message
+
+
+# --- Indicators ---
+# Several indicators of one query come back in ONE response when their codes are
+# joined with ';' (the API then requires the 'source' parameter), so requests
+# scale with the number of countries, not countries x indicators.
+INDICATOR_SOURCE = "2" # World Development Indicators
+RELATED_INDICATORS = ("SI.POV.GINI", "SI.DST.10TH.10", "SI.DST.FRST.10", "SI.POV.DDAY") # GINI, income share of top / bottom 10%, poverty headcount
+
+def _indicator_url(scope: str, indicators: Sequence[str]) -> str:
+    return f"{BASE_URL}/{scope}/indicator/{';'.join(indicators)}"
+
+def _indicator_params(indicators: Sequence[str], **params: str) -> Dict[str, str]:
+    query = {"format": "json", **params}
+    if len(indicators) > 1: query["source"] = INDICATOR_SOURCE
+    return query
+
+def _group_by_indicator(records: Iterable[Dict[str, Any]], indicators: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Splits the records of a multi-indicator response by indicator code (every requested code gets a list)."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {indicator: [] for indicator in indicators}
+    for record in records:
+        if not isinstance(record, dict): continue
+        indicator = (record.get('indicator') or {}).get('id') or indicators[0]
+        if indicator in grouped: grouped[indicator].append(record)
+    return grouped
+
+
+def _fetch_country_range(country_code: str, date: str, indicators: Sequence[str] = (INDICATOR,)) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """One country, one date range ('START:END'), every indicator in one query, straight from the API (through the response cache)."""
+    params = _indicator_params(indicators, date=date, per_page=PER_PAGE)
+    return _fetch_pages(_indicator_url(country_code, indicators), params, country_code)
+
+
+# --- Incremental Refresh ---
+# The series store remembers every row already fetched. A refresh asks the API
+# only for the part of DATE_RANGE newer than the newest stored value of each
+# country, and within the cache TTL no request is made at all.
+REFRESH_CODES_PER_REQUEST = 60 # Countries per multi-country ('ARG;BRA;...') refresh request
+
+def _date_bounds() -> tuple[int, int]:
+    start, _, end = DATE_RANGE.partition(":")
+    return int(start), int(end or start)
+
+def _missing_range(newest_year: Optional[int]) -> Optional[str]:
+    """Part of DATE_RANGE after 'newest_year' (the newest stored value) as 'START:END', or None if nothing is missing."""
+    start, end = _date_bounds()
+    if newest_year is not None and not FULL_REFRESH: start = max(start, newest_year + 1)
+    return f"{start}:{end}" if start <= end else None
+
+def _oldest_newest_year(years: Iterable[Optional[int]]) -> Optional[int]:
+    """
+    The refresh of several series starts after the one that is furthest behind.
+    Series without any value are ignored (new values would fall in that range
+    anyway); None if no series has a value yet.
+    """
+    known = [year for year in years if year is not None]
+    return min(known) if known else None
+
+def _store_is_fresh(store: SeriesStore, country: str, indicator: str = INDICATOR) -> bool:
+    """True if 'country' (or ALL_COUNTRIES) was refreshed within the cache TTL (always, once stored, in OFFLINE mode)."""
+    checked_at = store.checked_at(indicator, country)
+    if checked_at is None or FULL_REFRESH: return False
+    return OFFLINE or (time.time() - checked_at) < _cache_settings.get('ttl', DEFAULT_TTL)
+
+
+def get_indicator_data(country_code: str, indicators: Optional[Sequence[str]] = None) -> tuple[Optional[Dict[str, List[Dict[str, Any]]]], Optional[str]]:
+    """
+    Fetches several indicators (default: [INDICATOR]) of one country for DATE_RANGE
+    with a single multi-indicator query.
+
+    With the cache enabled the series are kept in the local SeriesStore and only
+    the years after the newest stored value are requested (nothing at all while
+    the last refresh is younger than the cache TTL). If a refresh fails, the
+    stored series are served.
+
+    Returns:
+        (records_by_indicator, error_message). Every requested indicator has a
+        (possibly empty) list of raw records.
+    """
+    indicators = list(dict.fromkeys(indicators or [INDICATOR]))
+    store = _get_series_store()
+    never_checked = store is None or any(store.checked_at(indicator, country_code) is None for indicator in indicators)
+    if store is None or (OFFLINE and never_checked): # No store, or offline without stored data: response cache only
+        records, error_message = _fetch_country_range(country_code, DATE_RANGE, indicators)
+        if error_message: return None, error_message
+        return _group_by_indicator(records, indicators), None
+    if not all(_store_is_fresh(store, country_code, indicator) for indicator in indicators):
+        # An indicator never fetched for this country has no newest year yet: ask for the whole range
+        date = DATE_RANGE if never_checked else _missing_range(_oldest_newest_year(store.newest_year(indicator, country_code) for indicator in indicators))
+        if date is None:
+            log.debug(f"{country_code}: stored series already cover {DATE_RANGE}, nothing to fetch.")
+            for indicator in indicators: store.merge(indicator, [], checked=[country_code])
+        else:
+            log.debug(f"{country_code}: refreshing {date} for {len(indicators)} indicator(s).")
+            records, error_message = _fetch_country_range(country_code, date, indicators)
+            if error_message:
+                if never_checked: return None, error_message
+                log.warning(f"Refresh of {country_code} failed, serving the stored series: {error_message}")
+            else:
+                grouped = _group_by_indicator(records or [], indicators)
+                increment("refresh_rows", sum(store.merge(indicator, grouped[indicator], checked=[country_code]) for indicator in indicators))
+    start, end = _date_bounds()
+    return {indicator: store.records(indicator, [country_code], start, end) for indicator in indicators}, None
+
+
+def get_gini_data(country_code: str) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """
+    Fetches the GINI records of a single country for DATE_RANGE (see get_indicator_data).
+
+    Returns:
+        (records, error_message). records is [] when the API has no data points.
+    """
+    records_by_indicator, error_message = get_indicator_data(country_code, [INDICATOR])
+    if error_message: return None, error_message
+    return records_by_indicator[INDICATOR], None
+
+
+def get_latest_gini(country_code: str) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Most recent non-empty value of one country, whatever its year ('mrnev=1'
+    query: a single row over the wire). Served from the SeriesStore while the
+    country is fresh; the fetched row is merged into it.
+
+    Returns:
+        (latest_record or None if the country has no values, error_message).
+    """
+    store = _get_series_store()
+    if store is not None and _store_is_fresh(store, country_code):
+        return find_latest_valid_gini(store.records(INDICATOR, [country_code])), None
+    url = f"{BASE_URL}/{country_code}/indicator/{INDICATOR}"
+    params = {
+        "format": "json",
+        "mrnev": "1",
+        "per_page": PER_PAGE
+    }
+    records, _meta, error_message = _fetch_indicator_page(url, params, country_code)
+    if error_message:
+        if store is None or store.checked_at(INDICATOR, country_code) is None: return None, error_message
+        log.warning(f"Latest-value query for {country_code} failed, serving the stored series: {error_message}")
+        return find_latest_valid_gini(store.records(INDICATOR, [country_code])), None
+    if store is not None: store.merge(INDICATOR, records or []) # Not marked as checked: older years were not asked for
+    return find_latest_valid_gini(records or []), None
+
+
+def _latest_as_records(country_code: str) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """get_latest_gini in the (records, error_message) shape of get_gini_data."""
+    record, error_message = get_latest_gini(country_code)
+    if error_message: return None, error_message
+    return ([record] if record else []), None
+
+
+def get_gini_data_many(country_codes: Iterable[str], max_workers: Optional[int] = None, fetch: Optional[Callable[[str], tuple]] = None) -> Iterator[tuple[str, Optional[List[Dict[str, Any]]], Optional[str]]]:
+    """
+    Fetches several countries concurrently over the pooled session, with 'fetch'
+    (default get_gini_data) for each one.
+
+    At most max_workers (default MAX_CONCURRENT_REQUESTS) requests are in flight at
+    once. Results are yielded as they complete, not in input order.
+
+    Yields:
+        (country_code, records, error_message) for each distinct code.
+    """
+    codes = list(dict.fromkeys(country_codes)) # Drop duplicates, keep order
+    if not codes: return
+    workers = min(max_workers or MAX_CONCURRENT_REQUESTS, len(codes))
+    with futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gini-fetch") as executor:
+        pending = {executor.submit(fetch or get_gini_data, code): code for code in codes}
+        for future in futures.as_completed(pending):
+            code = pending[future]
+            try:
+                records, error_message = future.result()
+            except Exception as e:
+                records, error_message = None, f"An unexpected error occurred:\n{type(e).__name__}"
+            yield code, records, error_message
+
+
+_record_country_key = record_country_key # Shared with dataset.py
+
+
+def _fetch_pages(url: str, params: Dict[str, str], label: str) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """Fetches every page of a query (following the 'page'/'pages' meta of the API) and concatenates the records."""
+    all_records: List[Dict[str, Any]] = []
+    page = 1
+    while True:
+        records, meta, error_message = _fetch_indicator_page(url, dict(params, page=str(page)), label)
+        if error_message: return None, error_message
+        all_records.extend(records or [])
+        try: total_pages = int((meta or {}).get('pages', 1))
+        except (ValueError, TypeError): total_pages = 1
+        if page >= total_pages: break
+        page += 1
+    log.info(f"Fetched {len(all_records)} records for '{label}' in {page} request(s).")
+    return all_records, None
+
+
+def _fetch_bulk(date: str, indicators: Sequence[str] = (INDICATOR,)) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """
+    Bulk mode: every economy at once from the 'country/all' endpoint (all
+    indicators in the same query).
+
+    Instead of one request per country (~260), this takes ceil(total / BULK_PER_PAGE)
+    requests, usually just one.
+    """
+    params = _indicator_params(indicators, date=date, per_page=BULK_PER_PAGE)
+    return _fetch_pages(_indicator_url("all", indicators), params, "all")
+
+
+def _refresh_all_series(store: SeriesStore, indicators: Sequence[str]) -> Optional[str]:
+    """
+    Brings the stored bulk dataset up to date. The first time (or with FULL_REFRESH)
+    the whole DATE_RANGE is fetched; afterwards countries are grouped by their
+    missing range and each group is asked for only those years, with
+    multi-country, multi-indicator requests. Returns an error message or None.
+    """
+    if any(store.checked_at(indicator, ALL_COUNTRIES) is None for indicator in indicators) or FULL_REFRESH:
+        records, error_message = _fetch_bulk(DATE_RANGE, indicators)
+        if error_message: return error_message
+        countries = {code for code in map(_record_country_key, records) if code}
+        grouped = _group_by_indicator(records, indicators)
+        increment("refresh_rows", sum(store.merge(indicator, grouped[indicator], checked=[ALL_COUNTRIES, *countries]) for indicator in indicators))
+        return None
+    newest_by_indicator = [store.newest_years(indicator) for indicator in indicators]
+    countries = sorted(set().union(*newest_by_indicator))
+    groups: Dict[str, List[str]] = {}
+    for country in countries:
+        date = _missing_range(_oldest_newest_year(newest.get(country) for newest in newest_by_indicator))
+        if date: groups.setdefault(date, []).append(country)
+    fetched = 0
+    for date, chunk_countries in sorted(groups.items()):
+        for i in range(0, len(chunk_countries), REFRESH_CODES_PER_REQUEST):
+            chunk = chunk_countries[i:i + REFRESH_CODES_PER_REQUEST]
+            params = _indicator_params(indicators, date=date, per_page=BULK_PER_PAGE)
+            records, error_message = _fetch_pages(_indicator_url(";".join(chunk), indicators), params, f"refresh {date}")
+            if error_message: return error_message
+            grouped = _group_by_indicator(records, indicators)
+            fetched += sum(store.merge(indicator, grouped[indicator], checked=chunk) for indicator in indicators)
+    for indicator in indicators: store.merge(indicator, [], checked=[ALL_COUNTRIES])
+    increment("refresh_rows", fetched)
+    log.info(f"Incremental refresh: {fetched} rows in {len(groups)} missing range(s).")
+    return None
+
+
+def _fetch_all_records(indicators: Sequence[str] = (INDICATOR,)) -> tuple[Optional[Dict[str, List[Dict[str, Any]]]], Optional[str]]:
+    """
+    Raw records of every economy for DATE_RANGE, keyed by indicator. With the cache
+    enabled they come from the SeriesStore, refreshed incrementally (see
+    _refresh_all_series).
+
+    Returns:
+        (records_by_indicator, error_message).
+    """
+    indicators = list(dict.fromkeys(indicators))
+    store = _get_series_store()
+    never_checked = store is None or any(store.checked_at(indicator, ALL_COUNTRIES) is None for indicator in indicators)
+    if store is None or (OFFLINE and never_checked): # No store, or offline without stored data: response cache only
+        records, error_message = _fetch_bulk(DATE_RANGE, indicators)
+        if error_message: return None, error_message
+        return _group_by_indicator(records, indicators), None
+    if not all(_store_is_fresh(store, ALL_COUNTRIES, indicator) for indicator in indicators):
+        error_message = _refresh_all_series(store, indicators)
+        if error_message:
+            if never_checked: return None, error_message
+            log.warning(f"Bulk refresh failed, serving the stored dataset: {error_message}")
+    start, end = _date_bounds()
+    return {indicator: store.records(indicator, None, start, end) for indicator in indicators}, None
+
+
+def get_all_gini_data() -> tuple[Optional[Dict[str, List[Dict[str, Any]]]], Optional[str]]:
+    """
+    Bulk mode, raw records (see _fetch_all_records and _fetch_bulk).
+
+    Returns:
+        (records_by_iso3, error_message). records_by_iso3 maps each ISO3 code to the
+        list of raw records of that economy, in the same shape get_gini_data returns.
+    """
+    records_by_indicator, error_message = _fetch_all_records([INDICATOR])
+    if error_message: return None, error_message
+    records_by_iso3: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records_by_indicator[INDICATOR]:
+        key = _record_country_key(record)
+        if key: records_by_iso3.setdefault(key, []).append(record)
+    return records_by_iso3, None
+
+
+def get_indicator_datasets(indicators: Optional[Sequence[str]] = None) -> tuple[Optional[Dict[str, IndicatorDataset]], Optional[str]]:
+    """
+    Bulk mode, columnar: one IndicatorDataset per indicator (default [INDICATOR]),
+    every economy, all indicators fetched with the same requests.
+    """
+    indicators = list(dict.fromkeys(indicators or [INDICATOR]))
+    records_by_indicator, error_message = _fetch_all_records(indicators)
+    if error_message: return None, error_message
+    from dataset import IndicatorDataset
+    datasets = {}
+    with span("dataset_build"):
+        for indicator in indicators: datasets[indicator] = IndicatorDataset.from_records(records_by_indicator[indicator], indicator)
+    log.info(f"Datasets: {', '.join(f'{i}: {len(d.codes)} economies, {d.nbytes} bytes' for i, d in datasets.items())}.")
+    return datasets, None
+
+
+def get_gini_dataset() -> tuple[Optional[IndicatorDataset], Optional[str]]:
+    """
+    Bulk mode, columnar: the whole GINI dataset as an IndicatorDataset (a few KB),
+    ready for vectorized queries such as latest_valid() over every economy at once.
+    """
+    datasets, error_message = get_indicator_datasets([INDICATOR])
+    if error_message: return None, error_message
+    return datasets[INDICATOR], None
+
+
+# --- Country Metadata (region / income group, for analytics.py) ---
+COUNTRY_LIST_PER_PAGE = "400" # Every economy and aggregate (~300) in one page
+
+def get_country_metadata() -> tuple[Optional[Dict[str, Dict[str, str]]], Optional[str]]:
+    """
+    Region and income group of every economy, from the API's country list
+    (one request, through the response cache). The API's aggregates (regions,
+    income groups, 'World') have the region 'Aggregates'.
+
+    Returns:
+        ({ISO3: {"name", "region", "income"}}, error_message).
+    """
+    records, error_message = _fetch_pages(BASE_URL, {"format": "json", "per_page": COUNTRY_LIST_PER_PAGE}, "country list")
+    if error_message: return None, error_message
+    metadata: Dict[str, Dict[str, str]] = {}
+    for record in records:
+        if not isinstance(record, dict) or not record.get('id'): continue
+        metadata[record['id'].upper()] = {"name": (record.get('name') or "").strip(),
+                                          "region": ((record.get('region') or {}).get('value') or "").strip(),
+                                          "income": ((record.get('incomeLevel') or {}).get('value') or "").strip()}
+    return metadata, None
+
+
+# --- Streaming Mode (see json_stream.py) ---
+# For large bulk responses: the body is downloaded in chunks and parsed
+# incrementally, and records flow one at a time through generator stages
+# (select_latest_streaming -> round_streaming). Neither the body nor the
+# decoded record list is ever held whole, and results appear while the
+# download is still running. Streaming bypasses the response cache.
+STREAM_CHUNK_SIZE = 64 * 1024 # Bytes per iter_content chunk
+STREAM_C_BATCH = 64           # Values per C batch call in round_streaming (small: keeps first results early)
+
+def _open_stream(url: str, params: Dict[str, str], label: str) -> tuple[Optional[Dict[str, Any]], Optional[Iterator[Dict[str, Any]]], Optional[Any], Optional[str]]:
+    """
+    Sends one streamed request and reads just the envelope's meta element.
+
+    Returns:
+        (meta, records_iterator, response, error_message). The caller must close
+        the response once the iterator is exhausted.
+    """
+    log.debug(f"Streaming URL: {url} with params: {params}")
+    response = None
+    try:
+        with span("http"): response = _http_get(url, params, stream=True)
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', '')
+        if 'application/json' not in content_type:
+            log.error(f"API did not return JSON. Content-Type: {content_type}.")
+            response.close(); return None, None, None, "Received non-JSON response from the server."
+        meta, records = parse_envelope_stream(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
+    except CircuitOpenError as e: log.warning(str(e)); return None, None, None, f"The World Bank API is unavailable (too many recent failures).\n{e}"
+    except requests.exceptions.HTTPError as e: log.error(f"HTTP Error: {e.response.status_code} {e.response.reason} for URL {e.request.url}"); response.close(); return None, None, None, f"HTTP Error: {e.response.status_code}\n{e.response.reason}"
+    except requests.exceptions.ConnectionError as e: log.error(f"Connection Error: {e}"); return None, None, None, "Could not connect to the World Bank API.\nCheck internet connection."
+    except requests.exceptions.Timeout: log.error("Timeout Error"); return None, None, None, "The request to the World Bank API timed out."
+    except requests.exceptions.RequestException as e: log.error(f"Request Exception: {e}"); return None, None, None, f"An error occurred during the request:\n{e}"
+    except StreamingJSONError as e: log.error(f"JSON Decode Error: {e}"); response.close(); return None, None, None, "Could not decode the server's response (invalid JSON)."
+    if meta is not None and "message" in meta:
+        response.close()
+        records, meta, error_message = _parse_indicator_payload([meta], label) # Same handling as buffered responses
+        return meta, iter(records or []), None, error_message
+    return meta, records, response, None
+
+
+def stream_all_gini_records() -> tuple[Optional[Iterator[Dict[str, Any]]], Optional[str]]:
+    """
+    Streaming bulk mode: every record of 'country/all' for DATE_RANGE, yielded one
+    at a time while the pages download.
+
+    Returns:
+        (records_iterator, error_message). Errors of the first request are returned;
+        later failures (next page, truncated body) are raised by the iterator as
+        OSError / StreamingJSONError.
+    """
+    url = f"{BASE_URL}/all/indicator/{INDICATOR}"
+    params = {
+        "format": "json",
+        "date": DATE_RANGE,
+        "per_page": BULK_PER_PAGE
+    }
+    meta, records, response, error_message = _open_stream(url, dict(params, page="1"), "all")
+    if error_message: return None, error_message
+
+    def generate() -> Iterator[Dict[str, Any]]:
+        nonlocal meta, records, response
+        page = 1
+        while True:
+            try:
+                for record in records:
+                    if isinstance(record, dict): yield record
+            finally:
+                if response is not None: response.close()
+            try: total_pages = int((meta or {}).get('pages', 1))
+            except (ValueError, TypeError): total_pages = 1
+            if page >= total_pages: return
+            page += 1
+            meta, records, response, error_message = _open_stream(url, dict(params, page=str(page)), "all")
+            if error_message: raise OSError(f"Page {page} of the streamed response failed: {error_message}")
+
+    return generate(), None
+
+
+def select_latest_streaming(records: Iterable[Dict[str, Any]]) -> Iterator[tuple[str, str, int, float]]:
+    """
+    Selection stage: yields (code, name, year, value) with the latest valid value
+    of each country. The API returns each country's records contiguously, so a
+    country is emitted as soon as its group ends and only one group is held.
+    """
+    best = None; current = None
+    for record in records:
+        code = _record_country_key(record)
+        if code != current:
+            if best: yield best
+            current, best = code, None
+        value = record.get('value')
+        if code is None or value is None: continue
+        try: year = int(record.get('date')); value = float(value)
+        except (ValueError, TypeError): continue
+        if best is None or year > best[2]: best = (code, (record.get('country') or {}).get('value', 'N/A'), year, value)
+    if best: yield best
+
+
+def round_streaming(rows: Iterable[tuple[str, str, int, float]], batch_size: int = STREAM_C_BATCH) -> Iterator[tuple[tuple[str, str, int, float], Optional[int]]]:
+    """Rounding stage: yields (row, c_result), rounding the values of every batch_size rows with one C batch call."""
+    batch: List[tuple[str, str, int, float]] = []
+    def flush():
+        c_results = process_data_with_c_batch([row[3] for row in batch])
+        for i, row in enumerate(batch): yield row, (c_results[i] if c_results is not None else None)
+        batch.clear()
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size: yield from flush()
+    if batch: yield from flush()
 
 
 # --- Data Processing (find_latest_valid_gini - NO CHANGES NEEDED) ---
@@ -205,53 +1046,459 @@ def find_latest_valid_gini(records: List[Dict[str, Any]]) -> Optional[Dict[str,
                     latest_year = current_year
                     record['country_name'] = record.get('country', {}).get('value', 'N/A')
                     latest_valid_record = record
-            except (ValueError, TypeError, KeyError) as e: print(f"[Logic] Warning: Skipping record with invalid format/keys: {record}, Error: {e}", file=sys.stderr); continue
+            except (ValueError, TypeError, KeyError) as e: log.warning(f"Skipping record with invalid format/keys: {record}, Error: {e}"); continue
     return latest_valid_record
 
 
-# --- CLI Entry Point (__main__ - NO CHANGES NEEDED) ---
+# --- Batch Pipeline (fetch -> find_latest_valid_gini -> C rounding) ---
+# Three overlapping stages joined by bounded queues: while the C stage rounds one
+# burst of values, the selection stage works on the next countries and the fetch
+# workers keep up to MAX_CONCURRENT_REQUESTS requests in flight. A full queue
+# blocks its producer (back-pressure), so memory stays bounded for any input size.
+BATCH_QUEUE_SIZE = 64 # Items buffered between two stages
+BATCH_C_MAX = 64      # Most values rounded per C batch call (whatever is waiting, up to this)
+_END = object()       # End-of-stream marker passed between stages
+
+
+def read_country_codes(lines: Iterable[str]) -> Iterator[str]:
+    """Codes from text lines (several per line allowed, separated by spaces or commas; '#' starts a comment)."""
+    for line in lines:
+        for token in line.split("#", 1)[0].replace(",", " ").split():
+            yield token.strip().upper()
+
+
+def run_batch_pipeline(codes: Iterable[str], fetch: Optional[Callable[[str], tuple]] = None, process_c: bool = True, fetch_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Runs every distinct code through the pipeline and yields one result per code
+    as soon as it completes (completion order, not input order):
+
+        {"code", "name", "year", "value", "c_result", "error"}
+
+    'error' is None on success. 'codes' is consumed lazily, so it can be a
+    pipe that is still being written. Closing the generator stops the stages.
+    """
+    fetch = fetch or get_gini_data
+    workers = max(1, fetch_workers or MAX_CONCURRENT_REQUESTS)
+    code_queue: queue.Queue = queue.Queue(BATCH_QUEUE_SIZE)
+    fetched_queue: queue.Queue = queue.Queue(BATCH_QUEUE_SIZE)
+    selected_queue: queue.Queue = queue.Queue(BATCH_QUEUE_SIZE)
+    out_queue: queue.Queue = queue.Queue(BATCH_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def put(q: queue.Queue, item: Any) -> bool:
+        """Blocking put that gives up once the consumer has gone away."""
+        while not stop.is_set():
+            try: q.put(item, timeout=0.1); return True
+            except queue.Full: continue
+        return False
+
+    def get(q: queue.Queue) -> Any:
+        while not stop.is_set():
+            try: return q.get(timeout=0.1)
+            except queue.Empty: continue
+        return _END
+
+    def result(code: str, error: Optional[str] = None) -> Dict[str, Any]:
+        return {"code": code, "name": None, "year": None, "value": None, "c_result": None, "error": error}
+
+    def feed_stage():
+        seen = set()
+        try:
+            for code in codes:
+                if code in seen: continue
+                seen.add(code)
+                if len(code) != 3 or not code.isalpha(): ok = put(out_queue, result(code, "Invalid country code format (expected 3 letters)."))
+                else: ok = put(code_queue, code)
+                if not ok: return
+        except Exception as e: log.error(f"Stopped reading country codes: {type(e).__name__}: {e}")
+        finally:
+            for _ in range(workers): put(code_queue, _END)
+
+    def fetch_stage():
+        while (code := get(code_queue)) is not _END:
+            try:
+                records, error_message = fetch(code)
+            except Exception as e:
+                records, error_message = None, f"An unexpected error occurred:\n{type(e).__name__}"
+            if not put(fetched_queue, (code, records, error_message)): return
+        put(fetched_queue, _END)
+
+    def select_stage():
+        remaining = workers
+        while remaining:
+            item = get(fetched_queue)
+            if item is _END: remaining -= 1; continue
+            code, records, error_message = item
+            row = result(code, error_message)
+            if not error_message:
+                latest = find_latest_valid_gini(records or [])
+                if latest: row.update(name=latest['country_name'], year=int(latest['date']), value=float(latest['value']))
+                else: row["error"] = f"No valid GINI data found in {DATE_RANGE}."
+            if not put(selected_queue, row): return
+        put(selected_queue, _END)
+
+    def round_stage():
+        finished = False
+        while not finished:
+            batch = [get(selected_queue)]
+            while len(batch) < BATCH_C_MAX: # Take whatever else is already waiting: one C call per burst
+                try: batch.append(selected_queue.get_nowait())
+                except queue.Empty: break
+            finished = any(item is _END for item in batch)
+            rows = [item for item in batch if item is not _END]
+            to_round = [row for row in rows if row["value"] is not None] if process_c else []
+            if to_round:
+                c_results = process_data_with_c_batch([row["value"] for row in to_round])
+                for i, row in enumerate(to_round):
+                    if c_results is None: row["error"] = "C processing failed."
+                    else: row["c_result"] = c_results[i]
+            for row in rows:
+                if not put(out_queue, row): return
+        put(out_queue, _END)
+
+    stages = [feed_stage] + [fetch_stage] * workers + [select_stage, round_stage]
+    threads = [threading.Thread(target=stage, name=f"gini-batch-{stage.__name__}", daemon=True) for stage in stages]
+    for thread in threads: thread.start()
+    try:
+        while (row := out_queue.get()) is not _END: yield row
+    finally:
+        stop.set()
+
+
+# --- CLI Report (one country) ---
+def _print_country_report(code: str, records: Optional[List[Dict[str, Any]]], fetch_error: Optional[str], show_history: bool, process_c: bool) -> bool:
+    """Prints the summary (and optionally history / C result) of one country. Returns False on fetch errors."""
+    if fetch_error: print(f"\nError fetching data: {fetch_error}", file=sys.stderr); return False
+    if records is None: print(f"\nError: An unknown issue occurred while fetching data for {code}.", file=sys.stderr); return False
+    if not records: print(f"\nNo GINI data points found for {code} in the period {DATE_RANGE}."); return True
+    # Plain Python on purpose: a handful of records does not justify importing numpy on the fast path
+    history = sorted(((int(r['date']), r.get('value')) for r in records if isinstance(r, dict) and str(r.get('date', '')).isdigit()), key=lambda item: item[0])
+    latest = find_latest_valid_gini(records)
+    if latest is None:
+        print(f"\nData found for {code}, but no records had a valid GINI value in the period {DATE_RANGE}.")
+        if show_history:
+             print("\n--- Historical Data (raw/invalid values might be present) ---")
+             if history:
+                 for year, value in history: print(f"  Year: {year}, Index: {'N/A' if value is None else f'{float(value):.2f}'}")
+             else: print("  (No historical records found in response)")
+        return True
+    latest_year, latest_gini_float = int(latest['date']), float(latest['value'])
+    print("\n--- GINI Index Summary ---"); print(f"Country:      {latest.get('country_name', code)}"); print(f"Latest Year:  {latest_year}")
+    print(f"Latest GINI:  {latest_gini_float:.2f}")
+    if process_c:
+         print(f"\n--- C Processing ({'in-process native library' if _select_c_backend() == 'native' else 'via Client64/Server32'}) ---");
+         c_result = process_data_with_c(latest_gini_float) # Calls the modified function
+         if c_result is not None: print(f"Input to C:   {latest_gini_float:.2f}"); print(f"Output: {c_result}")
+         else: print("Error during C processing (check logs).", file=sys.stderr)
+    if show_history:
+        print("\n--- Historical Data (Oldest First, Valid Only) ---")
+        valid_history = [(year, float(value)) for year, value in history if value is not None]
+        if valid_history:
+            for year, value in valid_history: print(f"  Year: {year}, Index: {value:>6.2f}")
+        else: print("  (No valid historical records found)")
+    return True
+
+
+# --- CLI Report (one country, several indicators) ---
+def _print_indicator_report(code: str, records_by_indicator: Optional[Dict[str, List[Dict[str, Any]]]], fetch_error: Optional[str], show_history: bool) -> bool:
+    """Prints the latest value (and optionally the history) of every indicator of one country. Returns False on fetch errors."""
+    if fetch_error: print(f"\nError fetching data: {fetch_error}", file=sys.stderr); return False
+    if records_by_indicator is None: print(f"\nError: An unknown issue occurred while fetching data for {code}.", file=sys.stderr); return False
+    from dataset import IndicatorDataset
+    print(f"\n--- Indicators for {code} ({DATE_RANGE}) ---")
+    for indicator, records in records_by_indicator.items():
+        dataset = IndicatorDataset.from_records(records, indicator)
+        key = code if code in dataset or not dataset.codes else dataset.codes[0]
+        latest = dataset.latest_for(key)
+        print(f"  {indicator:<16}" + (f"{latest[1]:>8.2f}  ({latest[0]})" if latest else "     N/A"))
+        if show_history and latest:
+            years, values = dataset.history(key)
+            print("    " + ", ".join(f"{year}: {value:.2f}" for year, value in zip(years, values)))
+    return True
+
+
+# --- Snapshots (see snapshot.py) ---
+def round_dataset(dataset: IndicatorDataset) -> Optional[str]:
+    """Fills dataset.rounded with the C/ASM rounding of every valid value (ONE batch call). Returns an error message or None."""
+    from dataset import ROUNDED_DTYPE, ROUNDED_MISSING
+    valid_rows = np.flatnonzero(dataset.valid)
+    results = process_data_with_c_batch(dataset.value[valid_rows].tolist())
+    if results is None: return f"C processing failed for {dataset.indicator}."
+    rounded = np.full(len(dataset), ROUNDED_MISSING, dtype=ROUNDED_DTYPE)
+    rounded[valid_rows] = results
+    dataset.rounded = rounded
+    return None
+
+
+def export_indicator_snapshot(path: str, indicators: Optional[Sequence[str]] = None, process_c: bool = True) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Fetches every economy for the indicators (bulk mode), rounds the values with C and writes a snapshot directory."""
+    datasets, fetch_error = get_indicator_datasets(indicators)
+    if fetch_error: return None, fetch_error
+    if process_c:
+        for dataset in datasets.values():
+            error = round_dataset(dataset)
+            if error: return None, error
+    from snapshot import export_snapshot
+    return export_snapshot(datasets, path, {"date_range": DATE_RANGE, "source": BASE_URL})
+
+
+# --- Analytics (see analytics.py) ---
+def load_analytics_inputs(indicator: Optional[str] = None, snapshot: Optional[str] = None, need_metadata: bool = False) -> tuple[Optional[IndicatorDataset], Optional[Dict[str, Dict[str, str]]], Optional[str]]:
+    """
+    Everything the analytics reports need: the whole dataset of one indicator
+    (bulk mode, or a snapshot written by 'export') and the country metadata.
+    Without metadata the API's aggregates stay in the reports; that is only an
+    error if 'need_metadata' (group aggregates).
+
+    Returns:
+        (dataset, metadata, error_message).
+    """
+    indicator = (indicator or INDICATOR).upper()
+    if snapshot:
+        from snapshot import load_snapshot
+        datasets, _, error_message = load_snapshot(snapshot)
+        if error_message: return None, None, error_message
+        if indicator not in datasets: return None, None, f"Snapshot '{snapshot}' has no {indicator} data (it has: {', '.join(datasets)})."
+    else:
+        datasets, error_message = get_indicator_datasets([indicator])
+        if error_message: return None, None, error_message
+    metadata, error_message = get_country_metadata()
+    if error_message:
+        if need_metadata: return None, None, f"Could not load the country metadata (region / income group):\n{error_message}"
+        log.warning(f"No country metadata, aggregates are not excluded from the report: {error_message}")
+    return datasets[indicator], metadata, None
+
+
+# --- CLI Subcommands (export / load / batch / analytics) ---
+def _add_common_options(parser: argparse.ArgumentParser):
+    parser.add_argument("--c-backend", choices=C_BACKENDS, help="C processing backend: in-process native library, 32-bit server, or auto (default; env GINI_C_BACKEND).")
+    parser.add_argument("--offline", action="store_true", help="Serve data only from the local response cache (no network).")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local response cache.")
+    parser.add_argument("--cache-ttl", type=float, metavar="SECONDS", help="Age after which cached responses are revalidated (default: 24h).")
+    parser.add_argument("--cache-dir", metavar="DIR", help="Directory of the response cache (default: ~/.cache/gini_fetcher).")
+    parser.add_argument("--full-refresh", action="store_true", help="Refetch the whole date range instead of only the years missing locally.")
+    parser.add_argument("--retries", type=int, metavar="N", help=f"Retries of failed/throttled API requests, with jittered backoff (default: {HTTP_RETRIES}).")
+    parser.add_argument("--hedge", action="store_true", help="Send a second request when the first is slower than the recent p95 (env GINI_HTTP_HEDGE=1).")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Debug logging of every stage (same as GINI_LOG_LEVEL=DEBUG).")
+    parser.add_argument("--metrics", choices=("json", "prometheus"), help="Print per-stage latency metrics to stderr on exit.")
+    parser.add_argument("--startup-timing", action="store_true", help="Print the duration of the import/init/fetch phases to stderr on exit.")
+
+
+def _apply_common_options(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if args.verbose: configure_logging("DEBUG")
+    if args.metrics: atexit.register(lambda: print(dump_json() if args.metrics == "json" else dump_prometheus(), file=sys.stderr))
+    if args.startup_timing: atexit.register(lambda: print(startup_report(), file=sys.stderr, end=""))
+    if args.offline and args.no_cache: parser.error("--offline needs the cache; it cannot be combined with --no-cache.")
+    if args.c_backend: configure_c_backend(args.c_backend)
+    configure_cache(enabled=False if args.no_cache else None, offline=True if args.offline else None, ttl=args.cache_ttl, cache_dir=args.cache_dir)
+    if args.full_refresh: configure_refresh(full_refresh=True)
+    if args.retries is not None and args.retries < 0: parser.error("--retries must be >= 0.")
+    configure_resilience(retries=args.retries, hedge=True if args.hedge else None)
+
+
+def _parse_indicators(raw: Optional[str]) -> Optional[List[str]]:
+    return [code.strip().upper() for code in raw.split(",") if code.strip()] if raw else None
+
+
+def _run_export(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="logic.py export", description=f"Write every economy's indicator data ({DATE_RANGE}) and its C-rounded values to a memory-mappable snapshot directory.")
+    parser.add_argument("out_dir", help="Snapshot directory to create (replaced atomically if it exists).")
+    parser.add_argument("-I", "--indicators", metavar="CODES", help=f"Comma-separated indicator codes (default: {INDICATOR}).")
+    parser.add_argument("--no-c", action="store_true", help="Skip the C rounding column.")
+    _add_common_options(parser)
+    args = parser.parse_args(argv)
+    _apply_common_options(parser, args)
+    indicators = _parse_indicators(args.indicators)
+    if not args.no_c: warm_up_c_backend() # Servers start while the HTTP fetch runs
+    print(f"Exporting {', '.join(indicators or [INDICATOR])} for all economies to {args.out_dir}...", file=sys.stderr)
+    meta, error = export_indicator_snapshot(args.out_dir, indicators, process_c=not args.no_c)
+    if error: print(f"\nError exporting snapshot: {error}", file=sys.stderr); return 1
+    for indicator, info in meta["indicators"].items():
+        print(f"  {indicator:<16} {info['rows']:>7} rows  {len(info['codes']):>4} economies" + ("  (+ C rounded)" if info["rounded"] else ""))
+    return 0
+
+
+def _run_load(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="logic.py load", description="Map a snapshot written by 'export' (no network) and print the latest values.")
+    parser.add_argument("snapshot", help="Snapshot directory.")
+    parser.add_argument("country_code", nargs="*", help="Only these 3-letter ISO codes (default: every economy).")
+    parser.add_argument("--no-mmap", action="store_true", help="Read the columns into memory instead of mapping them.")
+    args = parser.parse_args(argv)
+    from snapshot import load_snapshot
+    start = time.perf_counter()
+    datasets, meta, error = load_snapshot(args.snapshot, mmap=not args.no_mmap)
+    elapsed = time.perf_counter() - start
+    if error: print(f"Error: {error}", file=sys.stderr); return 1
+    print(f"Loaded {len(datasets)} indicator(s) from {args.snapshot} in {elapsed * 1000:.2f} ms (created {meta.get('created')}, {meta.get('date_range')}).", file=sys.stderr)
+    codes = {code.strip().upper() for code in args.country_code}
+    for indicator, dataset in datasets.items():
+        print(f"\n--- Latest {indicator} per Economy ({meta.get('date_range')}) ---")
+        for row in dataset.latest_rows():
+            code = dataset.codes[dataset.country[row]]
+            if codes and code not in codes: continue
+            line = f"  {code}  {dataset.year[row]}  {dataset.value[row]:>6.2f}  {dataset.names[dataset.country[row]]}"
+            if dataset.rounded is not None: line += f"  (C: {dataset.rounded[row]})"
+            print(line)
+    return 0
+
+
+def _run_batch(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="logic.py batch", description=f"Fetch the latest GINI value ({DATE_RANGE}) of many countries in one process, writing one JSON object per line as each completes.")
+    parser.add_argument("codes_file", nargs="?", default="-", help="File with ISO3 codes (whitespace/comma separated, '#' comments); '-' or omitted reads stdin.")
+    parser.add_argument("-o", "--output", metavar="FILE", help="Write the JSON lines here instead of stdout.")
+    parser.add_argument("-j", "--concurrency", type=int, metavar="N", help=f"Fetches in flight (default: {MAX_CONCURRENT_REQUESTS}).")
+    parser.add_argument("--latest", action="store_true", help="Most recent value whatever its year (mrnev=1 query).")
+    parser.add_argument("--no-c", action="store_true", help="Skip the C rounding stage.")
+    _add_common_options(parser)
+    args = parser.parse_args(argv)
+    _apply_common_options(parser, args)
+    if args.concurrency is not None and args.concurrency < 1: parser.error("--concurrency must be >= 1.")
+    configure_http(max_workers=args.concurrency)
+    if not args.no_c: warm_up_c_backend() # Servers start while the first fetches run
+    try:
+        source = sys.stdin if args.codes_file == "-" else open(args.codes_file, encoding="utf-8")
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    except OSError as e: print(f"Error: {e}", file=sys.stderr); return 1
+    total = failures = 0
+    start = time.perf_counter()
+    try:
+        for row in run_batch_pipeline(read_country_codes(source), fetch=_latest_as_records if args.latest else None, process_c=not args.no_c):
+            output.write(json.dumps(row, ensure_ascii=False) + "\n"); output.flush()
+            total += 1
+            if row["error"]: failures += 1
+    finally:
+        if source is not sys.stdin: source.close()
+        if output is not sys.stdout: output.close()
+    print(f"{total - failures} of {total} countries processed in {time.perf_counter() - start:.2f}s.", file=sys.stderr)
+    return 1 if failures else 0
+
+
+ANALYTICS_HELP = {
+    "rank": "Rank every economy by its latest value (or its value in --year), with percentile ranks.",
+    "percentiles": "Distribution across economies (p10..p90, mean) for every year and for the latest values.",
+    "yoy": "Change between consecutive observations of every economy, largest first.",
+    "groups": "Count, mean, median, min and max per region or income group.",
+    "coverage": "Observed years, first/last year and longest gap per economy, and reporting economies per year.",
+}
+
+
+def _run_analytics(report: str, argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog=f"logic.py {report}", description=f"{ANALYTICS_HELP[report]} Computed over every economy at once ({DATE_RANGE}).")
+    parser.add_argument("-i", "--indicator", metavar="CODE", help=f"Indicator code (default: {INDICATOR}).")
+    parser.add_argument("--snapshot", metavar="DIR", help="Read the dataset from a snapshot written by 'export' instead of the API/cache.")
+    if report in ("rank", "yoy", "groups"): parser.add_argument("--year", type=int, help="Use the values of this year instead of each economy's latest" + (" (yoy: changes ending in this year)." if report == "yoy" else "."))
+    if report in ("rank", "yoy", "coverage"): parser.add_argument("-n", "--top", type=int, metavar="N", help="Only the first N rows.")
+    if report == "groups": parser.add_argument("--by", choices=("region", "income"), default="region", help="Grouping (default: region).")
+    parser.add_argument("--json", action="store_true", help="Print the tables as JSON instead of text.")
+    _add_common_options(parser)
+    args = parser.parse_args(argv)
+    _apply_common_options(parser, args)
+    if getattr(args, "top", None) is not None and args.top < 1: parser.error("--top must be >= 1.")
+    import analytics
+    dataset, metadata, error = load_analytics_inputs(args.indicator, args.snapshot, need_metadata=report == "groups")
+    if error: print(f"Error: {error}", file=sys.stderr); return 1
+    start, end = (None, None) if args.snapshot else _date_bounds() # A snapshot covers its own date range
+    started = time.perf_counter()
+    with span("analytics"):
+        tables = analytics.build_report(report, dataset, metadata, year=getattr(args, "year", None), top=getattr(args, "top", None), by=getattr(args, "by", "region"), start=start, end=end)
+    print(f"{report}: {len(dataset.codes)} economies, {len(dataset)} rows in {(time.perf_counter() - started) * 1000:.2f} ms.", file=sys.stderr)
+    if args.json: print(json.dumps([table.to_dict() for table in tables], ensure_ascii=False, indent=2))
+    else: print("\n\n".join(table.format() for table in tables))
+    return 0
+
+
+SUBCOMMANDS = {"export": _run_export, "load": _run_load, "batch": _run_batch,
+               **{report: (lambda argv, report=report: _run_analytics(report, argv)) for report in ANALYTICS_HELP}}
+
+
+# --- CLI Entry Point (__main__) ---
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS: sys.exit(SUBCOMMANDS[sys.argv[1]](sys.argv[2:]))
     # ... (Keep the existing argparse CLI code) ...
-    parser = argparse.ArgumentParser(description=f"Fetch GINI index data ({DATE_RANGE}) from the World Bank API.")
-    parser.add_argument("country_code", help="The 3-letter ISO country code (e.g., ARG, USA, BRA).")
+    parser = argparse.ArgumentParser(description=f"Fetch GINI index data ({DATE_RANGE}) from the World Bank API.",
+                                     epilog="Subcommands: 'export OUT_DIR' writes a memory-mappable snapshot, 'load SNAPSHOT' reads one back, 'batch [FILE]' streams JSON lines for many countries, and 'rank', 'percentiles', 'yoy', 'groups', 'coverage' report over every economy (see 'logic.py <subcommand> -h').")
+    parser.add_argument("country_code", nargs="*", help="One or more 3-letter ISO country codes (e.g., ARG USA BRA).")
+    parser.add_argument("-a", "--all", action="store_true", help="Bulk mode: fetch every economy at once and print the latest value of each.")
     parser.add_argument("-H", "--history", action="store_true", help="Show historical data in addition to the latest value.")
     parser.add_argument("-C", "--process-c", action="store_true", help="Also process the latest value using the C function.")
+    parser.add_argument("-j", "--concurrency", type=int, metavar="N", help=f"Maximum requests in flight when fetching several countries (default: {MAX_CONCURRENT_REQUESTS}).")
+    parser.add_argument("--stream", action="store_true", help="With --all: download and parse incrementally, printing each economy as it arrives (no cache).")
+    parser.add_argument("-I", "--indicators", metavar="CODES", help=f"Comma-separated indicator codes fetched together, one request per country (e.g. {','.join(RELATED_INDICATORS)}).")
+    parser.add_argument("--latest", action="store_true", help="Only the most recent value of each country, whatever its year (mrnev=1 query).")
+    _add_common_options(parser)
+    setup_start = time.perf_counter()
     args = parser.parse_args()
-    code = args.country_code.strip().upper()
-    if len(code) != 3 or not code.isalpha(): print(f"Error: Invalid country code format '{args.country_code}'. Please use a 3-letter code.", file=sys.stderr); sys.exit(1)
-    print(f"Fetching GINI data for {code}...", file=sys.stderr)
-    records, fetch_error = get_gini_data(code)
-    if fetch_error: print(f"\nError fetching data: {fetch_error}", file=sys.stderr); sys.exit(1)
-    if records is None: print(f"\nError: An unknown issue occurred while fetching data for {code}.", file=sys.stderr); sys.exit(1)
-    if not records: print(f"\nNo GINI data points found for {code} in the period {DATE_RANGE}."); sys.exit(0)
-    latest_record = find_latest_valid_gini(records)
-    if not latest_record:
-        print(f"\nData found for {code}, but no records had a valid GINI value in the period {DATE_RANGE}.")
-        if args.history:
-             print("\n--- Historical Data (raw/invalid values might be present) ---")
-             valid_records_sorted = sorted([r for r in records if isinstance(r, dict)], key=lambda x: x.get('date', ''))
-             if valid_records_sorted:
-                 for entry in valid_records_sorted: print(f"  Year: {entry.get('date', 'N/A')}, Index: {entry.get('value', 'N/A')}")
-             else: print("  (No historical records found in response)")
+    _apply_common_options(parser, args)
+    if args.stream and (not args.all or args.offline): parser.error("--stream needs --all and network access.")
+    indicators = _parse_indicators(args.indicators)
+    if indicators and (args.stream or args.latest or args.process_c): parser.error("--indicators cannot be combined with --stream, --latest or -C.")
+    if args.process_c: warm_up_c_backend() # Servers start while the HTTP fetch runs
+    fetch_country = _latest_as_records if args.latest else get_gini_data
+    print_report = lambda code, records, fetch_error: _print_country_report(code, records, fetch_error, args.history, args.process_c)
+    if indicators:
+        fetch_country = lambda code: get_indicator_data(code, indicators)
+        print_report = lambda code, records_by_indicator, fetch_error: _print_indicator_report(code, records_by_indicator, fetch_error, args.history)
+    record_startup_phase("cli setup", setup_start, time.perf_counter() - setup_start)
+    if args.all and indicators:
+        print(f"Fetching {len(indicators)} indicator(s) for all economies (bulk mode)...", file=sys.stderr)
+        datasets, fetch_error = get_indicator_datasets(indicators)
+        if fetch_error: print(f"\nError fetching data: {fetch_error}", file=sys.stderr); sys.exit(1)
+        print(f"\n--- Latest Values per Economy ({DATE_RANGE}) ---")
+        print("  ISO3" + "".join(f"  {indicator:>16}" for indicator in indicators))
+        latest = {indicator: {dataset.codes[c]: (int(y), float(v)) for c, y, v in zip(*dataset.latest_valid())} for indicator, dataset in datasets.items()}
+        for iso3 in sorted(set().union(*(dataset.codes for dataset in datasets.values()))):
+            cells = [latest[indicator].get(iso3) for indicator in indicators]
+            if not any(cells): continue
+            print(f"  {iso3}" + "".join(f"  {cell[1]:>10.2f} ({cell[0]})" if cell else f"  {'N/A':>16}" for cell in cells))
         sys.exit(0)
-    print("\n--- GINI Index Summary ---"); print(f"Country:      {latest_record.get('country_name', code)}"); print(f"Latest Year:  {latest_record['date']}")
-    try:
-        latest_gini_float = float(latest_record['value']); print(f"Latest GINI:  {latest_gini_float:.2f}")
-        if args.process_c:
-             print("\n--- C Processing (via Client64/Server32) ---");
-             c_result = process_data_with_c(latest_gini_float) # Calls the modified function
-             if c_result is not None: print(f"Input to C:   {latest_gini_float:.2f}"); print(f"Output: {c_result}")
-             else: print("Error during C processing (check logs).", file=sys.stderr)
-    except (ValueError, TypeError):
-        print(f"Latest GINI:  {latest_record['value']} (Error: Not a valid number)", file=sys.stderr)
-
-        if args.process_c: print("\nCannot perform C processing: Latest GINI value is not a valid number.", file=sys.stderr)
-    if args.history:
-        print("\n--- Historical Data (Oldest First, Valid Only) ---")
-        valid_records_sorted = sorted([r for r in records if r and r.get('value') is not None and r.get('date')], key=lambda x: x.get('date', ''))
-        if valid_records_sorted:
-            for entry in valid_records_sorted:
-                 try: print(f"  Year: {entry['date']}, Index: {float(entry['value']):>6.2f}")
-                 except (ValueError, TypeError): print(f"  Year: {entry['date']}, Index: {entry['value']} (invalid?)")
-        else: print("  (No valid historical records found)")
-    sys.exit(0)
+    if args.all and args.stream:
+        print("Streaming GINI data for all economies...", file=sys.stderr)
+        records_stream, fetch_error = stream_all_gini_records()
+        if fetch_error: print(f"\nError fetching data: {fetch_error}", file=sys.stderr); sys.exit(1)
+        print(f"\n--- Latest GINI Index per Economy ({DATE_RANGE}, API order) ---")
+        rows = select_latest_streaming(records_stream)
+        found = 0
+        try:
+            for row, c_result in (round_streaming(rows) if args.process_c else ((row, None) for row in rows)):
+                iso3, name, year, latest_gini_float = row
+                line = f"  {iso3}  {year}  {latest_gini_float:>6.2f}  {name}"
+                if args.process_c: line += f"  (C: {c_result if c_result is not None else 'error'})"
+                print(line, flush=True); found += 1
+        except (OSError, StreamingJSONError) as e: print(f"\nError while streaming: {e}", file=sys.stderr); sys.exit(1)
+        print(f"\n{found} economies have a valid GINI value in {DATE_RANGE}.")
+        sys.exit(0)
+    if args.all:
+        print("Fetching GINI data for all economies (bulk mode)...", file=sys.stderr)
+        dataset, fetch_error = get_gini_dataset()
+        if fetch_error: print(f"\nError fetching data: {fetch_error}", file=sys.stderr); sys.exit(1)
+        print(f"\n--- Latest GINI Index per Economy ({DATE_RANGE}) ---")
+        rows = dataset.latest_table(sort_by="code") # One vectorized pass over every economy
+        # One batch request rounds every value (instead of one Server32 round trip per economy)
+        c_results = process_data_with_c_batch([value for _, _, _, value in rows]) if args.process_c else None
+        for i, (iso3, name, year, latest_gini_float) in enumerate(rows):
+            line = f"  {iso3}  {year}  {latest_gini_float:>6.2f}  {name}"
+            if args.process_c: line += f"  (C: {c_results[i] if c_results is not None else 'error'})"
+            print(line)
+        print(f"\n{len(rows)} of {len(dataset.codes)} economies have a valid GINI value in {DATE_RANGE}.")
+        sys.exit(0)
+    if not args.country_code: parser.error("country_code is required unless --all is given.")
+    codes = []
+    for raw_code in args.country_code:
+        code = raw_code.strip().upper()
+        if len(code) != 3 or not code.isalpha(): print(f"Error: Invalid country code format '{raw_code}'. Please use a 3-letter code.", file=sys.stderr); sys.exit(1)
+        if code not in codes: codes.append(code)
+    configure_http(max_workers=args.concurrency)
+    if len(codes) == 1:
+        code = codes[0]
+        print(f"Fetching {'indicator' if indicators else 'GINI'} data for {code}...", file=sys.stderr)
+        with startup_phase("fetch"): records, fetch_error = fetch_country(code)
+        with startup_phase("report"): ok = print_report(code, records, fetch_error)
+        sys.exit(0 if ok else 1)
+    print(f"Fetching GINI data for {len(codes)} countries (up to {MAX_CONCURRENT_REQUESTS} in flight)...", file=sys.stderr)
+    failures = 0
+    # Reports are printed in completion order, as soon as each country arrives
+    for code, records, fetch_error in get_gini_data_many(codes, fetch=fetch_country):
+        print(f"\n===== {code} =====")
+        if not print_report(code, records, fetch_error): failures += 1
+    if failures: print(f"\n{failures} of {len(codes)} countries could not be fetched.", file=sys.stderr)
+    sys.exit(1 if failures else 0)
@@ -10,6 +10,7 @@ if __name__ == "__main__":
         root = tk.Tk()
         app = gui.GiniApp(root) # Instantiate the GUI app from the gui module
         root.mainloop()
+        app.shutdown_backend() # Stop pooled Server32 processes
     except tk.TclError as e:
          # Catch potential theme errors or other Tk initialization issues
          print(f"\nTkinter Error: {e}", file=sys.stderr)
@@ -0,0 +1,14 @@
+# records.py
+# Helpers over raw World Bank API records (plain dicts), NO network code.
+# Kept free of heavy imports (numpy): shared by logic.py, series_store.py and
+# dataset.py, and needed on the fast single-country lookup path.
+
+from typing import Optional, Dict, Any
+
+
+def record_country_key(record: Dict[str, Any]) -> Optional[str]:
+    """Returns the ISO3 code of a record (falling back to the country id for aggregates)."""
+    iso3 = record.get('countryiso3code')
+    if iso3: return iso3.upper()
+    country_id = (record.get('country') or {}).get('id')
+    return country_id.upper() if country_id else None
@@ -0,0 +1,147 @@
+# resilience.py
+# Tail-latency building blocks for upstream calls, NO network code of its own.
+# Used by logic.py's _http_get around every World Bank request:
+#
+# - RetryPolicy: jittered exponential backoff ("full jitter") between attempts.
+# - LatencyTracker: recent request latencies; its p95 is the hedging delay.
+# - hedged_call: if the first attempt is slower than the delay, a second one is
+#   started and whichever finishes first wins (the loser is discarded).
+# - CircuitBreaker: after N consecutive failures calls fail fast for a while
+#   (CircuitOpenError) instead of each waiting for its own timeout; one probe
+#   request is let through when the cool-down ends.
+
+import time
+import random
+import threading
+from collections import deque
+from typing import Callable, Optional, TypeVar, Deque, TYPE_CHECKING
+from instrumentation import get_logger, increment
+if TYPE_CHECKING: from concurrent.futures import Executor # Imported by hedged_call: not needed at startup
+
+log = get_logger("Resilience")
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """The circuit breaker is open: the upstream is considered down, the call was not attempted."""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits uniform(0, min(max_delay, base_delay * 2**n))."""
+    def __init__(self, retries: int = 2, base_delay: float = 0.05, max_delay: float = 2.0):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number attempt + 1 (a server's Retry-After wins, capped to max_delay)."""
+        if retry_after is not None: return min(max(retry_after, 0.0), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies (seconds), thread-safe."""
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile of the window, or None until min_samples latencies were seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples: return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def hedged_call(fn: Callable[[], T], delay: float, executor: "Executor", discard: Optional[Callable[[T], None]] = None) -> T:
+    """
+    Runs fn(); if it has not finished after 'delay' seconds, runs it a second time
+    in parallel and returns the first successful result. The other result is
+    passed to discard() when it arrives (e.g. to close a response). If both
+    attempts fail, the last error is raised.
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED, TimeoutError as FutureTimeout
+    first = executor.submit(fn)
+    try:
+        return first.result(timeout=delay)
+    except FutureTimeout:
+        pass
+    increment("hedge_sent")
+    second = executor.submit(fn)
+    pending = {first, second}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None: error = future.exception(); continue
+            if future is second: increment("hedge_won")
+            if discard is not None:
+                for other in pending: other.add_done_callback(lambda f: f.exception() is None and discard(f.result()))
+            return future.result()
+    raise error
+
+
+class CircuitBreaker:
+    """
+    closed -> (failure_threshold consecutive failures) -> open -> (reset_timeout) -> half-open.
+    In half-open a single probe is allowed: success closes the circuit, failure reopens it.
+    A call is one logical request: report its outcome once, after its last retry,
+    or release() it when it ended for a reason that is not the upstream's fault.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, name: str = "upstream"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raises CircuitOpenError if the call must not be attempted now."""
+        with self._lock:
+            if self.state == "closed": return
+            if self.state == "open":
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    increment("circuit_rejected")
+                    raise CircuitOpenError(f"{self.name} is unavailable (circuit open, retrying in {remaining:.0f}s)")
+                self.state = "half-open"
+                log.info(f"Circuit for {self.name} half-open: sending a probe request.")
+            if self._probing: # half-open: only one probe in flight
+                increment("circuit_rejected")
+                raise CircuitOpenError(f"{self.name} is unavailable (circuit half-open, probe in flight)")
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed": log.warning(f"Circuit for {self.name} closed: upstream is answering again.")
+            self.state = "closed"
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open" or (self.state == "closed" and self._failures >= self.failure_threshold):
+                if self.state == "closed": log.warning(f"Circuit for {self.name} opened after {self._failures} consecutive failures.")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                increment("circuit_opened")
+            self._probing = False
+
+    def release(self):
+        """Ends a call without an outcome (not an upstream failure): a half-open probe slot is freed."""
+        with self._lock:
+            self._probing = False
+
+    def reset(self):
+        with self._lock:
+            self.state = "closed"; self._failures = 0; self._probing = False
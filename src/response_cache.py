@@ -0,0 +1,115 @@
+# response_cache.py
+# Persistent on-disk cache for World Bank API responses (SQLite, NO network code).
+# Used by logic.py: entries are keyed by URL + query params and store the raw JSON
+# body together with the ETag/Last-Modified validators sent by the server.
+
+import os
+import time
+import sqlite3
+import threading
+from urllib.parse import urlencode
+from typing import Optional, Dict, NamedTuple
+from instrumentation import get_logger
+
+log = get_logger("Cache")
+
+# --- Defaults (overridable through environment variables) ---
+DEFAULT_CACHE_DIR = os.environ.get("GINI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "gini_fetcher"))
+DEFAULT_TTL = float(os.environ.get("GINI_CACHE_TTL", 24 * 3600))             # Seconds an entry is served without revalidation
+DEFAULT_MAX_BYTES = int(os.environ.get("GINI_CACHE_MAX_BYTES", 50 * 1024 * 1024)) # Total body size before LRU eviction
+CACHE_FILE_NAME = "responses.sqlite3"
+
+
+class CacheEntry(NamedTuple):
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache with TTL, conditional revalidation data and
+    size-bounded (least recently used) eviction.
+
+    A single connection is shared and guarded by a lock, so the cache can be used
+    from worker threads.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.path = os.path.join(self.cache_dir, CACHE_FILE_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " stored_at REAL NOT NULL, last_access REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, str]] = None) -> str:
+        """Builds a stable cache key from the URL and the (sorted) query params."""
+        if not params: return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Returns the stored entry (fresh or stale) or None, and marks it as recently used."""
+        with self._lock:
+            row = self._conn.execute("SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None: return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(*row)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """True if the entry is younger than the TTL and can be served without revalidation."""
+        return (time.time() - entry.stored_at) < self.ttl
+
+    def put(self, key: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Stores (or replaces) a response body and evicts old entries if over the size limit."""
+        now = time.time()
+        size = len(body.encode('utf-8'))
+        if size > self.max_bytes:
+            log.warning(f"Response for '{key}' ({size} bytes) exceeds cache size limit; not stored.")
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, stored_at, last_access, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", (key, body, etag, last_modified, now, now, size)
+            )
+            self._evict_locked()
+
+    def touch(self, key: str):
+        """Resets the age of an entry (used after a '304 Not Modified' revalidation)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ?, last_access = ? WHERE key = ?", (now, now, key))
+
+    def clear(self):
+        """Removes every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict_locked(self):
+        """Deletes least recently used entries until the total size fits max_bytes. Caller holds the lock."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes: return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes: break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size; evicted += 1
+        log.debug(f"Evicted {evicted} entr{'y' if evicted == 1 else 'ies'} to stay under {self.max_bytes} bytes.")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
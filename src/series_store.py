@@ -0,0 +1,122 @@
+# series_store.py
+# Local store of indicator series (SQLite, NO network code).
+# Used by logic.py for incremental refreshes: every (indicator, country, year)
+# row ever fetched is kept, together with the time each country was last
+# checked, so a refresh only has to ask the API for years newer than the
+# newest value already held.
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional, List, Dict, Any, Iterable
+
+from response_cache import DEFAULT_CACHE_DIR
+from records import record_country_key
+
+SERIES_FILE_NAME = "series.sqlite3"
+ALL_COUNTRIES = "*" # Pseudo-country marking a bulk (country/all) check
+
+
+class SeriesStore:
+    """
+    Rows are keyed by (indicator, country, year); merging a refresh replaces the
+    rows it returns and leaves the rest untouched. Null values are stored too, so
+    a year the API knows but has no value for is not mistaken for a missing year.
+
+    A single connection is shared and guarded by a lock (usable from worker threads).
+    """
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.path = os.path.join(self.cache_dir, SERIES_FILE_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS series ("
+            " indicator TEXT NOT NULL, country TEXT NOT NULL, year INTEGER NOT NULL, value REAL,"
+            " country_id TEXT, country_name TEXT, PRIMARY KEY (indicator, country, year))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checks ("
+            " indicator TEXT NOT NULL, country TEXT NOT NULL, checked_at REAL NOT NULL, PRIMARY KEY (indicator, country))"
+        )
+
+    # --- Reads ---
+    def checked_at(self, indicator: str, country: str) -> Optional[float]:
+        """When the country (or ALL_COUNTRIES for the bulk set) was last refreshed, or None if never."""
+        with self._lock:
+            row = self._conn.execute("SELECT checked_at FROM checks WHERE indicator = ? AND country = ?", (indicator, country)).fetchone()
+        return row[0] if row else None
+
+    def newest_year(self, indicator: str, country: str) -> Optional[int]:
+        """Newest year holding a (non-null) value, or None if the country has none."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(year) FROM series WHERE indicator = ? AND country = ? AND value IS NOT NULL", (indicator, country)).fetchone()
+        return row[0] if row else None
+
+    def newest_years(self, indicator: str) -> Dict[str, Optional[int]]:
+        """Newest valued year of every stored country (None for countries with rows but no values)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT country, MAX(CASE WHEN value IS NOT NULL THEN year END) FROM series WHERE indicator = ? GROUP BY country", (indicator,)
+            ).fetchall()
+        return dict(rows)
+
+    def records(self, indicator: str, countries: Optional[Iterable[str]] = None, start: int = 0, end: int = 9999) -> List[Dict[str, Any]]:
+        """Stored rows as raw API-style records (newest first per country, like the API)."""
+        query = "SELECT country, year, value, country_id, country_name FROM series WHERE indicator = ? AND year BETWEEN ? AND ?"
+        args: List[Any] = [indicator, start, end]
+        if countries is not None:
+            countries = list(countries)
+            query += f" AND country IN ({','.join('?' * len(countries))})"
+            args.extend(countries)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY country, year DESC", args).fetchall()
+        return [{
+            "indicator": {"id": indicator},
+            "country": {"id": country_id or country, "value": country_name or "N/A"},
+            "countryiso3code": country,
+            "date": str(year),
+            "value": value,
+        } for country, year, value, country_id, country_name in rows]
+
+    # --- Writes ---
+    def merge(self, indicator: str, records: Iterable[Dict[str, Any]], checked: Iterable[str] = ()) -> int:
+        """
+        Upserts raw API records and marks the 'checked' countries as refreshed now.
+        Returns the number of rows written.
+        """
+        rows = []
+        for record in records:
+            if not isinstance(record, dict): continue
+            country = record_country_key(record)
+            try: year = int(record.get('date'))
+            except (ValueError, TypeError): continue
+            if not country: continue
+            value = record.get('value')
+            try: value = float(value) if value is not None else None
+            except (ValueError, TypeError): value = None
+            info = record.get('country') or {}
+            rows.append((indicator, country, year, value, info.get('id'), info.get('value')))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._conn.executemany("INSERT OR REPLACE INTO checks VALUES (?, ?, ?)", [(indicator, c, now) for c in checked])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM series"); self._conn.execute("DELETE FROM checks")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -5,6 +5,8 @@
 import os
 import ctypes
 import sys
+import mmap
+import logging
 
 try:
     from msl.loadlib import Server32
@@ -18,6 +20,18 @@ except ImportError:
 # The client (logic.py) will ensure this script is found.
 LIB_NAME = 'libginiadder.so'
 C_FUNC_NAME = 'process_gini_pure_c'
+C_BATCH_FUNC_NAME = 'process_gini_batch'
+
+# --- Logging ---
+# Self-contained (this process does not import the 64-bit side's instrumentation.py),
+# but uses the same GINI_LOG_LEVEL variable and message format. The environment is
+# inherited from the Client64 process, so GINI_LOG_LEVEL=DEBUG traces both sides.
+log = logging.getLogger("gini.Server32")
+_handler = logging.StreamHandler(sys.stderr)
+_handler.setFormatter(logging.Formatter("[%(name)s] %(levelname)s: %(message)s"))
+log.addHandler(_handler)
+log.propagate = False
+log.setLevel(os.environ.get("GINI_LOG_LEVEL", "WARNING").upper())
 
 class GiniAdderServer(Server32):
     """
@@ -32,12 +46,13 @@ class GiniAdderServer(Server32):
         port: Port number provided by msl-loadlib.
         kwargs: Extra arguments (quiet, authkey) from msl-loadlib.
         """
+        self._segments = {} # Shared-memory segments mapped for process_gini_batch_shm: path -> (file, mmap)
         library_path = os.path.join(os.path.dirname(__file__), LIB_NAME)
-        print(f"[Server32] Initializing GiniAdderServer...", file=sys.stderr)
-        print(f"[Server32] Attempting to load library: {library_path}", file=sys.stderr)
+        log.debug("Initializing GiniAdderServer...")
+        log.debug(f"Attempting to load library: {library_path}")
 
         if not os.path.exists(library_path):
-            print(f"[Server32] FATAL ERROR: Library '{library_path}' not found.", file=sys.stderr)
+            log.error(f"FATAL: Library '{library_path}' not found.")
             # Raise an exception to prevent the server from starting improperly
             raise FileNotFoundError(f"32-bit library not found: {library_path}")
 
@@ -46,23 +61,29 @@ class GiniAdderServer(Server32):
             # This works because *this* script runs in a 32-bit process.
             # Use 'cdll' for standard cdecl convention expected from gcc -m32
             super().__init__(library_path, 'cdll', host, port, **kwargs)
-            print(f"[Server32] Successfully loaded '{LIB_NAME}' via ctypes.CDLL.", file=sys.stderr)
+            log.info(f"Successfully loaded '{LIB_NAME}' via ctypes.CDLL.")
 
             # --- Define signature for the C function accessed via self.lib ---
             # self.lib is the ctypes CDLL object created by Server32
             c_func = getattr(self.lib, C_FUNC_NAME)
             c_func.argtypes = [ctypes.c_float]
             c_func.restype = ctypes.c_int
-            print(f"[Server32] Set signature for function '{C_FUNC_NAME}'.", file=sys.stderr)
+            log.debug(f"Set signature for function '{C_FUNC_NAME}'.")
+
+            # int process_gini_batch(const float* in, int* out, int n)
+            c_batch_func = getattr(self.lib, C_BATCH_FUNC_NAME)
+            c_batch_func.argtypes = [ctypes.POINTER(ctypes.c_float), ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+            c_batch_func.restype = ctypes.c_int
+            log.debug(f"Set signature for function '{C_BATCH_FUNC_NAME}'.")
 
         except OSError as e:
-            print(f"[Server32] FATAL ERROR: OSError loading library '{library_path}': {e}", file=sys.stderr)
+            log.error(f"FATAL: OSError loading library '{library_path}': {e}")
             raise # Re-raise the exception
         except AttributeError as e:
-             print(f"[Server32] FATAL ERROR: Function '{C_FUNC_NAME}' not found in library: {e}", file=sys.stderr)
+             log.error(f"FATAL: Function '{C_FUNC_NAME}' or '{C_BATCH_FUNC_NAME}' not found in library: {e}")
              raise # Re-raise the exception
         except Exception as e:
-            print(f"[Server32] FATAL ERROR: Unexpected error during server init: {type(e).__name__}: {e}", file=sys.stderr)
+            log.error(f"FATAL: Unexpected error during server init: {type(e).__name__}: {e}")
             raise # Re-raise the exception
 
 
@@ -73,17 +94,97 @@ class GiniAdderServer(Server32):
         Receives the float value from the Client64, calls the C function,
         and returns the integer result back to the client.
         """
-        print(f"[Server32] Received request: process_gini_pure_c({gini_value_float})", file=sys.stderr)
+        log.debug(f"Received request: process_gini_pure_c({gini_value_float})")
         try:
             # Access the C function via the self.lib (ctypes) object
             result = self.lib.process_gini_pure_c(ctypes.c_float(gini_value_float))
-            print(f"[Server32] C function returned: {result}", file=sys.stderr)
+            log.debug(f"C function returned: {result}")
             return result
         except Exception as e:
             # Catch errors during the actual C call
-            print(f"[Server32] ERROR calling C function '{C_FUNC_NAME}': {type(e).__name__}: {e}", file=sys.stderr)
+            log.error(f"Error calling C function '{C_FUNC_NAME}': {type(e).__name__}: {e}")
             # Raise the exception so Client64 receives a Server32Error
             raise
 
+    def process_gini_batch(self, gini_values):
+        """
+        Receives a list of floats from the Client64, rounds all of them with a
+        single call into the C/ASM library and returns the list of ints.
+        One IPC round trip for the whole array instead of one per value.
+        """
+        n = len(gini_values)
+        log.debug(f"Received request: process_gini_batch({n} values)")
+        if n == 0:
+            return []
+        try:
+            in_array = (ctypes.c_float * n)(*gini_values)
+            out_array = (ctypes.c_int * n)()
+            processed = self.lib.process_gini_batch(in_array, out_array, n)
+            if processed != n:
+                raise RuntimeError(f"C batch function processed {processed} of {n} values")
+            return list(out_array)
+        except Exception as e:
+            log.error(f"Error calling C function '{C_BATCH_FUNC_NAME}': {type(e).__name__}: {e}")
+            raise
+
+    def ping(self):
+        """Liveness check used by the client-side pool. Returns this process id."""
+        return os.getpid()
+
+    # --- Shared-memory batch path (see shm_transport.py on the client side) ---
+    def _map_segment(self, path, size):
+        """Maps (or remaps, if the client resized it) the shared segment at 'path'."""
+        entry = self._segments.get(path)
+        if entry is not None and len(entry[1]) == size:
+            return entry[1]
+        # The client recreates the segment under a new path when it grows:
+        # drop any other mapping we still hold.
+        self._unmap_all()
+        f = open(path, 'r+b')
+        mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_WRITE)
+        self._segments[path] = (f, mm)
+        log.debug(f"Mapped shared segment {path} ({size} bytes).")
+        return mm
+
+    def _unmap_all(self):
+        for f, mm in self._segments.values():
+            mm.close(); f.close()
+        self._segments.clear()
+
+    def process_gini_batch_shm(self, path, n, input_offset, output_offset, size):
+        """
+        Rounds n floats that the client wrote into the shared segment 'path'.
+        The C library reads its input from, and writes its output to, the
+        shared buffer directly: only these few integers cross the socket.
+        Returns the number of processed elements.
+        """
+        if n <= 0:
+            return 0
+        try:
+            mm = self._map_segment(path, size)
+            in_array = (ctypes.c_float * n).from_buffer(mm, input_offset)
+            out_array = (ctypes.c_int * n).from_buffer(mm, output_offset)
+            try:
+                processed = self.lib.process_gini_batch(in_array, out_array, n)
+            finally:
+                del in_array, out_array # Release the exported buffers so the mmap can be closed later
+            if processed != n:
+                raise RuntimeError(f"C batch function processed {processed} of {n} values")
+            return processed
+        except Exception as e:
+            log.error(f"Error in shared-memory batch ({path}): {type(e).__name__}: {e}")
+            raise
+
+    def release_shm(self, path):
+        """Unmaps a shared segment the client is about to delete."""
+        entry = self._segments.pop(path, None)
+        if entry is not None:
+            entry[1].close(); entry[0].close()
+        return True
+
+    def shutdown_handler(self):
+        """Called by msl-loadlib right before the server stops."""
+        self._unmap_all()
+
 # The Server32 base class handles the main server loop when executed.
 # No explicit server start code is needed here.
@@ -0,0 +1,215 @@
+# server_pool.py
+# Pool of pre-warmed 32-bit server connections (Client64 instances), NO GUI code.
+# Used by logic.py: each pooled client owns its own Server32 process, so N
+# clients serve N requests in parallel. Servers are started in the background,
+# pinged while idle, replaced when they die and shut down at exit.
+
+import sys
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Callable, Any, Optional, Iterator, List
+from instrumentation import get_logger
+
+log = get_logger("Pool")
+
+
+class PoolUnavailableError(RuntimeError):
+    """Raised when no healthy server becomes available within the timeout."""
+
+
+def is_server_error(e: BaseException) -> bool:
+    """True for msl-loadlib's Server32Error. Looked up lazily: msl-loadlib is only loaded once a client exists."""
+    exceptions = sys.modules.get("msl.loadlib.exceptions")
+    return exceptions is not None and isinstance(e, exceptions.Server32Error)
+
+
+def is_alive(client: Any) -> bool:
+    """True if the client's server process is still running and connected."""
+    proc = getattr(client, '_proc', None)
+    if proc is not None and proc.poll() is not None: return False
+    return getattr(client, '_conn', True) is not None
+
+
+class Server32Pool:
+    """
+    Keeps 'size' clients created by 'factory' ready for use.
+
+    - start(): spawns the servers in background threads (eager warm-up).
+    - client(): context manager that lends an idle, healthy client.
+    - Clients whose server died (crash, lost connection) are discarded and
+      replaced in the background, so later requests keep working.
+    - A health thread pings idle clients every 'ping_interval' seconds.
+    - If no server is alive and the last start failed, client() raises
+      PoolUnavailableError at once with that error instead of waiting; starts
+      are retried at most every 'respawn_interval' seconds.
+    - shutdown(): stops every server (also registered with atexit).
+    """
+    def __init__(self, factory: Callable[[], Any], size: int = 2, ping_interval: float = 15.0, acquire_timeout: float = 60.0,
+                 max_spawn_attempts: int = 3, respawn_interval: float = 30.0):
+        if size < 1: raise ValueError("Pool size must be >= 1")
+        self.factory = factory
+        self.size = size
+        self.ping_interval = ping_interval
+        self.acquire_timeout = acquire_timeout
+        self.max_spawn_attempts = max_spawn_attempts # Consecutive failed starts before a spawn thread gives up
+        self.respawn_interval = respawn_interval     # Seconds after the last failure before client() tries again
+        self.last_spawn_error: Optional[str] = None  # Why the most recent start failed (cleared by a success)
+        self._spawn_failures = 0                     # Consecutive failed starts, pool-wide
+        self._last_failure = 0.0
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._clients: List[Any] = []   # Every live client (idle or lent)
+        self._spawning = 0              # Servers currently starting
+        self._started = False
+        self._closed = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        self.restarts = 0
+
+    # --- Lifecycle ---
+    def start(self):
+        """Starts warming up the servers in the background (idempotent)."""
+        with self._lock:
+            if self._started or self._closed.is_set(): return
+            self._started = True
+        log.info(f"Warming up {self.size} Server32 process(es) in the background...")
+        for _ in range(self.size): self._spawn_async()
+        self._health_thread = threading.Thread(target=self._health_loop, name="server32-health", daemon=True)
+        self._health_thread.start()
+        atexit.register(self.shutdown)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until at least one server is idle (or the timeout expires)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._closed.is_set():
+            if self._idle.qsize() > 0: return True
+            if deadline is not None and time.monotonic() >= deadline: return False
+            time.sleep(0.01)
+        return False
+
+    def shutdown(self):
+        """Stops the health thread and every server process."""
+        if self._closed.is_set(): return
+        self._closed.set()
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients: self._stop_client(client)
+        log.info(f"Shut down {len(clients)} Server32 process(es).")
+
+    # --- Borrowing ---
+    @contextmanager
+    def client(self) -> Iterator[Any]:
+        """
+        Lends an idle client. If the body raises anything other than a
+        Server32Error (which means the server is alive and reported an
+        error), the client is considered dead and replaced.
+        """
+        self.start()
+        if self._closed.is_set(): raise PoolUnavailableError("Server32 pool is shut down")
+        client = self._acquire()
+        healthy = True
+        try:
+            yield client
+        except Exception as e:
+            healthy = is_server_error(e) and is_alive(client)
+            raise
+        finally:
+            if healthy and is_alive(client) and not self._closed.is_set(): self._idle.put(client)
+            else: self._replace(client)
+
+    # --- Internals ---
+    def _acquire(self) -> Any:
+        """Waits for an idle client, failing fast once starting a server has failed and none is alive."""
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            unavailable = self._unavailable_reason()
+            if unavailable: raise PoolUnavailableError(unavailable)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: raise PoolUnavailableError(f"No Server32 became available within {self.acquire_timeout:.0f}s")
+            try: return self._idle.get(timeout=min(remaining, 0.1))
+            except queue.Empty: continue
+
+    def _unavailable_reason(self) -> Optional[str]:
+        """Why no client can be lent (no live server and the last start failed), or None. Schedules a new start when due."""
+        with self._lock:
+            if self._clients or self.last_spawn_error is None: return None
+            missing = 0
+            if self._spawning == 0 and time.monotonic() - self._last_failure >= self.respawn_interval:
+                missing = self.size - len(self._clients)
+            error = self.last_spawn_error
+        for _ in range(missing): self._spawn_async()
+        return f"Server32 could not be started ({error})"
+
+    def _spawn_async(self):
+        with self._lock: self._spawning += 1
+        threading.Thread(target=self._spawn, name="server32-spawn", daemon=True).start()
+
+    def _spawn(self):
+        """Creates one client, retrying with backoff; gives up after max_spawn_attempts consecutive failures."""
+        delay = 0.5
+        try:
+            for attempt in range(1, self.max_spawn_attempts + 1):
+                if self._closed.is_set(): return
+                started = time.perf_counter()
+                try:
+                    client = self.factory()
+                except Exception as e:
+                    self._record_spawn_failure(e)
+                    if attempt < self.max_spawn_attempts: self._closed.wait(delay); delay *= 2
+                    continue
+                if self._closed.is_set(): self._stop_client(client); return
+                with self._lock:
+                    self._clients.append(client)
+                    self.last_spawn_error = None; self._spawn_failures = 0
+                self._idle.put(client)
+                log.info(f"Server32 ready in {time.perf_counter() - started:.2f}s.")
+                return
+        finally:
+            with self._lock: self._spawning -= 1
+
+    def _record_spawn_failure(self, e: Exception):
+        """Remembers the error; only the first of a run of failures is logged as a warning (no traceback)."""
+        with self._lock:
+            self.last_spawn_error = f"{type(e).__name__}: {e}"
+            self._last_failure = time.monotonic()
+            self._spawn_failures += 1
+            failures = self._spawn_failures
+        if failures == 1: log.warning(f"Failed to start Server32: {self.last_spawn_error}. C requests fail fast until a start succeeds.")
+        else: log.debug(f"Server32 start failed again ({failures} in a row): {self.last_spawn_error}")
+
+    def _replace(self, client: Any):
+        """Discards a dead client and starts a replacement in the background."""
+        with self._lock:
+            if client in self._clients: self._clients.remove(client)
+            need_spawn = not self._closed.is_set() and len(self._clients) + self._spawning < self.size
+        log.warning("Discarding dead Server32 client.")
+        threading.Thread(target=self._stop_client, args=(client,), daemon=True).start()
+        if need_spawn:
+            self.restarts += 1
+            self._spawn_async()
+
+    @staticmethod
+    def _stop_client(client: Any):
+        try: client.shutdown_server32(kill_timeout=2)
+        except Exception: pass
+
+    def _health_loop(self):
+        """Pings idle clients periodically; dead ones are replaced."""
+        while not self._closed.wait(self.ping_interval):
+            checked = []
+            while True:
+                try: checked.append(self._idle.get_nowait())
+                except queue.Empty: break
+            for client in checked:
+                alive = is_alive(client)
+                if alive:
+                    try: client.ping()
+                    except Exception: alive = False
+                if alive and not self._closed.is_set(): self._idle.put(client)
+                else: self._replace(client)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": self.size, "live": len(self._clients), "idle": self._idle.qsize(), "spawning": self._spawning, "restarts": self.restarts, "last_spawn_error": self.last_spawn_error}
@@ -0,0 +1,100 @@
+# shm_transport.py
+# Shared-memory data path between the 64-bit client (logic.py) and the 32-bit
+# server (server_32.py). The float inputs and int outputs of a batch live in an
+# mmap'd file under /dev/shm that both processes map; only the file path,
+# offsets and the element count travel over the msl-loadlib control channel.
+#
+# Layout of a segment with capacity C elements (float32 and int32 are 4 bytes
+# on both the 64-bit and the 32-bit side):
+#   [0, 4*C)        float32 inputs   (written by the client)
+#   [4*C, 8*C)      int32 outputs    (written by the C library in the server)
+
+import os
+import mmap
+import array
+import itertools
+import tempfile
+import threading
+from typing import List, Sequence
+from instrumentation import get_logger
+
+log = get_logger("SHM")
+
+SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+ITEM_SIZE = 4 # sizeof(float) == sizeof(int) == 4
+MIN_CAPACITY = 1024
+
+_segment_ids = itertools.count()
+
+
+class SharedBatchBuffer:
+    """
+    Client-side owner of one shared segment. The segment grows (is recreated)
+    when a batch does not fit; the server remaps it when it sees a new size.
+    Use one buffer per server connection; the lock serializes batches on it.
+    """
+    def __init__(self, capacity: int = MIN_CAPACITY):
+        self.lock = threading.Lock()
+        self.path = None
+        self.capacity = 0
+        self._file = None
+        self._mmap = None
+        self._allocate(max(capacity, MIN_CAPACITY))
+
+    @property
+    def input_offset(self) -> int:
+        return 0
+
+    @property
+    def output_offset(self) -> int:
+        return self.capacity * ITEM_SIZE
+
+    @property
+    def size(self) -> int:
+        return 2 * self.capacity * ITEM_SIZE
+
+    def _allocate(self, capacity: int):
+        """Creates a new segment file of the given capacity (replacing the old one)."""
+        self._release()
+        self.capacity = capacity
+        self.path = os.path.join(SHM_DIR, f"gini_batch_{os.getpid()}_{next(_segment_ids)}")
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        self._file = os.fdopen(fd, "r+b")
+        self._file.truncate(self.size)
+        self._mmap = mmap.mmap(self._file.fileno(), self.size, access=mmap.ACCESS_WRITE)
+        log.debug(f"Created shared segment {self.path} ({capacity} elements).")
+
+    def ensure_capacity(self, n: int) -> bool:
+        """Makes room for n elements. Returns True if the segment had to be recreated."""
+        if n <= self.capacity: return False
+        new_capacity = self.capacity
+        while new_capacity < n: new_capacity *= 2
+        self._allocate(new_capacity)
+        return True
+
+    def write_inputs(self, values: Sequence[float]):
+        """Copies the float inputs into the input region of the segment."""
+        n = len(values)
+        self.ensure_capacity(n)
+        view = memoryview(self._mmap)[self.input_offset:self.input_offset + n * ITEM_SIZE].cast('f')
+        try: view[:] = array.array('f', values)
+        finally: view.release()
+
+    def read_outputs(self, n: int) -> List[int]:
+        """Reads the n int results written by the server."""
+        view = memoryview(self._mmap)[self.output_offset:self.output_offset + n * ITEM_SIZE].cast('i')
+        try: return view.tolist()
+        finally: view.release()
+
+    def _release(self):
+        if self._mmap is not None: self._mmap.close(); self._mmap = None
+        if self._file is not None: self._file.close(); self._file = None
+        if self.path is not None:
+            try: os.unlink(self.path)
+            except OSError: pass
+            self.path = None
+
+    def close(self):
+        """Unmaps and deletes the segment."""
+        with self.lock:
+            self._release()
@@ -0,0 +1,87 @@
+# snapshot.py
+# Binary export/import of IndicatorDataset snapshots, NO network code.
+# A snapshot is a directory with one .npy file per column and a small
+# meta.json (codes, names, provenance):
+#
+#   <dir>/meta.json
+#   <dir>/<INDICATOR>/{country,year,value,valid,offsets,rounded}.npy
+#
+# Loading maps the .npy files read-only (np.load(mmap_mode='r')): nothing is
+# parsed or copied, so a full snapshot reloads in milliseconds and every
+# process that maps it shares the same page-cache copy.
+
+import os
+import json
+import time
+import shutil
+import numpy as np
+from typing import Optional, Dict, Any, Tuple
+
+from dataset import IndicatorDataset
+
+SNAPSHOT_FORMAT = 1
+META_FILE_NAME = "meta.json"
+COLUMNS = ("country", "year", "value", "valid", "offsets") # Always present; 'rounded' is optional
+
+
+def _indicator_dir(path: str, indicator: str) -> str:
+    return os.path.join(path, indicator.replace(os.sep, "_"))
+
+
+def export_snapshot(datasets: Dict[str, IndicatorDataset], path: str, extra_meta: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Writes the datasets (and their 'rounded' column when set) to 'path'.
+    The snapshot is assembled in a sibling temporary directory and moved into
+    place at the end, so readers never see a half-written snapshot.
+
+    Returns:
+        (meta, error_message).
+    """
+    path = os.path.abspath(path)
+    staging = f"{path}.tmp-{os.getpid()}"
+    meta: Dict[str, Any] = {"format": SNAPSHOT_FORMAT, "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "indicators": {}}
+    meta.update(extra_meta or {})
+    try:
+        shutil.rmtree(staging, ignore_errors=True)
+        for indicator, dataset in datasets.items():
+            directory = _indicator_dir(staging, indicator)
+            os.makedirs(directory)
+            columns = {name: getattr(dataset, name) for name in COLUMNS}
+            if dataset.rounded is not None: columns["rounded"] = dataset.rounded
+            for name, column in columns.items(): np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(column))
+            meta["indicators"][indicator] = {"rows": len(dataset), "codes": dataset.codes, "names": dataset.names, "rounded": dataset.rounded is not None}
+        with open(os.path.join(staging, META_FILE_NAME), "w", encoding="utf-8") as f: json.dump(meta, f)
+        previous = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path): os.replace(path, previous)
+        os.replace(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+    except OSError as e:
+        shutil.rmtree(staging, ignore_errors=True)
+        return None, f"Could not write snapshot '{path}': {e}"
+    return meta, None
+
+
+def load_snapshot(path: str, mmap: bool = True) -> Tuple[Optional[Dict[str, IndicatorDataset]], Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Maps a snapshot written by export_snapshot (read-only when mmap=True).
+
+    Returns:
+        (datasets_by_indicator, meta, error_message).
+    """
+    try:
+        with open(os.path.join(path, META_FILE_NAME), encoding="utf-8") as f: meta = json.load(f)
+    except (OSError, ValueError) as e:
+        return None, None, f"Not a snapshot directory '{path}': {e}"
+    if meta.get("format") != SNAPSHOT_FORMAT:
+        return None, meta, f"Unsupported snapshot format {meta.get('format')!r} (expected {SNAPSHOT_FORMAT})."
+    datasets: Dict[str, IndicatorDataset] = {}
+    try:
+        for indicator, info in meta["indicators"].items():
+            directory = _indicator_dir(path, indicator)
+            names = COLUMNS + (("rounded",) if info.get("rounded") else ())
+            columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None, allow_pickle=False) for name in names}
+            if len(columns["year"]) != info["rows"]: return None, meta, f"Snapshot column size mismatch for {indicator}."
+            datasets[indicator] = IndicatorDataset.from_sorted_columns(indicator, info["codes"], info["names"], columns)
+    except (OSError, ValueError, KeyError) as e:
+        return None, meta, f"Could not load snapshot '{path}': {type(e).__name__}: {e}"
+    return datasets, meta, None
@@ -15,11 +15,12 @@ echo "ASM compilation successful: asm_rounder.o created."
 # -m32: Compile for 32-bit architecture
 # -g: Include debugging information for the C code
 # -Wall: Enable all standard warnings
+# -DGINI_TRACE: Keep the [C Bridge] printf tracing (compiled out of the library by default)
 # -o test_c_asm: Specify the output executable name
 # asm_rounder.c: The C source file (containing main now)
 # asm_rounder.o: The Assembly object file to link with
 echo "Compiling C and linking with ASM object..."
-gcc -m32 -g -Wall -o test_c_asm gini_adder.c asm_rounder.o
+gcc -m32 -g -Wall -DGINI_TRACE -o test_c_asm gini_adder.c asm_rounder.o
 
 # Check if compilation/linking succeeded
 if [ $? -ne 0 ]; then
@@ -32,6 +33,41 @@ echo "C/ASM linking successful: test_c_asm created."
 echo "Running the test executable..."
 ./test_c_asm
 
+# Step 3b: Same tests against the native 64-bit port (asm_rounder64.asm), used by
+# logic.py's in-process backend. Skipped on non-x86_64 hosts.
+if [ "$(uname -m)" = "x86_64" ]; then
+    echo "Compiling and running native 64-bit variant..."
+    nasm -f elf64 -g -F dwarf asm_rounder64.asm -o asm_rounder64.o && \
+        gcc -g -Wall -DGINI_TRACE -o test_c_asm64 gini_adder.c asm_rounder64.o && \
+        ./test_c_asm64
+    if [ $? -ne 0 ]; then
+        echo "Native 64-bit variant failed!"
+        exit 1
+    fi
+fi
+
+# Step 3c: Native benchmark + differential check of every ASM kernel against a
+# nearbyintf() reference (asm_bench.c), linked with the ASM objects only.
+# Quick settings here (2^24 random bit patterns + special values); for all 2^32
+# patterns run: ./asm_bench --exhaustive --no-bench
+# -O2: The timing loops should not be the bottleneck
+# -lm: nearbyintf
+echo "Compiling and running the native ASM benchmark/checker..."
+gcc -m32 -O2 -g -Wall -o asm_bench asm_bench.c asm_rounder.o -lm && \
+    ./asm_bench --samples 16777216
+if [ $? -ne 0 ]; then
+    echo "ASM benchmark/check failed!"
+    exit 1
+fi
+if [ "$(uname -m)" = "x86_64" ]; then
+    gcc -O2 -g -Wall -o asm_bench64 asm_bench.c asm_rounder64.o -lm && \
+        ./asm_bench64 --samples 16777216
+    if [ $? -ne 0 ]; then
+        echo "Native 64-bit ASM benchmark/check failed!"
+        exit 1
+    fi
+fi
+
 # Step 4 (Optional): Debug with GDB if it crashes or gives wrong results
 # echo "To debug, run: gdb ./test_c_asm"
 # Inside GDB: